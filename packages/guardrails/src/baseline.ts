@@ -0,0 +1,139 @@
+/**
+ * Guardrail baseline
+ * Fingerprints of accepted findings, stored in .ai/ so scans report only findings that are new.
+ * A fingerprint covers the pattern, the file and the (normalized) full match but not the line,
+ * so a known finding stays known when code above it moves.
+ */
+
+import { createHash } from "crypto"
+import { mkdir, readFile, writeFile } from "fs/promises"
+import { dirname, relative, sep } from "path"
+import type { DetectionResult } from "./scanner"
+
+// Location of the baseline inside the .ai/ folder (meant to be committed)
+export const BASELINE_FILE = "guardrail-baseline.json"
+
+// Bump when the fingerprint recipe changes
+const BASELINE_VERSION = 1
+
+/**
+ * One accepted finding. The match itself is never stored (the file is committed); file and
+ * line are only there to help review the baseline.
+ */
+export interface BaselineEntry {
+  fingerprint: string
+  patternId: string
+  file: string
+  line: number
+}
+
+interface BaselineFile {
+  version: number
+  findings: BaselineEntry[]
+}
+
+/**
+ * Hash of a match's full text, with whitespace runs collapsed so reflowed or CRLF copies of
+ * the same secret hash alike
+ */
+export function hashMatch(matchText: string): string {
+  const normalized = matchText.trim().replace(/\s+/g, " ")
+  return createHash("sha256").update(normalized).digest("hex").slice(0, 32)
+}
+
+/**
+ * Stable fingerprint of a detection in a file (path relative to the repository root)
+ */
+export function fingerprintDetection(detection: DetectionResult, path: string): string {
+  return createHash("sha256")
+    .update(`${detection.patternId}\0${path}\0${detection.matchHash}`)
+    .digest("hex")
+}
+
+/**
+ * Accepted findings of a repository, as a set of fingerprints
+ */
+export class Baseline {
+  // Directory baseline paths are relative to (the repository root)
+  readonly root: string
+  private fingerprints: Set<string>
+
+  constructor(root: string, fingerprints: Iterable<string> = []) {
+    this.root = root
+    this.fingerprints = new Set(fingerprints)
+  }
+
+  /**
+   * Load a baseline file; null if there is none. A file that can't be used is an error,
+   * since silently dropping it would fail CI on every accepted finding.
+   */
+  static async load(path: string, root: string): Promise<Baseline | null> {
+    let text: string
+    try {
+      text = await readFile(path, "utf-8")
+    } catch (error) {
+      if ((error as NodeJS.ErrnoException).code === "ENOENT") {
+        return null
+      }
+      throw new Error(`Cannot read baseline ${path}: ${error}`)
+    }
+    let parsed: BaselineFile
+    try {
+      parsed = JSON.parse(text) as BaselineFile
+    } catch (error) {
+      throw new Error(`Invalid baseline ${path}: ${error instanceof Error ? error.message : error}`)
+    }
+    if (parsed.version !== BASELINE_VERSION || !Array.isArray(parsed.findings)) {
+      throw new Error(`Unsupported baseline ${path} (version ${parsed.version}); regenerate it with 'otc guardrail baseline'`)
+    }
+    return new Baseline(root, parsed.findings.map((entry) => entry.fingerprint))
+  }
+
+  get size(): number {
+    return this.fingerprints.size
+  }
+
+  /**
+   * Path of a file relative to the baseline root, with forward slashes
+   */
+  pathOf(filePath: string): string {
+    return relative(this.root, filePath).split(sep).join("/")
+  }
+
+  /**
+   * Whether a detection in a file (absolute or cwd-relative path) is an accepted finding
+   */
+  has(detection: DetectionResult, filePath: string): boolean {
+    return this.fingerprints.has(fingerprintDetection(detection, this.pathOf(filePath)))
+  }
+}
+
+/**
+ * Write a baseline accepting every given detection; `filePathOf` maps a detection to its file
+ */
+export async function writeBaseline(
+  path: string,
+  root: string,
+  detections: DetectionResult[],
+  filePathOf: (detection: DetectionResult) => string
+): Promise<BaselineEntry[]> {
+  const baseline = new Baseline(root)
+  const seen = new Set<string>()
+  const findings: BaselineEntry[] = []
+  for (const detection of detections) {
+    const file = baseline.pathOf(filePathOf(detection))
+    const fingerprint = fingerprintDetection(detection, file)
+    if (!seen.has(fingerprint)) {
+      seen.add(fingerprint)
+      findings.push({ fingerprint, patternId: detection.patternId, file, line: detection.line })
+    }
+  }
+  findings.sort((a, b) => (a.file !== b.file ? (a.file < b.file ? -1 : 1) : a.line - b.line))
+
+  await mkdir(dirname(path), { recursive: true })
+  // One finding per line (and no timestamp) keeps baseline updates reviewable in diffs
+  const lines = findings.map((entry) => `    ${JSON.stringify(entry)}`)
+  const body = lines.length > 0 ? `[\n${lines.join(",\n")}\n  ]` : "[]"
+  await writeFile(path, `{\n  "version": ${BASELINE_VERSION},\n  "findings": ${body}\n}\n`)
+  return findings
+}
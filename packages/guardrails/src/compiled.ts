@@ -0,0 +1,182 @@
+/**
+ * Compiled guardrail policies
+ * Validates and compiles each PolicyPattern once so scans never rebuild regexes per line
+ */
+
+import { createHash } from "crypto"
+import type { PolicyPattern } from "./policy"
+import { extractTokenShape, type TokenShape } from "./entropy"
+import { extractRequiredLiterals, LiteralPrefilter } from "./prefilter"
+import { DEFAULT_PATTERNS } from "./patterns"
+import { KEY_RULES, type KeyRule } from "./structured"
+import { FalsePositiveMatcher } from "./false-positives"
+
+export interface CompiledPattern {
+  id: string
+  pattern: PolicyPattern
+  regex: RegExp
+  // Literals any match must contain; null means the pattern takes the slow path
+  literals: string[] | null
+  // Bare-token patterns run as an entropy token stage instead of a regex
+  token: TokenShape | null
+  // Not a built-in pattern (or flagged as ReDoS-prone): scans run it in the regex sandbox
+  guarded: boolean
+}
+
+export interface BoundKeyRule {
+  rule: KeyRule
+  // Position of the pattern the rule stands in for in the policy
+  index: number
+}
+
+export interface SkippedPattern {
+  id: string
+  pattern: PolicyPattern
+  reason: string
+}
+
+export interface CompiledPolicy {
+  hash: string
+  // The pattern list this policy was compiled from (e.g. to recompile it in a worker)
+  source: PolicyPattern[]
+  patterns: CompiledPattern[]
+  skipped: SkippedPattern[]
+  prefilter: LiteralPrefilter
+  // True when at least one pattern has no literal anchor and must run on every line
+  hasSlowPath: boolean
+  // Key rules that stand in for assignment patterns on the structured-file lines they judge (JSON, YAML, .env)
+  keyRules: BoundKeyRule[]
+  // Indicators and shared contexts of the medium/low patterns, folded into one matcher
+  falsePositives: FalsePositiveMatcher
+  compileTimeMs: number
+}
+
+// Compiled policies kept per process, keyed by pattern list hash. Long-lived hosts (the plugin,
+// the scan daemon) recompile on every policies.yaml edit, so only the most recently used are kept
+const POLICY_CACHE_SIZE = 4
+const policyCache = new Map<string, CompiledPolicy>()
+
+// Fast path for callers that hold on to the same pattern array (e.g. plugin state)
+const policyByArray = new WeakMap<PolicyPattern[], CompiledPolicy>()
+
+// Built-in regexes are vetted and run inline; anything else is treated as untrusted, since
+// isPotentiallyDangerousRegex misses shapes such as (\w+\s?){2,}
+const BUILTIN_REGEXES = new Set(DEFAULT_PATTERNS.map((pattern) => pattern.regex))
+
+// Regex of the built-in pattern each key rule stands in for; a customised regex keeps running as-is
+const KEY_RULE_REGEXES = new Map(
+  KEY_RULES.map((rule) => [rule, DEFAULT_PATTERNS.find((pattern) => getPatternId(pattern) === rule.patternId)?.regex])
+)
+
+/**
+ * Check if a regex pattern is potentially vulnerable to ReDoS
+ * This is a heuristic check for common dangerous patterns
+ */
+export function isPotentiallyDangerousRegex(pattern: string): boolean {
+  // Detect nested quantifiers like (a+)+, (a*)+, (a+)*, etc.
+  if (/\([^)]*[+*][^)]*\)[+*]/.test(pattern)) {
+    return true
+  }
+
+  // Detect overlapping alternations with quantifiers like (a|a)+
+  if (/\([^)]*\|[^)]*\)[+*]/.test(pattern)) {
+    // This is a simplified check - could have false positives
+    // but better to be safe
+    return true
+  }
+
+  // Detect deeply nested groups with quantifiers
+  const nestingDepth = (pattern.match(/\(/g) || []).length
+  const hasQuantifiers = /[+*]{2,}/.test(pattern)
+  if (nestingDepth > 3 && hasQuantifiers) {
+    return true
+  }
+
+  return false
+}
+
+/**
+ * Generate a stable ID for a pattern
+ */
+export function getPatternId(pattern: PolicyPattern): string {
+  return pattern.name.toLowerCase().replace(/\s+/g, "-")
+}
+
+/**
+ * Hash a pattern list so identical policies share one compiled form
+ */
+export function hashPatterns(patterns: PolicyPattern[]): string {
+  return createHash("sha256").update(JSON.stringify(patterns)).digest("hex")
+}
+
+/**
+ * Validate and compile a pattern list (uncached)
+ */
+export function compilePolicy(patterns: PolicyPattern[], hash: string = hashPatterns(patterns)): CompiledPolicy {
+  const start = performance.now()
+  const compiled: CompiledPattern[] = []
+  const skipped: SkippedPattern[] = []
+
+  for (const pattern of patterns) {
+    const id = getPatternId(pattern)
+    const token = extractTokenShape(pattern.regex)
+    // ReDoS-prone or team-supplied patterns are kept, but scans run them under a match deadline
+    // (token patterns never run their regex, so they need no deadline)
+    const guarded = !token && (!BUILTIN_REGEXES.has(pattern.regex) || isPotentiallyDangerousRegex(pattern.regex))
+
+    try {
+      // Multiline mode so ^ and $ keep matching at line boundaries in whole-buffer scans
+      const regex = new RegExp(pattern.regex, "gim")
+      const literals = token ? null : extractRequiredLiterals(pattern.regex)
+      compiled.push({ id, pattern, regex, literals, token, guarded })
+    } catch (error) {
+      const message = error instanceof Error ? error.message : String(error)
+      skipped.push({ id, pattern, reason: `invalid regex: ${message}` })
+    }
+  }
+
+  const keyRules: BoundKeyRule[] = []
+  for (const rule of KEY_RULES) {
+    const index = compiled.findIndex((c) => c.id === rule.patternId && c.pattern.regex === KEY_RULE_REGEXES.get(rule))
+    if (index !== -1) {
+      keyRules.push({ rule, index })
+    }
+  }
+
+  return {
+    hash,
+    source: patterns,
+    patterns: compiled,
+    skipped,
+    prefilter: new LiteralPrefilter(compiled.map((c) => c.literals)),
+    hasSlowPath: compiled.some((c) => c.literals === null),
+    keyRules,
+    falsePositives: new FalsePositiveMatcher(compiled.map((c) => c.pattern)),
+    compileTimeMs: performance.now() - start,
+  }
+}
+
+/**
+ * Get the compiled form of a pattern list, reusing it while it is among the recently used ones
+ */
+export function getCompiledPolicy(patterns: PolicyPattern[]): CompiledPolicy {
+  const byArray = policyByArray.get(patterns)
+  if (byArray) {
+    return byArray
+  }
+
+  const hash = hashPatterns(patterns)
+  let policy = policyCache.get(hash)
+  if (policy) {
+    // Move it to the end of the map, the most recently used position
+    policyCache.delete(hash)
+  } else {
+    policy = compilePolicy(patterns, hash)
+  }
+  policyCache.set(hash, policy)
+  if (policyCache.size > POLICY_CACHE_SIZE) {
+    policyCache.delete(policyCache.keys().next().value as string)
+  }
+  policyByArray.set(patterns, policy)
+  return policy
+}
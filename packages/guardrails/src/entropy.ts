@@ -0,0 +1,247 @@
+/**
+ * Entropy token stage
+ * Bare-token patterns like `(?<![A-Za-z0-9/+=])[A-Za-z0-9/+=]{40}(?![A-Za-z0-9/+=])` have no
+ * literal to anchor on, so instead of running the regex at every offset one pass over the buffer
+ * splits it into candidate tokens, then Shannon entropy and character-class mix are scored for
+ * the whole batch over typed arrays
+ */
+
+// Token alphabets are ASCII; anything else ends a token
+const ALPHABET_SIZE = 128
+
+// Character-class bits, for telling a mixed-alphabet key from a number or an identifier
+const CLASS_LOWER = 1
+const CLASS_UPPER = 2
+const CLASS_DIGIT = 4
+const CLASS_SYMBOL = 8
+
+// Fewest character classes a high-entropy token must mix
+const MIN_CLASS_MIX = 2
+
+const CHAR_CLASS = new Uint8Array(ALPHABET_SIZE)
+for (let code = 33; code < 127; code++) {
+  const char = String.fromCharCode(code)
+  CHAR_CLASS[code] = /[a-z]/.test(char)
+    ? CLASS_LOWER
+    : /[A-Z]/.test(char)
+      ? CLASS_UPPER
+      : /[0-9]/.test(char)
+        ? CLASS_DIGIT
+        : CLASS_SYMBOL
+}
+
+// A maximal run of one character class (lookbehind), its bounded repetition, and the same
+// class as lookahead; the token stage matches exactly what such a regex matches
+const TOKEN_SHAPE = /^\(\?<!\[((?:[^\]\\]|\\.)+)\]\)\[\1\]\{(\d+)(?:(,)(\d*))?\}\(\?!\[\1\]\)$/
+
+// Escapes inside a class that stand for a single punctuation character
+const CLASS_ESCAPES = new Set([..."^$\\.*+?()[]{}|/-'\"#%&,:;<=>@_`~!"])
+
+export interface TokenShape {
+  // Membership table for the token alphabet, indexed by char code
+  alphabet: Uint8Array
+  minLength: number
+  maxLength: number
+}
+
+export interface TokenBatch {
+  count: number
+  starts: Int32Array
+  ends: Int32Array
+}
+
+export interface TokenScores {
+  // Shannon entropy in bits per character
+  entropy: Float64Array
+  // Bitmask of CLASS_* seen in the token
+  classes: Uint8Array
+}
+
+/**
+ * Parse a character class body into an ASCII membership table (null if it can't be expressed)
+ */
+function parseAlphabet(body: string): Uint8Array | null {
+  if (body.startsWith("^")) {
+    return null
+  }
+  const chars: number[] = []
+  for (let pos = 0; pos < body.length; pos++) {
+    let char = body[pos]
+    if (char === "\\") {
+      char = body[++pos]
+      if (!CLASS_ESCAPES.has(char)) {
+        return null
+      }
+    }
+    if (body[pos + 1] === "-" && pos + 2 < body.length) {
+      if (body[pos + 2] === "\\") {
+        return null
+      }
+      const to = body.charCodeAt(pos + 2)
+      for (let code = char.charCodeAt(0); code <= to; code++) {
+        chars.push(code)
+      }
+      pos += 2
+    } else {
+      chars.push(char.charCodeAt(0))
+    }
+  }
+
+  const alphabet = new Uint8Array(ALPHABET_SIZE)
+  for (const code of chars) {
+    // Printable ASCII only: whitespace and newlines must always end a token
+    if (code <= 32 || code >= 127) {
+      return null
+    }
+    // Patterns compile case-insensitively, so letters match in either case
+    const char = String.fromCharCode(code)
+    alphabet[char.toLowerCase().charCodeAt(0)] = 1
+    alphabet[char.toUpperCase().charCodeAt(0)] = 1
+  }
+  return alphabet
+}
+
+/**
+ * Recognise a bare-token regex the token stage can run in its place (null for any other regex)
+ */
+export function extractTokenShape(source: string): TokenShape | null {
+  const shape = TOKEN_SHAPE.exec(source)
+  if (!shape) {
+    return null
+  }
+  const alphabet = parseAlphabet(shape[1])
+  const minLength = parseInt(shape[2], 10)
+  const maxLength = shape[3] ? (shape[4] ? parseInt(shape[4], 10) : Infinity) : minLength
+  if (!alphabet || minLength < 1 || maxLength < minLength) {
+    return null
+  }
+  return { alphabet, minLength, maxLength }
+}
+
+const NO_TOKENS = new Int32Array(0)
+
+/**
+ * Split content into maximal runs of the shape's alphabet, keeping those of an allowed length
+ */
+export function findTokens(content: string, shape: TokenShape): TokenBatch {
+  const { alphabet, minLength, maxLength } = shape
+  // Allocated on the first token, so token-free text (most lines) costs nothing
+  let starts = NO_TOKENS
+  let ends = NO_TOKENS
+  let count = 0
+  let start = -1
+
+  for (let i = 0; i <= content.length; i++) {
+    const code = i < content.length ? content.charCodeAt(i) : 0
+    if (code < ALPHABET_SIZE && alphabet[code]) {
+      if (start === -1) {
+        start = i
+      }
+      continue
+    }
+    if (start === -1) {
+      continue
+    }
+    const length = i - start
+    if (length >= minLength && length <= maxLength) {
+      if (count === starts.length) {
+        const grownStarts = new Int32Array(Math.max(count * 2, 16))
+        const grownEnds = new Int32Array(Math.max(count * 2, 16))
+        grownStarts.set(starts)
+        grownEnds.set(ends)
+        starts = grownStarts
+        ends = grownEnds
+      }
+      starts[count] = start
+      ends[count] = i
+      count++
+    }
+    start = -1
+  }
+
+  return { count, starts, ends }
+}
+
+// n * log2(n) for every count a token of the longest length seen so far can hold
+let nLog2n = new Float64Array(0)
+
+function ensureLogTable(length: number): Float64Array {
+  if (nLog2n.length <= length) {
+    const size = Math.max(length + 1, nLog2n.length * 2, 64)
+    nLog2n = new Float64Array(size)
+    for (let n = 1; n < size; n++) {
+      nLog2n[n] = n * Math.log2(n)
+    }
+  }
+  return nLog2n
+}
+
+// Per-character counts, reused (and left zeroed) between tokens
+const counts = new Uint32Array(ALPHABET_SIZE)
+
+/**
+ * Entropy and character-class mix for each token in a batch
+ *
+ * H = log2(L) - (1/L) * sum(n_c * log2(n_c)), so each token costs two passes over its
+ * characters and a table lookup per distinct character, with no per-token allocation.
+ */
+export function scoreTokens(content: string, batch: TokenBatch): TokenScores {
+  const { count, starts, ends } = batch
+  const entropy = new Float64Array(count)
+  const classes = new Uint8Array(count)
+
+  for (let t = 0; t < count; t++) {
+    const start = starts[t]
+    const end = ends[t]
+    const table = ensureLogTable(end - start)
+    let mask = 0
+    for (let i = start; i < end; i++) {
+      const code = content.charCodeAt(i)
+      counts[code]++
+      mask |= CHAR_CLASS[code]
+    }
+    let sum = 0
+    for (let i = start; i < end; i++) {
+      const code = content.charCodeAt(i)
+      const n = counts[code]
+      if (n !== 0) {
+        sum += table[n]
+        counts[code] = 0
+      }
+    }
+    const length = end - start
+    entropy[t] = Math.log2(length) - sum / length
+    classes[t] = mask
+  }
+
+  return { entropy, classes }
+}
+
+/**
+ * Entropy and character-class mix of a single string (e.g. a regex match)
+ */
+export function scoreText(text: string): { entropy: number; classes: number } {
+  const frequencies = new Map<string, number>()
+  let classes = 0
+  for (const char of text) {
+    frequencies.set(char, (frequencies.get(char) ?? 0) + 1)
+    const code = char.charCodeAt(0)
+    classes |= code < ALPHABET_SIZE ? CHAR_CLASS[code] : CLASS_SYMBOL
+  }
+  const length = [...frequencies.values()].reduce((total, n) => total + n, 0)
+  let entropy = 0
+  for (const n of frequencies.values()) {
+    const p = n / length
+    entropy -= p * Math.log2(p)
+  }
+  return { entropy, classes }
+}
+
+/**
+ * Whether a token looks random enough to be a secret: entropy at or above the threshold,
+ * drawn from at least two character classes (a single class is a number or an identifier)
+ */
+export function isHighEntropy(entropy: number, classes: number, threshold: number): boolean {
+  const mix = (classes & 1) + ((classes >> 1) & 1) + ((classes >> 2) & 1) + ((classes >> 3) & 1)
+  return entropy >= threshold && mix >= MIN_CLASS_MIX
+}
@@ -0,0 +1,185 @@
+/**
+ * False-positive filter
+ * Folds every medium/low pattern's falsePositiveIndicators and the shared FALSE_POSITIVE_CONTEXTS
+ * into one case-insensitive regex. A line is run through it at most once, and the terms found
+ * are reused for every match on that line.
+ */
+
+import type { PolicyPattern } from "./policy"
+import { FALSE_POSITIVE_CONTEXTS } from "./patterns"
+import type { LineIndex } from "./line-index"
+
+export type FalsePositiveReason = "indicator" | "context"
+
+// Lowercasing (how indicators compare) and the regex `i` flag (how contexts compare) only agree
+// on ASCII, so lines with anything else are checked term by term
+const NON_ASCII = /[^\x00-\x7f]/
+
+// A numbered backreference would point at the wrong group once sources are joined
+const NUMBERED_BACKREFERENCE = /\\[1-9]/
+
+interface Term {
+  // Exact check, as the filter has always done it
+  test: (line: string, lowerLine: () => string) => boolean
+  // Anchored form for the combined regex, if the term can be folded into it
+  sticky: RegExp | null
+}
+
+function escapeRegex(text: string): string {
+  return text.replace(/[.*+?^${}()|[\]\\]/g, "\\$&")
+}
+
+/**
+ * Term for an indicator: a case-insensitive substring (compared on lowercased text)
+ */
+function indicatorTerm(indicator: string): Term {
+  const lower = indicator.toLowerCase()
+  const foldable = lower.length > 0 && !NON_ASCII.test(indicator) && !NON_ASCII.test(lower)
+  return {
+    test: (_line, lowerLine) => lowerLine().includes(lower),
+    sticky: foldable ? new RegExp(escapeRegex(lower), "iy") : null,
+  }
+}
+
+/**
+ * Term for a context regex (tested on the line as is)
+ */
+function contextTerm(context: RegExp): Term {
+  const foldable = context.flags === "i" && !NUMBERED_BACKREFERENCE.test(context.source)
+  return {
+    test: (line) => context.test(line),
+    sticky: foldable ? new RegExp(context.source, "iy") : null,
+  }
+}
+
+/**
+ * The false-positive terms of a policy, compiled once with it
+ */
+export class FalsePositiveMatcher {
+  private terms: Term[] = []
+  // Terms of each pattern's indicators, by pattern position (none for high confidence patterns)
+  private indicatorTerms: number[][]
+  // Terms of the shared contexts (none if every pattern is high confidence)
+  private contextTerms: number[] = []
+  // Every foldable term as one alternation, to find where any of them starts in a single pass
+  private combined: RegExp | null = null
+  private foldable: number[] = []
+  private unfoldable: number[] = []
+
+  constructor(patterns: PolicyPattern[]) {
+    const byIndicator = new Map<string, number>()
+    this.indicatorTerms = patterns.map((pattern) => {
+      if (pattern.confidence === "high") {
+        return []
+      }
+      return (pattern.falsePositiveIndicators ?? []).map((indicator) => {
+        const lower = indicator.toLowerCase()
+        let t = byIndicator.get(lower)
+        if (t === undefined) {
+          t = this.add(indicatorTerm(indicator))
+          byIndicator.set(lower, t)
+        }
+        return t
+      })
+    })
+    if (patterns.some((pattern) => pattern.confidence !== "high")) {
+      this.contextTerms = FALSE_POSITIVE_CONTEXTS.map((context) => this.add(contextTerm(context)))
+    }
+
+    this.terms.forEach((term, t) => (term.sticky ? this.foldable : this.unfoldable).push(t))
+    if (this.foldable.length > 0) {
+      try {
+        const sources = this.foldable.map((t) => `(?:${this.terms[t].sticky?.source})`)
+        this.combined = new RegExp(sources.join("|"), "gi")
+      } catch {
+        // Sources that can't share one regex (e.g. duplicate group names) are all checked one by one
+        this.unfoldable = this.terms.map((_term, t) => t)
+        this.foldable = []
+      }
+    }
+  }
+
+  /**
+   * Which terms occur in a line (by term number)
+   */
+  evaluate(line: string): Uint8Array {
+    const present = new Uint8Array(this.terms.length)
+    let lower: string | undefined
+    const lowerLine = () => (lower ??= line.toLowerCase())
+    const { combined } = this
+    const folded = combined !== null && !NON_ASCII.test(line)
+    for (const t of folded ? this.unfoldable : this.terms.keys()) {
+      present[t] = this.terms[t].test(line, lowerLine) ? 1 : 0
+    }
+    if (!folded) {
+      return present
+    }
+
+    // Visit every offset where some term starts, and see which terms start there
+    let missing = this.foldable.length
+    combined.lastIndex = 0
+    let hit
+    while (missing > 0 && (hit = combined.exec(line)) !== null) {
+      for (const t of this.foldable) {
+        const sticky = this.terms[t].sticky as RegExp
+        sticky.lastIndex = hit.index
+        if (!present[t] && sticky.test(line)) {
+          present[t] = 1
+          missing--
+        }
+      }
+      combined.lastIndex = hit.index + 1
+    }
+    return present
+  }
+
+  /**
+   * Why a match of the pattern at `k` on a line with these terms is a likely false positive
+   */
+  reason(k: number, present: Uint8Array): FalsePositiveReason | null {
+    for (const t of this.indicatorTerms[k]) {
+      if (present[t]) {
+        return "indicator"
+      }
+    }
+    for (const t of this.contextTerms) {
+      if (present[t]) {
+        return "context"
+      }
+    }
+    return null
+  }
+
+  private add(term: Term): number {
+    this.terms.push(term)
+    return this.terms.length - 1
+  }
+}
+
+/**
+ * Per-content memo: each line is evaluated on its first match and reused for later ones
+ */
+export class LineFalsePositives {
+  private matcher: FalsePositiveMatcher
+  private content: string
+  private index: LineIndex
+  private lines = new Map<number, Uint8Array>()
+
+  constructor(matcher: FalsePositiveMatcher, content: string, index: LineIndex) {
+    this.matcher = matcher
+    this.content = content
+    this.index = index
+  }
+
+  /**
+   * Why a match of the pattern at `k` on a 0-based line is a likely false positive
+   */
+  reason(k: number, line: number): FalsePositiveReason | null {
+    let present = this.lines.get(line)
+    if (!present) {
+      present = this.matcher.evaluate(this.index.lineText(this.content, line))
+      this.lines.set(line, present)
+    }
+    return this.matcher.reason(k, present)
+  }
+}
@@ -0,0 +1,293 @@
+/**
+ * Git-aware scanning
+ * Streams `git diff` and runs the detector over added lines only, reporting post-image line numbers
+ */
+
+import { spawn } from "child_process"
+import { resolve } from "path"
+import { DEFAULT_PATTERNS } from "./patterns"
+import { getCompiledPolicy } from "./compiled"
+import { RegexSandbox } from "./regex-sandbox"
+import { ScanProfiler } from "./profile"
+import {
+  createSummary,
+  finalizeSummary,
+  matchContent,
+  recordFileDetection,
+  recordQualityFinding,
+  shouldScanFile,
+  shouldSkipDirectory,
+  type ScanOptions,
+  type ScanSummary,
+} from "./scanner"
+
+export interface DiffScanOptions extends ScanOptions {
+  // Scan what is staged for commit (git diff --cached)
+  staged?: boolean
+  // Scan changes since this ref, including uncommitted work (git diff <ref>)
+  since?: string
+  // Limit the diff to these paths
+  paths?: string[]
+  // Directory to run git in (paths in results are relative to it)
+  cwd?: string
+}
+
+/**
+ * A run of consecutive added lines in the post-image of a file
+ */
+export interface AddedHunk {
+  file: string
+  startLine: number
+  lines: string[]
+}
+
+const HUNK_HEADER = /^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@/
+
+/**
+ * Build the `git diff` arguments for a diff scan
+ */
+export function diffArgs(options: DiffScanOptions): string[] {
+  const args = [
+    "-c",
+    "core.quotePath=false",
+    "diff",
+    "--no-color",
+    "--no-ext-diff",
+    "--no-textconv",
+    "--relative",
+    // Fixed prefixes regardless of diff.noprefix / diff.mnemonicPrefix
+    "--src-prefix=a/",
+    "--dst-prefix=b/",
+    // Deleted files have no added lines
+    "--diff-filter=d",
+    "-U0",
+  ]
+  if (options.staged) {
+    args.push("--cached")
+  } else if (options.since) {
+    args.push(options.since)
+  }
+  args.push("--", ...(options.paths || []))
+  return args
+}
+
+/**
+ * Undo git's C-style quoting of unusual file names ("a\tb" -> a<TAB>b)
+ */
+function unquotePath(path: string): string {
+  if (!path.startsWith('"')) {
+    return path
+  }
+  const escapes: Record<string, string> = {
+    n: "\n",
+    t: "\t",
+    r: "\r",
+    a: "\x07",
+    b: "\b",
+    f: "\f",
+    v: "\v",
+  }
+  const bytes: number[] = []
+  const body = path.slice(1, -1)
+  for (let i = 0; i < body.length; i++) {
+    const char = body[i]
+    if (char !== "\\") {
+      bytes.push(...Buffer.from(char))
+      continue
+    }
+    const next = body[i + 1]
+    if (/[0-7]/.test(next)) {
+      // Octal escapes are raw UTF-8 bytes
+      bytes.push(parseInt(body.slice(i + 1, i + 4), 8))
+      i += 3
+    } else {
+      bytes.push(...Buffer.from(escapes[next] ?? next))
+      i += 1
+    }
+  }
+  return Buffer.from(bytes).toString("utf-8")
+}
+
+/**
+ * Split a byte stream into lines without buffering the whole thing
+ */
+async function* readLines(stream: AsyncIterable<Uint8Array>): AsyncGenerator<string> {
+  const decoder = new TextDecoder()
+  let carry = ""
+  for await (const chunk of stream) {
+    carry += decoder.decode(chunk, { stream: true })
+    let newline = carry.indexOf("\n")
+    while (newline !== -1) {
+      yield carry.slice(0, newline)
+      carry = carry.slice(newline + 1)
+      newline = carry.indexOf("\n")
+    }
+  }
+  carry += decoder.decode()
+  if (carry) {
+    yield carry
+  }
+}
+
+/**
+ * Parse unified diff lines (-U0) into hunks of added lines
+ */
+export async function* parseAddedHunks(lines: AsyncIterable<string>): AsyncGenerator<AddedHunk> {
+  let file: string | null = null
+  let inHeader = false
+  let hunk: AddedHunk | null = null
+
+  for await (const line of lines) {
+    if (line.startsWith("diff --git ")) {
+      if (hunk) {
+        yield hunk
+      }
+      hunk = null
+      file = null
+      inHeader = true
+      continue
+    }
+
+    if (inHeader) {
+      if (line.startsWith("+++ ")) {
+        // git appends a tab to unquoted names containing spaces
+        const target = line.slice(4).replace(/\t$/, "")
+        file = target === "/dev/null" ? null : unquotePath(target).replace(/^b\//, "")
+      } else if (line.startsWith("@@")) {
+        inHeader = false
+      } else {
+        continue
+      }
+    }
+
+    if (line.startsWith("@@")) {
+      if (hunk) {
+        yield hunk
+      }
+      hunk = null
+      const header = HUNK_HEADER.exec(line)
+      // A post-image count of 0 means the hunk only removes lines
+      if (file && header && header[2] !== "0") {
+        hunk = { file, startLine: parseInt(header[1], 10), lines: [] }
+      }
+      continue
+    }
+
+    // With -U0 a hunk holds only removed (-) and added (+) lines
+    if (hunk && line.startsWith("+")) {
+      hunk.lines.push(line.slice(1))
+    }
+  }
+  if (hunk) {
+    yield hunk
+  }
+}
+
+/**
+ * Whether a path from the diff passes the same filters as a directory scan
+ */
+function shouldScanDiffPath(file: string, options: ScanOptions): boolean {
+  const segments = file.split("/")
+  const directories = segments.slice(0, -1)
+  if (directories.some((name) => shouldSkipDirectory(name, options.excludePaths))) {
+    return false
+  }
+  return shouldScanFile(segments[segments.length - 1], options.excludeExtensions)
+}
+
+/**
+ * Scan only the lines added in a git diff (--staged or --since <ref>)
+ */
+export async function scanDiff(options: DiffScanOptions): Promise<ScanSummary> {
+  const scanStart = performance.now()
+  const summary = createSummary()
+
+  const compileStart = performance.now()
+  const policy = options.policy || getCompiledPolicy(options.patterns || DEFAULT_PATTERNS)
+  summary.compileTimeMs = performance.now() - compileStart
+  summary.skippedPatterns = policy.skipped.map(({ id, reason }) => ({ id, reason }))
+  summary.skippedPatterns.push(...(options.quality?.skipped ?? []))
+  const scanOptions: DiffScanOptions = { ...options, policy }
+  if (options.profile && !scanOptions.profiler) {
+    scanOptions.profiler = new ScanProfiler(policy)
+  }
+  if (!scanOptions.sandbox && policy.patterns.some((compiled) => compiled.guarded)) {
+    scanOptions.sandbox = new RegexSandbox(policy)
+  }
+  try {
+    await scanHunks(scanOptions, summary)
+  } finally {
+    if (scanOptions.sandbox && scanOptions.sandbox !== options.sandbox) {
+      await scanOptions.sandbox.close()
+    }
+  }
+  for (const stopped of scanOptions.sandbox?.stopped ?? []) {
+    summary.stoppedPatterns.push(stopped)
+  }
+  if (scanOptions.profiler) {
+    summary.profile = scanOptions.profiler.report()
+  }
+
+  return finalizeSummary(summary, scanStart)
+}
+
+/**
+ * Stream the diff and match each hunk of added lines
+ */
+async function scanHunks(options: DiffScanOptions, summary: ScanSummary): Promise<void> {
+  const proc = spawn("git", diffArgs(options), { cwd: options.cwd, stdio: ["ignore", "pipe", "pipe"] })
+  let stderr = ""
+  proc.stderr.setEncoding("utf-8").on("data", (text: string) => {
+    stderr += text
+  })
+  let spawnError: Error | undefined
+  const exited = new Promise<number | null>((resolve) => {
+    proc.on("error", (error) => {
+      spawnError = error
+      resolve(null)
+    })
+    proc.on("close", resolve)
+  })
+
+  const files = new Map<string, boolean>()
+  for await (const hunk of parseAddedHunks(readLines(proc.stdout))) {
+    let scannable = files.get(hunk.file)
+    if (scannable === undefined) {
+      scannable = shouldScanDiffPath(hunk.file, options)
+      files.set(hunk.file, scannable)
+      summary.totalFiles++
+      if (scannable) {
+        summary.filesScanned++
+      } else {
+        summary.filesSkipped++
+      }
+    }
+    if (!scannable) {
+      continue
+    }
+
+    const content = hunk.lines.join("\n")
+    summary.bytesRead += content.length
+    const matchStart = performance.now()
+    for (const detection of await matchContent(content, hunk.file, options)) {
+      // Lines within the hunk are consecutive in the post-image
+      detection.line += hunk.startLine - 1
+      if (detection.endLine) {
+        detection.endLine += hunk.startLine - 1
+      }
+      recordFileDetection(summary, detection, resolve(options.cwd ?? ".", hunk.file), options)
+    }
+    for (const finding of options.quality?.check(content, hunk.file) ?? []) {
+      finding.line += hunk.startLine - 1
+      recordQualityFinding(summary, finding, options)
+    }
+    const matchTimeMs = performance.now() - matchStart
+    summary.matchTimeMs += matchTimeMs
+    options.profiler?.recordFile(hunk.file, matchTimeMs, content.length)
+  }
+
+  const exitCode = await exited
+  if (exitCode !== 0) {
+    throw new Error(`git diff failed: ${spawnError?.message || stderr.trim() || `exit code ${exitCode}`}`)
+  }
+}
@@ -0,0 +1,118 @@
+/**
+ * Git file enumeration
+ * Lists the files of a directory scan from the git index (`git ls-files -z`) instead of walking
+ * the tree, so ignored build output, caches and virtualenvs are never opened
+ */
+
+import { spawn } from "child_process"
+
+export interface GitFilesOptions {
+  // Also list untracked files that are not ignored (git ls-files --others --exclude-standard)
+  untracked?: boolean
+}
+
+/**
+ * Split a NUL-separated byte stream into paths without buffering the whole listing
+ */
+async function readEntries(stream: AsyncIterable<Uint8Array>, onEntry: (entry: string) => void): Promise<void> {
+  const decoder = new TextDecoder()
+  let carry = ""
+  for await (const chunk of stream) {
+    carry += decoder.decode(chunk, { stream: true })
+    let start = 0
+    let end = carry.indexOf("\0")
+    while (end !== -1) {
+      onEntry(carry.slice(start, end))
+      start = end + 1
+      end = carry.indexOf("\0", start)
+    }
+    carry = carry.slice(start)
+  }
+  carry += decoder.decode()
+  if (carry) {
+    onEntry(carry)
+  }
+}
+
+/**
+ * Run git in `cwd` and collect its NUL-separated output; null if git is missing or fails
+ */
+async function gitList(cwd: string, args: string[]): Promise<string[] | null> {
+  const proc = spawn("git", args, { cwd, stdio: ["ignore", "pipe", "ignore"] })
+  const exited = new Promise<number | null>((resolve) => {
+    proc.on("error", () => resolve(null))
+    proc.on("close", resolve)
+  })
+  const entries: string[] = []
+  try {
+    await readEntries(proc.stdout, (entry) => entries.push(entry))
+  } catch {
+    // The stream is torn down when git can't be started; the exit status says so below
+  }
+  return (await exited) === 0 ? entries : null
+}
+
+/**
+ * Files under `root` as git sees them, relative to `root` with `/` separators.
+ * Returns null when `root` is not in a git work tree (or is itself ignored), so the caller
+ * falls back to walking the directory.
+ */
+export async function listGitFiles(root: string, options: GitFilesOptions = {}): Promise<string[] | null> {
+  const listArgs = ["ls-files", "-z", "--cached"]
+  if (options.untracked !== false) {
+    listArgs.push("--others", "--exclude-standard")
+  }
+
+  const [files, deleted, ignored] = await Promise.all([
+    gitList(root, listArgs),
+    // Tracked files removed from the work tree are still in the index
+    gitList(root, ["ls-files", "-z", "--deleted"]),
+    // Exits 0 when `root` itself is ignored: an explicitly requested ignored directory is walked instead
+    gitList(root, ["check-ignore", "-q", "--", "."]),
+  ])
+  if (!files || !deleted || ignored) {
+    return null
+  }
+
+  const removed = new Set(deleted)
+  // Untracked nested repositories are listed as "dir/"; their files are not ours to scan
+  return files.filter((file) => !removed.has(file) && !file.endsWith("/"))
+}
+
+/**
+ * Which of the given paths (relative to `root`, `/`-separated) git ignores; null when `root`
+ * is not in a git work tree or git fails
+ */
+export async function listGitIgnored(root: string, paths: string[]): Promise<Set<string> | null> {
+  if (paths.length === 0) {
+    return new Set()
+  }
+  const proc = spawn("git", ["check-ignore", "-z", "--stdin"], { cwd: root, stdio: ["pipe", "pipe", "ignore"] })
+  const exited = new Promise<number | null>((resolve) => {
+    proc.on("error", () => resolve(null))
+    proc.on("close", resolve)
+  })
+  // Swallow EPIPE when git exits before reading its input
+  proc.stdin.on("error", () => {})
+  proc.stdin.end(paths.map((path) => `${path}\0`).join(""))
+  const ignored = new Set<string>()
+  try {
+    await readEntries(proc.stdout, (entry) => ignored.add(entry))
+  } catch {
+    // As in gitList: the exit status tells whether git ran
+  }
+  // 0: some paths are ignored, 1: none are
+  const exitCode = await exited
+  return exitCode === 0 || exitCode === 1 ? ignored : null
+}
+
+/**
+ * Which of the given paths (relative to `root`) are tracked; null if git fails
+ */
+export async function listGitTracked(root: string, paths: string[]): Promise<Set<string> | null> {
+  if (paths.length === 0) {
+    return new Set()
+  }
+  const tracked = await gitList(root, ["--literal-pathspecs", "ls-files", "-z", "--cached", "--", ...paths])
+  return tracked && new Set(tracked)
+}
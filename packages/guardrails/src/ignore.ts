@@ -0,0 +1,168 @@
+/**
+ * Ignore-file matcher
+ * Reads `.gitignore`-syntax files (`.gitignore`, `.otcignore`) so directory scans outside a git
+ * repository, and `.otcignore` inside one, skip the same trees git would
+ */
+
+import { readFile } from "fs/promises"
+import { join } from "path"
+
+// Scan-specific ignore file, same syntax as .gitignore; applies inside and outside git repos
+export const OTC_IGNORE_FILE = ".otcignore"
+
+// Ignore files honoured when the file list does not come from git
+export const IGNORE_FILES = [".gitignore", OTC_IGNORE_FILE]
+
+interface IgnoreRule {
+  regex: RegExp
+  // `!pattern`: re-include what an earlier rule excluded
+  negate: boolean
+  // `pattern/`: only matches directories
+  dirOnly: boolean
+}
+
+/**
+ * Translate one glob (without `!` or trailing `/`) into a regex over paths relative to the rule's base
+ */
+export function globToRegex(glob: string): RegExp {
+  // A slash anywhere but the end anchors the pattern to the ignore file's directory
+  const anchored = glob.includes("/")
+  let body = glob.startsWith("/") ? glob.slice(1) : glob
+  let source = ""
+
+  if (body.startsWith("**/")) {
+    source += "(?:.*/)?"
+    body = body.slice(3)
+  }
+  for (let i = 0; i < body.length; i++) {
+    const char = body[i]
+    if (body.startsWith("/**/", i)) {
+      source += "/(?:.*/)?"
+      i += 3
+    } else if (body.startsWith("/**", i) && i + 3 === body.length) {
+      source += "/.*"
+      i += 2
+    } else if (char === "*") {
+      // Consecutive stars outside the forms above act like a single one
+      while (body[i + 1] === "*") {
+        i++
+      }
+      source += "[^/]*"
+    } else if (char === "?") {
+      source += "[^/]"
+    } else if (char === "[") {
+      const close = body.indexOf("]", i + 2)
+      if (close === -1) {
+        source += "\\["
+        continue
+      }
+      let set = body.slice(i + 1, close)
+      if (set.startsWith("!")) {
+        set = `^${set.slice(1)}`
+      }
+      source += `[${set}]`
+      i = close
+    } else if (char === "\\" && i + 1 < body.length) {
+      source += escapeRegex(body[++i])
+    } else {
+      source += escapeRegex(char)
+    }
+  }
+
+  return new RegExp(anchored ? `^${source}$` : `^(?:.*/)?${source}$`)
+}
+
+function escapeRegex(char: string): string {
+  return /[.*+?^${}()|[\]\\]/.test(char) ? `\\${char}` : char
+}
+
+/**
+ * Rules from the ignore files of one directory
+ */
+export class IgnoreRules {
+  // Directory the rules were read from, relative to the scan root ("" for the root itself)
+  readonly base: string
+  private rules: IgnoreRule[]
+
+  constructor(base: string, rules: IgnoreRule[]) {
+    this.base = base
+    this.rules = rules
+  }
+
+  /**
+   * Parse ignore-file text for the directory at `base`
+   */
+  static parse(text: string, base: string): IgnoreRules {
+    const rules: IgnoreRule[] = []
+    for (const rawLine of text.split(/\r?\n/)) {
+      // Trailing spaces are dropped unless escaped
+      let line = rawLine.replace(/(?<!\\)\s+$/, "")
+      if (!line || line.startsWith("#")) {
+        continue
+      }
+      const negate = line.startsWith("!")
+      if (negate) {
+        line = line.slice(1)
+      } else if (line.startsWith("\\#") || line.startsWith("\\!")) {
+        line = line.slice(1)
+      }
+      const dirOnly = line.endsWith("/")
+      if (dirOnly) {
+        line = line.replace(/\/+$/, "")
+      }
+      if (!line) {
+        continue
+      }
+      try {
+        rules.push({ regex: globToRegex(line), negate, dirOnly })
+      } catch {
+        // Like git, a pattern that can't be parsed (e.g. a bad range) is dropped
+      }
+    }
+    return new IgnoreRules(base, rules)
+  }
+
+  /**
+   * Read the given ignore files from a directory, in order; null if none exist or have rules
+   */
+  static async load(dirPath: string, base: string, names: string[]): Promise<IgnoreRules | null> {
+    const texts = await Promise.all(names.map((name) => readFile(join(dirPath, name), "utf-8").catch(() => "")))
+    const rules = IgnoreRules.parse(texts.join("\n"), base)
+    return rules.rules.length > 0 ? rules : null
+  }
+
+  /**
+   * Verdict of the last matching rule for a path relative to the scan root:
+   * true (ignored), false (re-included) or undefined (no rule matches)
+   */
+  match(path: string, isDirectory: boolean): boolean | undefined {
+    let relativePath = path
+    if (this.base) {
+      if (!path.startsWith(`${this.base}/`)) {
+        return undefined
+      }
+      relativePath = path.slice(this.base.length + 1)
+    }
+    for (let i = this.rules.length - 1; i >= 0; i--) {
+      const rule = this.rules[i]
+      if ((isDirectory || !rule.dirOnly) && rule.regex.test(relativePath)) {
+        return !rule.negate
+      }
+    }
+    return undefined
+  }
+}
+
+/**
+ * Whether a path is ignored by a stack of rules ordered from the root down (deeper files win).
+ * Only the path itself is checked; callers skip the contents of ignored directories.
+ */
+export function isIgnored(stack: IgnoreRules[], path: string, isDirectory: boolean): boolean {
+  for (let i = stack.length - 1; i >= 0; i--) {
+    const verdict = stack[i].match(path, isDirectory)
+    if (verdict !== undefined) {
+      return verdict
+    }
+  }
+  return false
+}
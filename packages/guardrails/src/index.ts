@@ -0,0 +1,71 @@
+/**
+ * @openteamcode/guardrails
+ * Secrets scanning core shared by `otc guardrail scan` and the OpenCode plugin:
+ * compiled policies, the streaming directory and diff scans, the incremental scan cache, and the
+ * code quality rules checked alongside them
+ */
+
+export {
+  PoliciesSchema,
+  PolicyPatternSchema,
+  QualityPolicySchema,
+  QualityRuleSchema,
+  type Policies,
+  type PolicyPattern,
+  type QualityPolicy,
+  type QualityRule,
+} from "./policy"
+export { DEFAULT_PATTERNS, FALSE_POSITIVE_CONTEXTS, SCANNABLE_EXTENSIONS, SKIP_DIRECTORIES } from "./patterns"
+export {
+  compilePolicy,
+  getCompiledPolicy,
+  getPatternId,
+  hashPatterns,
+  type CompiledPattern,
+  type CompiledPolicy,
+  type SkippedPattern,
+} from "./compiled"
+export {
+  detectSecrets,
+  getPatternById,
+  matchContent,
+  patternsFromPolicies,
+  readAndScanFile,
+  scan,
+  shouldScanFile,
+  type DetectionResult,
+  type FileScanResult,
+  type FileScanTask,
+  type ScanOptions,
+  type ScanSummary,
+} from "./scanner"
+export { scanDiff, type DiffScanOptions } from "./git-diff"
+export { listGitFiles, type GitFilesOptions } from "./git-files"
+export { globToRegex } from "./ignore"
+export { DEFAULT_SCAN_CONCURRENCY } from "./walker"
+export { SCAN_CACHE_FILE, ScanCache, hashContent, type ScanCacheOptions } from "./scan-cache"
+export { REGEX_TIMEOUT_MS, RegexSandbox, type StoppedPattern } from "./regex-sandbox"
+export {
+  QualityRules,
+  getQualityRuleId,
+  getQualityRules,
+  type CompiledQualityRule,
+  type QualityFinding,
+} from "./quality"
+export {
+  BASELINE_FILE,
+  Baseline,
+  fingerprintDetection,
+  hashMatch,
+  writeBaseline,
+  type BaselineEntry,
+} from "./baseline"
+export {
+  ScanWatcher,
+  WATCH_DEBOUNCE_MS,
+  type FileFindings,
+  type FindingsDelta,
+  type RescanResult,
+  type WatchOptions,
+} from "./watch"
+export { ScanProfiler, type FileProfile, type PatternProfile, type ScanProfile } from "./profile"
@@ -0,0 +1,71 @@
+/**
+ * Line-offset index
+ * Maps character offsets in a buffer back to line numbers without splitting it into lines.
+ * Lines end before their newline, and before the carriage return of a CRLF.
+ */
+
+const CARRIAGE_RETURN = 0x0d
+
+export class LineIndex {
+  private starts: number[]
+  private content: string
+
+  constructor(content: string) {
+    // Single pass over the content collects the offset at which each line starts
+    const starts = [0]
+    let newline = content.indexOf("\n")
+    while (newline !== -1) {
+      starts.push(newline + 1)
+      newline = content.indexOf("\n", newline + 1)
+    }
+    this.starts = starts
+    this.content = content
+  }
+
+  get lineCount(): number {
+    return this.starts.length
+  }
+
+  /**
+   * 0-based line containing the given offset (binary search over line starts)
+   */
+  lineOf(offset: number): number {
+    const { starts } = this
+    let low = 0
+    let high = starts.length - 1
+    while (low < high) {
+      const mid = (low + high + 1) >>> 1
+      if (starts[mid] <= offset) {
+        low = mid
+      } else {
+        high = mid - 1
+      }
+    }
+    return low
+  }
+
+  /**
+   * Offset of the first character of a 0-based line
+   */
+  lineStart(line: number): number {
+    return line < this.starts.length ? this.starts[line] : this.content.length
+  }
+
+  /**
+   * Offset just past the last character of a 0-based line (excluding the newline or CRLF)
+   */
+  lineEnd(line: number): number {
+    if (line + 1 >= this.starts.length) {
+      return this.content.length
+    }
+    const newline = this.starts[line + 1] - 1
+    return this.content.charCodeAt(newline - 1) === CARRIAGE_RETURN ? newline - 1 : newline
+  }
+
+  /**
+   * Text of a 0-based line, without its trailing newline (or CRLF)
+   */
+  lineText(content: string, line: number): string {
+    return content.slice(this.lineStart(line), this.lineEnd(line))
+  }
+}
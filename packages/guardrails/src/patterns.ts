@@ -3,7 +3,7 @@
  * These are used when no .ai/policies.yaml is configured
  */
 
-import type { PolicyPattern } from "../util/config"
+import type { PolicyPattern } from "./policy"
 
 export const DEFAULT_PATTERNS: PolicyPattern[] = [
   {
@@ -18,6 +18,8 @@ export const DEFAULT_PATTERNS: PolicyPattern[] = [
     confidence: "medium",
     description: "Potential AWS Secret Access Key (40 char base64)",
     falsePositiveIndicators: ["example", "placeholder", "your_key_here"],
+    // 40 hex characters (commit SHAs, SHA-1 digests) never reach 4 bits per character
+    entropyThreshold: 4,
   },
   {
     name: "Generic API Key Assignment",
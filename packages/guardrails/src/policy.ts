@@ -0,0 +1,49 @@
+/**
+ * Policy schema for .ai/policies.yaml
+ * Shared by the CLI and the OpenCode plugin, which load the file themselves
+ */
+
+import { z } from "zod"
+
+export const PolicyPatternSchema = z.object({
+  name: z.string(),
+  regex: z.string(),
+  confidence: z.enum(["high", "medium", "low"]).default("medium"),
+  description: z.string().optional(),
+  falsePositiveIndicators: z.array(z.string()).optional(),
+  // Allow matches to span lines (e.g. whole PEM blocks); reported at their first line
+  multiline: z.boolean().optional(),
+  // Drop matches below this Shannon entropy (bits per character) or drawn from a single
+  // character class; measured on the `secret` named group if the regex has one
+  entropyThreshold: z.number().positive().optional(),
+})
+
+export const QualityRuleSchema = z.object({
+  name: z.string(),
+  // Regex tested against each line (case-sensitive)
+  pattern: z.string(),
+  message: z.string().optional(),
+  // File globs the rule does not apply to (e.g. test_*.py); like .gitignore, a glob without
+  // a slash matches the file name in any directory
+  exceptions: z.array(z.string()).optional(),
+})
+
+export const QualityPolicySchema = z.object({
+  enabled: z.boolean().default(true),
+  // Quality findings are reported, never blocking
+  action: z.enum(["WARN", "INFO"]).default("WARN"),
+  rules: z.array(QualityRuleSchema).default([]),
+})
+
+export const PoliciesSchema = z.object({
+  version: z.string().default("1"),
+  patterns: z.array(PolicyPatternSchema).default([]),
+  excludePaths: z.array(z.string()).optional(),
+  excludeExtensions: z.array(z.string()).optional(),
+  quality: QualityPolicySchema.optional(),
+})
+
+export type Policies = z.infer<typeof PoliciesSchema>
+export type PolicyPattern = z.infer<typeof PolicyPatternSchema>
+export type QualityPolicy = z.infer<typeof QualityPolicySchema>
+export type QualityRule = z.infer<typeof QualityRuleSchema>
@@ -0,0 +1,132 @@
+/**
+ * Worker-thread pool for multi-core guardrail scans
+ * Each worker compiles the policy once and scans the files it is handed
+ */
+
+import { Worker } from "worker_threads"
+import type { PolicyPattern, QualityPolicy } from "./policy"
+import type { FileScanResult, FileScanTask } from "./scanner"
+
+export interface ScanWorkerData {
+  patterns: PolicyPattern[]
+  maxFileSize?: number
+  // Regex sandbox worker, as resolved on the main thread (see regex-sandbox.ts)
+  regexWorkerUrl: string
+  // Send per-pattern profile counters back with each file
+  profile?: boolean
+  // Quality section to check each file against as well
+  quality?: QualityPolicy
+}
+
+export interface ScanWorkerRequest extends FileScanTask {
+  id: number
+}
+
+export interface ScanWorkerResponse {
+  id: number
+  result?: FileScanResult
+  error?: string
+}
+
+interface PendingTask {
+  request: ScanWorkerRequest
+  resolve: (result: FileScanResult) => void
+  reject: (error: Error) => void
+}
+
+// From source the worker runs as TypeScript; consumers bundle it to dist/guardrails next to their dist/index.js
+const DEFAULT_WORKER_URL = import.meta.url.endsWith(".ts")
+  ? new URL("./scan-worker.ts", import.meta.url)
+  : new URL("./guardrails/scan-worker.js", import.meta.url)
+
+/**
+ * Fixed-size pool of scan workers fed from a FIFO queue
+ */
+export class ScanPool {
+  private workers: Worker[] = []
+  private idle: Worker[] = []
+  private running = new Map<Worker, PendingTask>()
+  private queue: PendingTask[] = []
+  private nextId = 0
+
+  constructor(size: number, data: ScanWorkerData, workerUrl: URL = DEFAULT_WORKER_URL) {
+    for (let i = 0; i < size; i++) {
+      const worker = new Worker(workerUrl, { workerData: data })
+      worker.on("message", (response: ScanWorkerResponse) => this.onMessage(worker, response))
+      worker.on("error", (error) => this.onError(worker, error))
+      this.workers.push(worker)
+      this.idle.push(worker)
+    }
+  }
+
+  get size(): number {
+    return this.workers.length
+  }
+
+  /**
+   * Scan one file on the next free worker
+   */
+  run(task: FileScanTask): Promise<FileScanResult> {
+    if (this.workers.length === 0) {
+      return Promise.reject(new Error("Scan pool has no live workers"))
+    }
+    return new Promise((resolve, reject) => {
+      this.queue.push({ request: { id: this.nextId++, ...task }, resolve, reject })
+      this.dispatch()
+    })
+  }
+
+  /**
+   * Terminate all workers
+   */
+  async close(): Promise<void> {
+    const workers = this.workers
+    this.workers = []
+    this.idle = []
+    for (const pending of this.queue) {
+      pending.reject(new Error("Scan pool closed"))
+    }
+    this.queue = []
+    await Promise.all(workers.map((worker) => worker.terminate()))
+  }
+
+  private dispatch(): void {
+    while (this.idle.length > 0 && this.queue.length > 0) {
+      const worker = this.idle.pop()!
+      const pending = this.queue.shift()!
+      this.running.set(worker, pending)
+      worker.postMessage(pending.request)
+    }
+  }
+
+  private onMessage(worker: Worker, response: ScanWorkerResponse): void {
+    const pending = this.running.get(worker)
+    this.running.delete(worker)
+    this.idle.push(worker)
+
+    if (pending) {
+      if (response.result) {
+        pending.resolve(response.result)
+      } else {
+        pending.reject(new Error(response.error || "Scan worker failed"))
+      }
+    }
+    this.dispatch()
+  }
+
+  private onError(worker: Worker, error: Error): void {
+    // Drop the dead worker; its in-flight task fails and the caller can scan in-process
+    this.workers = this.workers.filter((w) => w !== worker)
+    this.idle = this.idle.filter((w) => w !== worker)
+    const pending = this.running.get(worker)
+    this.running.delete(worker)
+    pending?.reject(error)
+
+    if (this.workers.length === 0) {
+      for (const queued of this.queue) {
+        queued.reject(new Error("Scan pool has no live workers"))
+      }
+      this.queue = []
+    }
+  }
+}
@@ -0,0 +1,443 @@
+/**
+ * Literal-anchor prefilter
+ * Pulls required literals out of each pattern's regex and matches all of them in a
+ * single Aho-Corasick pass, so full regexes only run on lines that can possibly match
+ */
+
+// Needles shorter than this match too often to be worth prefiltering on
+const MIN_NEEDLE_LENGTH = 3
+
+// Largest character class expanded into alternative needles (e.g. gh[pousr]_)
+const MAX_CLASS_EXPANSION = 5
+
+// Largest number of alternative needles a single pattern may contribute
+const MAX_NEEDLES_PER_RUN = 16
+
+// The automaton only tracks ASCII; anything else resets it to the root
+const ALPHABET_SIZE = 128
+
+// Escapes that stand for themselves outside a character class
+const LITERAL_ESCAPES = new Set([..."^$\\.*+?()[]{}|/-'\"#%&,:;<=>@_`~! "])
+
+type NeedleSet = string[] | null
+
+interface ParseState {
+  source: string
+  pos: number
+}
+
+/**
+ * Pick the better of two required-literal sets (longest shortest needle wins)
+ */
+function betterNeedles(a: NeedleSet, b: NeedleSet): NeedleSet {
+  if (!a) return b
+  if (!b) return a
+  const minA = Math.min(...a.map((s) => s.length))
+  const minB = Math.min(...b.map((s) => s.length))
+  if (minA !== minB) return minA > minB ? a : b
+  return a.length <= b.length ? a : b
+}
+
+/**
+ * Keep a needle set only if every needle is long enough and plain printable ASCII
+ */
+function usableNeedles(needles: NeedleSet): NeedleSet {
+  if (!needles || needles.length === 0) return null
+  for (const needle of needles) {
+    if (needle.length < MIN_NEEDLE_LENGTH) return null
+    for (let i = 0; i < needle.length; i++) {
+      const code = needle.charCodeAt(i)
+      if (code < 32 || code >= ALPHABET_SIZE) return null
+    }
+  }
+  return needles
+}
+
+/**
+ * Parse a character class body; returns its members if small enough to expand
+ */
+function parseClass(state: ParseState): string[] | null {
+  const { source } = state
+  // Skip the opening bracket
+  state.pos++
+  let negated = false
+  if (source[state.pos] === "^") {
+    negated = true
+    state.pos++
+  }
+
+  const members = new Set<string>()
+  let expandable = !negated
+
+  while (state.pos < source.length && source[state.pos] !== "]") {
+    let char = source[state.pos]
+    if (char === "\\") {
+      const next = source[state.pos + 1]
+      state.pos += 2
+      // Only escaped punctuation stands for itself; \t, \n, \d and the like do not
+      if (next === undefined || !LITERAL_ESCAPES.has(next)) {
+        expandable = false
+        continue
+      }
+      char = next
+    } else {
+      state.pos++
+    }
+
+    // Character range like A-Z
+    if (source[state.pos] === "-" && source[state.pos + 1] !== "]" && state.pos + 1 < source.length) {
+      let end = source[state.pos + 1]
+      state.pos += 2
+      if (end === "\\") {
+        end = source[state.pos]
+        state.pos++
+        if (end === undefined || !LITERAL_ESCAPES.has(end)) {
+          expandable = false
+          continue
+        }
+      }
+      const from = char.charCodeAt(0)
+      const to = end.charCodeAt(0)
+      if (to - from + 1 > MAX_CLASS_EXPANSION) {
+        expandable = false
+        continue
+      }
+      for (let code = from; code <= to; code++) {
+        members.add(String.fromCharCode(code).toLowerCase())
+      }
+      continue
+    }
+
+    members.add(char.toLowerCase())
+  }
+  // Skip the closing bracket
+  state.pos++
+
+  if (!expandable || members.size === 0 || members.size > MAX_CLASS_EXPANSION) {
+    return null
+  }
+  return [...members]
+}
+
+/**
+ * Parse an optional quantifier; returns its minimum repeat count and whether it can repeat
+ */
+function parseQuantifier(state: ParseState): { min: number; repeats: boolean } | null {
+  const { source } = state
+  const char = source[state.pos]
+  let result: { min: number; repeats: boolean } | null = null
+
+  if (char === "?") {
+    result = { min: 0, repeats: false }
+    state.pos++
+  } else if (char === "*") {
+    result = { min: 0, repeats: true }
+    state.pos++
+  } else if (char === "+") {
+    result = { min: 1, repeats: true }
+    state.pos++
+  } else if (char === "{") {
+    const braces = /^\{(\d+)(,(\d*))?\}/.exec(source.slice(state.pos))
+    if (!braces) {
+      // A lone brace is a literal in non-unicode regexes
+      return null
+    }
+    const min = Number(braces[1])
+    const max = braces[2] === undefined ? min : braces[3] === "" ? Infinity : Number(braces[3])
+    result = { min, repeats: max > 1 }
+    state.pos += braces[0].length
+  }
+
+  // Lazy modifier does not change what must be present
+  if (result && source[state.pos] === "?") {
+    state.pos++
+  }
+  return result
+}
+
+/**
+ * Parse one alternative (sequence of atoms) and return its best required needle set
+ */
+function parseSequence(state: ParseState): NeedleSet {
+  const { source } = state
+  let best: NeedleSet = null
+  let run: string[] | null = null
+
+  const finishRun = () => {
+    best = betterNeedles(best, usableNeedles(run))
+    run = null
+  }
+
+  while (state.pos < source.length) {
+    const char = source[state.pos]
+    if (char === "|" || char === ")") {
+      break
+    }
+
+    // Each atom yields either literal alternatives, a group's needles, or nothing usable
+    let atom: string[] | null = null
+    let group: NeedleSet = null
+    let isGroup = false
+
+    if (char === "(") {
+      isGroup = true
+      state.pos++
+      let lookaround = false
+      if (source.startsWith("?:", state.pos)) {
+        state.pos += 2
+      } else if (source.startsWith("?=", state.pos) || source.startsWith("?!", state.pos)) {
+        lookaround = true
+        state.pos += 2
+      } else if (source.startsWith("?<=", state.pos) || source.startsWith("?<!", state.pos)) {
+        lookaround = true
+        state.pos += 3
+      } else if (source.startsWith("?<", state.pos)) {
+        state.pos = source.indexOf(">", state.pos) + 1
+        if (state.pos === 0) {
+          throw new Error("Unterminated group name")
+        }
+      }
+      const inner = parseAlternation(state)
+      if (source[state.pos] !== ")") {
+        throw new Error("Unterminated group")
+      }
+      state.pos++
+      // Lookarounds are zero-width and never contribute characters to a match
+      group = lookaround ? null : inner
+    } else if (char === "[") {
+      atom = parseClass(state)
+    } else if (char === "\\") {
+      const next = source[state.pos + 1]
+      state.pos += 2
+      if (next !== undefined && LITERAL_ESCAPES.has(next)) {
+        atom = [next.toLowerCase()]
+      } else if (next !== undefined && /[0-9]/.test(next)) {
+        // Numeric backreference or octal escape
+        while (/[0-9]/.test(source[state.pos] ?? "")) state.pos++
+      } else if (next === "k") {
+        // Named backreference
+        const end = source.indexOf(">", state.pos)
+        state.pos = end === -1 ? source.length : end + 1
+      } else if (next === "x" && /^[0-9a-fA-F]{2}/.test(source.slice(state.pos))) {
+        state.pos += 2
+      } else if (next === "u" && /^[0-9a-fA-F]{4}/.test(source.slice(state.pos))) {
+        state.pos += 4
+      } else if (next === "c" && /^[A-Za-z]/.test(source.slice(state.pos))) {
+        state.pos += 1
+      }
+      // Everything else (\d, \s, \b, backreferences, control escapes) breaks the run
+    } else if (char === "." || char === "^" || char === "$") {
+      state.pos++
+    } else {
+      atom = [char.toLowerCase()]
+      state.pos++
+    }
+
+    const quantifier = parseQuantifier(state)
+
+    if (isGroup) {
+      finishRun()
+      if (!quantifier || quantifier.min > 0) {
+        best = betterNeedles(best, usableNeedles(group))
+      }
+      continue
+    }
+
+    if (!atom || (quantifier && quantifier.min === 0)) {
+      finishRun()
+      continue
+    }
+
+    // Extend the current run with this atom's alternatives
+    const currentRun: string[] = run ?? [""]
+    if (currentRun.length * atom.length > MAX_NEEDLES_PER_RUN) {
+      finishRun()
+      run = atom
+    } else {
+      const next: string[] = []
+      for (const prefix of currentRun) {
+        for (const alternative of atom) {
+          next.push(prefix + alternative)
+        }
+      }
+      run = [...new Set(next)]
+    }
+
+    // A repeated atom ends the contiguous literal run after its first occurrence
+    if (quantifier && quantifier.repeats) {
+      finishRun()
+    }
+  }
+
+  finishRun()
+  return best
+}
+
+/**
+ * Parse an alternation; every branch must contribute a needle for the set to be required
+ */
+function parseAlternation(state: ParseState): NeedleSet {
+  const needles: string[] = []
+  let complete = true
+
+  while (true) {
+    const branch = parseSequence(state)
+    if (branch) {
+      needles.push(...branch)
+    } else {
+      complete = false
+    }
+    if (state.source[state.pos] !== "|") {
+      break
+    }
+    state.pos++
+  }
+
+  return complete ? [...new Set(needles)] : null
+}
+
+/**
+ * Extract the literals that any match of a regex must contain.
+ * Returns null when the regex has no usable literal anchor (slow path).
+ * Needles are lowercased; patterns are always compiled case-insensitively.
+ */
+export function extractRequiredLiterals(regexSource: string): string[] | null {
+  try {
+    const state: ParseState = { source: regexSource, pos: 0 }
+    const needles = parseAlternation(state)
+    if (state.pos !== regexSource.length) {
+      return null
+    }
+    return usableNeedles(needles)
+  } catch {
+    return null
+  }
+}
+
+/**
+ * Multi-needle matcher (Aho-Corasick automaton compiled to a dense ASCII DFA)
+ */
+export class LiteralPrefilter {
+  readonly needleCount: number
+  private readonly delta: Int32Array
+  private readonly outputs: number[][]
+
+  /**
+   * @param needlesByPattern required literals for each pattern index (null = no anchor)
+   */
+  constructor(needlesByPattern: (string[] | null)[]) {
+    const goto: Map<number, number>[] = [new Map()]
+    const outputs: number[][] = [[]]
+    let needleCount = 0
+
+    // Build the trie
+    needlesByPattern.forEach((needles, patternIndex) => {
+      if (!needles) return
+      for (const needle of needles) {
+        needleCount++
+        let node = 0
+        for (let i = 0; i < needle.length; i++) {
+          const code = needle.charCodeAt(i)
+          let next = goto[node].get(code)
+          if (next === undefined) {
+            next = goto.length
+            goto.push(new Map())
+            outputs.push([])
+            goto[node].set(code, next)
+          }
+          node = next
+        }
+        if (!outputs[node].includes(patternIndex)) {
+          outputs[node].push(patternIndex)
+        }
+      }
+    })
+
+    // Breadth-first pass computes failure links and fills in the full transition table
+    const delta = new Int32Array(goto.length * ALPHABET_SIZE)
+    const fail = new Int32Array(goto.length)
+    const queue: number[] = []
+
+    for (let code = 0; code < ALPHABET_SIZE; code++) {
+      const next = goto[0].get(code)
+      if (next !== undefined) {
+        delta[code] = next
+        queue.push(next)
+      }
+    }
+
+    for (let head = 0; head < queue.length; head++) {
+      const node = queue[head]
+      for (const pattern of outputs[fail[node]]) {
+        if (!outputs[node].includes(pattern)) {
+          outputs[node].push(pattern)
+        }
+      }
+      for (let code = 0; code < ALPHABET_SIZE; code++) {
+        const next = goto[node].get(code)
+        if (next !== undefined) {
+          fail[next] = delta[fail[node] * ALPHABET_SIZE + code]
+          delta[node * ALPHABET_SIZE + code] = next
+          queue.push(next)
+        } else {
+          delta[node * ALPHABET_SIZE + code] = delta[fail[node] * ALPHABET_SIZE + code]
+        }
+      }
+    }
+
+    this.needleCount = needleCount
+    this.delta = delta
+    this.outputs = outputs
+  }
+
+  /**
+   * Single pass over the content; returns the candidate pattern indices for each
+   * 0-based line that contains at least one needle
+   */
+  candidateLines(content: string): Map<number, number[]> {
+    const candidates = new Map<number, number[]>()
+    if (this.needleCount === 0) {
+      return candidates
+    }
+
+    const { delta, outputs } = this
+    let node = 0
+    let line = 0
+    let lineHits: number[] | undefined
+
+    for (let i = 0; i < content.length; i++) {
+      let code = content.charCodeAt(i)
+      if (code === 10) {
+        line++
+        lineHits = undefined
+      }
+      if (code >= ALPHABET_SIZE) {
+        node = 0
+        continue
+      }
+      // ASCII case folding (needles are lowercase)
+      if (code >= 65 && code <= 90) {
+        code += 32
+      }
+      node = delta[node * ALPHABET_SIZE + code]
+
+      const found = outputs[node]
+      if (found.length > 0) {
+        if (!lineHits) {
+          lineHits = candidates.get(line)
+          if (!lineHits) {
+            lineHits = []
+            candidates.set(line, lineHits)
+          }
+        }
+        for (const pattern of found) {
+          if (!lineHits.includes(pattern)) {
+            lineHits.push(pattern)
+          }
+        }
+      }
+    }
+
+    return candidates
+  }
+}
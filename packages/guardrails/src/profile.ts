@@ -0,0 +1,114 @@
+/**
+ * Per-pattern scan profiling (otc guardrail scan --profile)
+ * Counts where matching time goes, pattern by pattern, so policy authors can find and prune
+ * expensive team patterns. Counters are kept by policy position, so profiles gathered on scan
+ * workers and in the regex sandbox merge straight into the main thread's.
+ */
+
+import type { CompiledPolicy } from "./compiled"
+
+// Files listed in the profile's slowest-files table
+const SLOWEST_FILES = 10
+
+export interface PatternProfile {
+  patternId: string
+  // Time spent running the pattern (regex, token stage or key rule)
+  matchTimeMs: number
+  // Lines (or, for key rules, key/value entries) the pattern was tested against
+  linesTested: number
+  // Matches before false-positive and entropy checks
+  matches: number
+  // Matches dropped by the pattern's own falsePositiveIndicators
+  suppressedByIndicators: number
+  // Matches dropped by the shared FALSE_POSITIVE_CONTEXTS
+  suppressedByContexts: number
+}
+
+export interface FileProfile {
+  file: string
+  matchTimeMs: number
+  bytes: number
+}
+
+/**
+ * Profile counters as sent back from a worker (plain data, by policy position)
+ */
+export interface ProfileCounters {
+  patterns: PatternProfile[]
+  // Line prefilter pass, shared by every anchored pattern
+  prefilterTimeMs: number
+  // Reading JSON/YAML/.env files into key/value entries, shared by the key rules
+  keyValueTimeMs: number
+}
+
+export interface ScanProfile extends ProfileCounters {
+  // Slowest files by match time, slowest first
+  slowestFiles: FileProfile[]
+}
+
+/**
+ * Accumulates profile counters for one policy over a scan
+ */
+export class ScanProfiler {
+  patterns: PatternProfile[]
+  prefilterTimeMs = 0
+  keyValueTimeMs = 0
+  private files = new Map<string, FileProfile>()
+
+  constructor(policy: CompiledPolicy) {
+    this.patterns = policy.patterns.map((compiled) => ({
+      patternId: compiled.id,
+      matchTimeMs: 0,
+      linesTested: 0,
+      matches: 0,
+      suppressedByIndicators: 0,
+      suppressedByContexts: 0,
+    }))
+  }
+
+  /**
+   * Add counters gathered elsewhere (a scan worker or the regex sandbox) for the same policy
+   */
+  merge(counters: ProfileCounters): void {
+    counters.patterns.forEach((other, k) => {
+      const stats = this.patterns[k]
+      stats.matchTimeMs += other.matchTimeMs
+      stats.linesTested += other.linesTested
+      stats.matches += other.matches
+      stats.suppressedByIndicators += other.suppressedByIndicators
+      stats.suppressedByContexts += other.suppressedByContexts
+    })
+    this.prefilterTimeMs += counters.prefilterTimeMs
+    this.keyValueTimeMs += counters.keyValueTimeMs
+  }
+
+  /**
+   * Count the match time of a file (added up if the file is matched in several pieces, like diff hunks)
+   */
+  recordFile(file: string, matchTimeMs: number, bytes: number): void {
+    const entry = this.files.get(file)
+    if (entry) {
+      entry.matchTimeMs += matchTimeMs
+      entry.bytes += bytes
+    } else {
+      this.files.set(file, { file, matchTimeMs, bytes })
+    }
+  }
+
+  counters(): ProfileCounters {
+    return { patterns: this.patterns, prefilterTimeMs: this.prefilterTimeMs, keyValueTimeMs: this.keyValueTimeMs }
+  }
+
+  /**
+   * Final profile: patterns by time spent, most expensive first, and the slowest files
+   */
+  report(): ScanProfile {
+    const byTime = (a: { matchTimeMs: number }, b: { matchTimeMs: number }) => b.matchTimeMs - a.matchTimeMs
+    return {
+      patterns: [...this.patterns].sort(byTime),
+      prefilterTimeMs: this.prefilterTimeMs,
+      keyValueTimeMs: this.keyValueTimeMs,
+      slowestFiles: [...this.files.values()].sort(byTime).slice(0, SLOWEST_FILES),
+    }
+  }
+}
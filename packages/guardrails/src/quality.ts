@@ -0,0 +1,207 @@
+/**
+ * Code quality rules
+ * Compiles the `quality` section of .ai/policies.yaml once and checks file content that the
+ * secrets scan has already read, so quality warnings cost no extra pass over the disk
+ */
+
+import { createHash } from "crypto"
+import type { QualityPolicy, QualityRule } from "./policy"
+import { isPotentiallyDangerousRegex } from "./compiled"
+import { globToRegex } from "./ignore"
+import { LineIndex } from "./line-index"
+import { extractRequiredLiterals, LiteralPrefilter } from "./prefilter"
+
+export interface QualityFinding {
+  file: string
+  line: number
+  rule: string
+  ruleId: string
+  message: string
+  match: string
+  action: QualityPolicy["action"]
+}
+
+export interface CompiledQualityRule {
+  id: string
+  rule: QualityRule
+  regex: RegExp
+  // Literals any match must contain; null means the rule is tested on every line
+  literals: string[] | null
+  // Compiled `exceptions` globs
+  exceptions: RegExp[]
+}
+
+// Compiled rule sets kept per process, keyed by quality section hash (most recently used only,
+// as with compiled policies)
+const RULES_CACHE_SIZE = 4
+const rulesCache = new Map<string, QualityRules>()
+
+// Fast path for callers that hold on to the same parsed section (e.g. plugin state)
+const rulesBySection = new WeakMap<QualityPolicy, QualityRules>()
+
+// Exception globs are shared across rules and rule sets
+const globCache = new Map<string, RegExp>()
+
+/**
+ * Generate a stable ID for a quality rule
+ */
+export function getQualityRuleId(rule: QualityRule): string {
+  return rule.name.toLowerCase().replace(/\s+/g, "-")
+}
+
+function compileGlob(glob: string): RegExp {
+  let regex = globCache.get(glob)
+  if (!regex) {
+    regex = globToRegex(glob.replace(/^\.\//, ""))
+    globCache.set(glob, regex)
+  }
+  return regex
+}
+
+/**
+ * The rules of a quality section, compiled once with their literal prefilter
+ */
+export class QualityRules {
+  readonly hash: string
+  // The section these rules were compiled from (e.g. to recompile them in a worker)
+  readonly source: QualityPolicy
+  readonly rules: CompiledQualityRule[] = []
+  readonly skipped: { id: string; reason: string }[] = []
+  private prefilter: LiteralPrefilter
+  // Some exception has a slash, so it depends on the directory and not only the file name
+  private anchored: boolean
+  // Rules that apply to a file name (only kept when no exception is anchored)
+  private byName = new Map<string, number[]>()
+
+  constructor(source: QualityPolicy, hash: string) {
+    this.source = source
+    this.hash = hash
+
+    for (const rule of source.rules) {
+      const id = getQualityRuleId(rule)
+      // Rules run inline on every scanned line, so ReDoS-prone ones are not run at all
+      if (isPotentiallyDangerousRegex(rule.pattern)) {
+        this.skipped.push({ id, reason: "regex is prone to catastrophic backtracking" })
+        continue
+      }
+      try {
+        const regex = new RegExp(rule.pattern)
+        const exceptions = (rule.exceptions ?? []).map(compileGlob)
+        this.rules.push({ id, rule, regex, literals: extractRequiredLiterals(rule.pattern), exceptions })
+      } catch (error) {
+        const message = error instanceof Error ? error.message : String(error)
+        this.skipped.push({ id, reason: `invalid regex: ${message}` })
+      }
+    }
+
+    this.prefilter = new LiteralPrefilter(this.rules.map((compiled) => compiled.literals))
+    this.anchored = this.rules.some((compiled) => (compiled.rule.exceptions ?? []).some((glob) => glob.includes("/")))
+  }
+
+  /**
+   * Positions of the rules that apply to a file (path relative to the scan root)
+   */
+  rulesFor(filePath: string): number[] {
+    const path = filePath.split("\\").join("/").replace(/^\.\//, "")
+    const name = path.slice(path.lastIndexOf("/") + 1)
+    let active = this.anchored ? undefined : this.byName.get(name)
+    if (!active) {
+      active = []
+      for (let k = 0; k < this.rules.length; k++) {
+        if (!this.rules[k].exceptions.some((regex) => regex.test(path))) {
+          active.push(k)
+        }
+      }
+      if (!this.anchored) {
+        this.byName.set(name, active)
+      }
+    }
+    return active
+  }
+
+  /**
+   * Check content against the rules that apply to the file: at most one finding per rule and
+   * line, ordered by line and then rule position
+   */
+  check(content: string, filename: string): QualityFinding[] {
+    const active = this.rulesFor(filename)
+    if (active.length === 0) {
+      return []
+    }
+    const lines = new LineIndex(content)
+    const findings: QualityFinding[] = []
+
+    const test = (k: number, line: number, text: string): void => {
+      const compiled = this.rules[k]
+      const match = compiled.regex.exec(text)
+      if (match) {
+        findings.push(this.toFinding(compiled, filename, line, match[0]))
+      }
+    }
+
+    // One pass over the content finds the lines where an anchored rule can match
+    const candidates = this.prefilter.candidateLines(content)
+    if (!active.some((k) => this.rules[k].literals === null)) {
+      for (const [line, hits] of candidates) {
+        let text: string | undefined
+        for (const k of active) {
+          if (hits.includes(k)) {
+            test(k, line, (text ??= lines.lineText(content, line)))
+          }
+        }
+      }
+      return findings
+    }
+
+    for (let line = 0; line < lines.lineCount; line++) {
+      const hits = candidates.get(line)
+      const text = lines.lineText(content, line)
+      for (const k of active) {
+        if (this.rules[k].literals === null || hits?.includes(k)) {
+          test(k, line, text)
+        }
+      }
+    }
+    return findings
+  }
+
+  private toFinding(compiled: CompiledQualityRule, filename: string, line: number, matchText: string): QualityFinding {
+    return {
+      file: filename,
+      line: line + 1,
+      rule: compiled.rule.name,
+      ruleId: compiled.id,
+      message: compiled.rule.message ?? compiled.rule.name,
+      match: matchText.length > 40 ? matchText.substring(0, 37) + "..." : matchText,
+      action: this.source.action,
+    }
+  }
+}
+
+/**
+ * Get the compiled rules of a quality section, reusing them while they are recently used.
+ * Returns undefined when the section is missing, disabled or has no rules.
+ */
+export function getQualityRules(section: QualityPolicy | undefined): QualityRules | undefined {
+  if (!section || !section.enabled || section.rules.length === 0) {
+    return undefined
+  }
+  const bySection = rulesBySection.get(section)
+  if (bySection) {
+    return bySection
+  }
+
+  const hash = createHash("sha256").update(JSON.stringify(section)).digest("hex")
+  let rules = rulesCache.get(hash)
+  if (rules) {
+    rulesCache.delete(hash)
+  } else {
+    rules = new QualityRules(section, hash)
+  }
+  rulesCache.set(hash, rules)
+  if (rulesCache.size > RULES_CACHE_SIZE) {
+    rulesCache.delete(rulesCache.keys().next().value as string)
+  }
+  rulesBySection.set(section, rules)
+  return rules
+}
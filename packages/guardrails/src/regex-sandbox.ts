@@ -0,0 +1,262 @@
+/**
+ * Regex sandbox
+ * Runs team-supplied (and ReDoS-prone) patterns on worker threads under a per-pattern deadline.
+ * Each worker publishes which pattern it is running through shared memory; if one pattern makes
+ * no progress within the deadline the worker is terminated, that pattern is disabled and reported,
+ * and the remaining patterns are re-run on a fresh worker.
+ */
+
+import { availableParallelism } from "os"
+import { Worker } from "worker_threads"
+import type { PolicyPattern } from "./policy"
+import type { CompiledPolicy } from "./compiled"
+import type { ProfileCounters, ScanProfiler } from "./profile"
+import type { DetectionResult } from "./scanner"
+
+// Time one pattern may spend on one file (per started 256KB of content) before it is stopped
+export const REGEX_TIMEOUT_MS = 100
+const REGEX_TIMEOUT_BYTES = 256 * 1024
+
+// How long a fresh worker may take to start before the sandbox gives up on it
+const SANDBOX_STARTUP_MS = 5000
+
+// Workers a sandbox starts at most (on demand), so concurrent file reads don't queue behind one
+export const DEFAULT_SANDBOX_WORKERS = Math.min(4, availableParallelism())
+
+// Slots in the shared progress array
+export const PROGRESS_SEQUENCE = 0
+export const PROGRESS_PATTERN = 1
+
+export interface RegexSandboxData {
+  patterns: PolicyPattern[]
+  progress: SharedArrayBuffer
+}
+
+export interface RegexSandboxRequest {
+  id: number
+  content: string
+  filename: string
+  // Indices into the compiled policy's patterns
+  patterns: number[]
+  // Send per-pattern profile counters back with the detections
+  profile?: boolean
+}
+
+export interface RegexSandboxResponse {
+  id: number
+  detections: DetectionResult[]
+  profile?: ProfileCounters
+}
+
+// A request either completes or is stopped while running `pattern` (null: before any started)
+type SandboxOutcome =
+  | { detections: DetectionResult[]; profile?: ProfileCounters }
+  | { pattern: number | null; reason: string }
+
+export interface StoppedPattern {
+  id: string
+  file: string
+  reason: string
+}
+
+// From source the worker runs as TypeScript; consumers bundle it to dist/guardrails next to their dist/index.js.
+// Only valid when resolved from the entry bundle, so scan workers are handed it in their workerData
+export const REGEX_WORKER_URL = import.meta.url.endsWith(".ts")
+  ? new URL("./regex-worker.ts", import.meta.url)
+  : new URL("./guardrails/regex-worker.js", import.meta.url)
+
+/**
+ * Deadline for one pattern on content of the given length
+ */
+export function regexDeadline(length: number): number {
+  return REGEX_TIMEOUT_MS * Math.max(1, Math.ceil(length / REGEX_TIMEOUT_BYTES))
+}
+
+/**
+ * One sandbox worker and the shared memory it reports progress through
+ */
+interface SandboxSlot {
+  worker: Worker | null
+  progressBuffer: SharedArrayBuffer
+  progress: Int32Array
+}
+
+/**
+ * Small pool of workers that match the guarded patterns of one policy, one request per worker at a time
+ */
+export class RegexSandbox {
+  // Patterns stopped for exceeding the deadline (or lost with a crashed worker), in order
+  stopped: StoppedPattern[] = []
+  private policy: CompiledPolicy
+  private workerUrl: URL
+  private guarded: number[]
+  private disabled = new Set<number>()
+  private slots: SandboxSlot[] = []
+  private size: number
+  private idle: SandboxSlot[] = []
+  // Matches waiting for a worker to come free
+  private waiting: ((slot: SandboxSlot) => void)[] = []
+  private inFlight = new Set<Promise<unknown>>()
+  private nextId = 0
+
+  constructor(policy: CompiledPolicy, workerUrl: URL = REGEX_WORKER_URL, size: number = DEFAULT_SANDBOX_WORKERS) {
+    this.policy = policy
+    this.workerUrl = workerUrl
+    this.size = Math.max(1, Math.floor(size))
+    this.guarded = policy.patterns.flatMap((compiled, k) => (compiled.guarded ? [k] : []))
+  }
+
+  /**
+   * Whether the policy has any guarded patterns left to run
+   */
+  get active(): boolean {
+    return this.guarded.some((k) => !this.disabled.has(k))
+  }
+
+  /**
+   * Match the guarded patterns against content on the next free worker (a new one is started
+   * while fewer than `size` exist). With a profiler, the worker's per-pattern counters are merged into it.
+   */
+  match(content: string, filename: string, profiler?: ScanProfiler): Promise<DetectionResult[]> {
+    const run = (async () => {
+      const slot = await this.acquire()
+      try {
+        return await this.matchNow(slot, content, filename, profiler)
+      } finally {
+        this.release(slot)
+      }
+    })()
+    const settled = run.catch(() => {})
+    this.inFlight.add(settled)
+    void settled.then(() => this.inFlight.delete(settled))
+    return run
+  }
+
+  /**
+   * Stop the workers once in-flight matches have finished (a later match starts new ones)
+   */
+  async close(): Promise<void> {
+    while (this.inFlight.size > 0) {
+      await Promise.all(this.inFlight)
+    }
+    const workers = this.slots.map((slot) => slot.worker)
+    for (const slot of this.slots) {
+      slot.worker = null
+    }
+    await Promise.all(workers.map((worker) => worker?.terminate()))
+  }
+
+  private acquire(): Promise<SandboxSlot> {
+    const slot = this.idle.pop()
+    if (slot) {
+      return Promise.resolve(slot)
+    }
+    if (this.slots.length < this.size) {
+      const progressBuffer = new SharedArrayBuffer(2 * Int32Array.BYTES_PER_ELEMENT)
+      const created: SandboxSlot = { worker: null, progressBuffer, progress: new Int32Array(progressBuffer) }
+      this.slots.push(created)
+      return Promise.resolve(created)
+    }
+    return new Promise((resolve) => this.waiting.push(resolve))
+  }
+
+  private release(slot: SandboxSlot): void {
+    const next = this.waiting.shift()
+    if (next) {
+      next(slot)
+    } else {
+      this.idle.push(slot)
+    }
+  }
+
+  private async matchNow(
+    slot: SandboxSlot,
+    content: string,
+    filename: string,
+    profiler?: ScanProfiler
+  ): Promise<DetectionResult[]> {
+    for (;;) {
+      const patterns = this.guarded.filter((k) => !this.disabled.has(k))
+      if (patterns.length === 0) {
+        return []
+      }
+      const outcome = await this.request(slot, { id: this.nextId++, content, filename, patterns, profile: !!profiler })
+      if ("detections" in outcome) {
+        if (profiler && outcome.profile) {
+          profiler.merge(outcome.profile)
+        }
+        return outcome.detections
+      }
+      // The worker was stopped; disable the culprit (once, if another worker stopped it too) and re-run what is left
+      const culprit = outcome.pattern ?? patterns[0]
+      if (!this.disabled.has(culprit)) {
+        this.disabled.add(culprit)
+        this.stopped.push({ id: this.policy.patterns[culprit].id, file: filename, reason: outcome.reason })
+      }
+    }
+  }
+
+  private request(slot: SandboxSlot, request: RegexSandboxRequest): Promise<SandboxOutcome> {
+    const worker = this.ensureWorker(slot)
+    const { progress } = slot
+    const deadline = regexDeadline(request.content.length)
+    Atomics.store(progress, PROGRESS_SEQUENCE, 0)
+
+    return new Promise((resolve) => {
+      let lastSequence = 0
+      let waited = 0
+
+      const finish = (outcome: SandboxOutcome) => {
+        clearTimeout(timer)
+        worker.off("message", onMessage)
+        worker.off("error", onError)
+        resolve(outcome)
+      }
+
+      const stop = (reason: string) => {
+        const sequence = Atomics.load(progress, PROGRESS_SEQUENCE)
+        const pattern = sequence > 0 ? Atomics.load(progress, PROGRESS_PATTERN) : null
+        slot.worker = null
+        void worker.terminate()
+        finish({ pattern, reason })
+      }
+
+      // A pattern is stopped once the worker has been on it for a whole tick without moving on
+      const tick = () => {
+        const sequence = Atomics.load(progress, PROGRESS_SEQUENCE)
+        waited += deadline
+        if (sequence === 0 && waited < SANDBOX_STARTUP_MS) {
+          // Still starting up (first request on a fresh worker)
+          timer = setTimeout(tick, deadline)
+        } else if (sequence !== lastSequence) {
+          lastSequence = sequence
+          timer = setTimeout(tick, deadline)
+        } else {
+          stop(`exceeded ${deadline}ms match deadline`)
+        }
+      }
+
+      const onMessage = (response: RegexSandboxResponse) => {
+        if (response.id === request.id) {
+          finish({ detections: response.detections, profile: response.profile })
+        }
+      }
+      const onError = (error: Error) => stop(`worker failed: ${error.message}`)
+
+      let timer = setTimeout(tick, deadline)
+      worker.on("message", onMessage)
+      worker.on("error", onError)
+      worker.postMessage(request)
+    })
+  }
+
+  private ensureWorker(slot: SandboxSlot): Worker {
+    if (!slot.worker) {
+      const data: RegexSandboxData = { patterns: this.policy.source, progress: slot.progressBuffer }
+      slot.worker = new Worker(this.workerUrl, { workerData: data })
+      // Never keep the process alive just for an idle sandbox
+      slot.worker.unref()
+    }
+    return slot.worker
+  }
+}
@@ -0,0 +1,53 @@
+/**
+ * Regex sandbox worker (see regex-sandbox.ts)
+ * Runs the requested patterns one at a time, publishing which one is running before each starts
+ */
+
+import { parentPort, workerData } from "worker_threads"
+import { compilePolicy, getCompiledPolicy, type CompiledPolicy } from "./compiled"
+import { ScanProfiler } from "./profile"
+import { detectSecrets, type DetectionResult } from "./scanner"
+import {
+  PROGRESS_PATTERN,
+  PROGRESS_SEQUENCE,
+  type RegexSandboxData,
+  type RegexSandboxRequest,
+  type RegexSandboxResponse,
+} from "./regex-sandbox"
+
+const data = workerData as RegexSandboxData
+const policy = getCompiledPolicy(data.patterns)
+const progress = new Int32Array(data.progress)
+
+// One single-pattern policy per guarded pattern, compiled on first use
+const single = new Map<number, CompiledPolicy>()
+
+parentPort?.on("message", (request: RegexSandboxRequest) => {
+  const detections: DetectionResult[] = []
+  const profiler = request.profile ? new ScanProfiler(policy) : undefined
+  for (const k of request.patterns) {
+    Atomics.store(progress, PROGRESS_PATTERN, k)
+    Atomics.add(progress, PROGRESS_SEQUENCE, 1)
+
+    let patternPolicy = single.get(k)
+    if (!patternPolicy) {
+      patternPolicy = compilePolicy([policy.patterns[k].pattern])
+      single.set(k, patternPolicy)
+    }
+    const patternProfiler = profiler && new ScanProfiler(patternPolicy)
+    for (const detection of detectSecrets(request.content, request.filename, {
+      policy: patternPolicy,
+      profiler: patternProfiler,
+    })) {
+      detections.push(detection)
+    }
+    if (profiler && patternProfiler) {
+      // The single-pattern policy's prefilter pass is this pattern's own cost
+      const [stats] = patternProfiler.patterns
+      stats.matchTimeMs += patternProfiler.prefilterTimeMs
+      profiler.patterns[k] = stats
+    }
+  }
+  const response: RegexSandboxResponse = { id: request.id, detections, profile: profiler?.counters() }
+  parentPort?.postMessage(response)
+})
@@ -0,0 +1,182 @@
+/**
+ * Persistent incremental scan cache
+ * Stores each file's detections under .ai/.cache so unchanged files are not re-read or re-matched
+ */
+
+import { createHash } from "crypto"
+import { mkdir, readFile, rename, writeFile } from "fs/promises"
+import { dirname, join, relative, sep } from "path"
+import type { DetectionResult } from "./scanner"
+import type { QualityFinding } from "./quality"
+
+// Location of the index inside the .ai/ folder
+export const SCAN_CACHE_FILE = join(".cache", "guardrail-index")
+
+// Bump when the entry format or detection semantics change
+const SCAN_CACHE_VERSION = 4
+
+// Files modified this close to when they were scanned can't be trusted on size + mtime alone
+const RACY_WINDOW_MS = 2000
+
+export interface ScanCacheOptions {
+  // Path of the index file
+  path: string
+  // Directory cache keys are relative to (the repository root)
+  root: string
+}
+
+// Detections are stored without their path; it depends on where the scan was started
+export type CachedDetection = Omit<DetectionResult, "file">
+export type CachedQualityFinding = Omit<QualityFinding, "file">
+
+export interface ScanCacheEntry {
+  size: number
+  mtimeMs: number
+  contentHash: string
+  scannedAtMs: number
+  detections: CachedDetection[]
+  // Left out when the file has no quality findings
+  quality?: CachedQualityFinding[]
+}
+
+interface ScanCacheFile {
+  version: number
+  policyHash: string
+  entries: Record<string, ScanCacheEntry>
+}
+
+/**
+ * Hash file content for cache validation
+ */
+export function hashContent(content: string): string {
+  return createHash("sha256").update(content).digest("hex")
+}
+
+/**
+ * On-disk index of per-file detections, invalidated as a whole when the policy changes
+ */
+export class ScanCache {
+  hits = 0
+  misses = 0
+  private options: ScanCacheOptions
+  private policyHash: string
+  private entries: Map<string, ScanCacheEntry>
+  private seen = new Set<string>()
+  private dirty = false
+
+  constructor(options: ScanCacheOptions, policyHash: string, entries: Map<string, ScanCacheEntry> = new Map()) {
+    this.options = options
+    this.policyHash = policyHash
+    this.entries = entries
+  }
+
+  /**
+   * Load the index from disk; a missing, corrupt or stale (other policy) index starts empty
+   */
+  static async load(options: ScanCacheOptions, policyHash: string): Promise<ScanCache> {
+    try {
+      const parsed = JSON.parse(await readFile(options.path, "utf-8")) as ScanCacheFile
+      if (parsed.version === SCAN_CACHE_VERSION && parsed.policyHash === policyHash && parsed.entries) {
+        return new ScanCache(options, policyHash, new Map(Object.entries(parsed.entries)))
+      }
+    } catch {
+      // No index yet or unreadable, start fresh
+    }
+    const cache = new ScanCache(options, policyHash)
+    // Persist the reset so a stale index is not reloaded next time
+    cache.dirty = true
+    return cache
+  }
+
+  /**
+   * Start another scan on an index already in memory (a long-running process keeps it warm);
+   * a different policy hash empties it, as loading would
+   */
+  reuse(policyHash: string): ScanCache {
+    if (policyHash !== this.policyHash) {
+      this.policyHash = policyHash
+      this.entries = new Map()
+      this.dirty = true
+    }
+    this.hits = 0
+    this.misses = 0
+    this.seen = new Set()
+    return this
+  }
+
+  get path(): string {
+    return this.options.path
+  }
+
+  /**
+   * Cache key for a file: its path relative to the cache root, with forward slashes
+   */
+  key(filePath: string): string {
+    return relative(this.options.root, filePath).split(sep).join("/")
+  }
+
+  /**
+   * Entry for a file regardless of freshness (for content hash comparison)
+   */
+  get(key: string): ScanCacheEntry | undefined {
+    this.seen.add(key)
+    return this.entries.get(key)
+  }
+
+  /**
+   * Entry for a file whose size and mtime are unchanged since it was scanned
+   */
+  lookup(key: string, size: number, mtimeMs: number): ScanCacheEntry | undefined {
+    const entry = this.get(key)
+    if (!entry || entry.size !== size || entry.mtimeMs !== mtimeMs) {
+      return undefined
+    }
+    // A write in the same mtime tick as the scan would go unnoticed; make those re-hash
+    if (entry.mtimeMs >= entry.scannedAtMs - RACY_WINDOW_MS) {
+      return undefined
+    }
+    return entry
+  }
+
+  record(key: string, entry: ScanCacheEntry): void {
+    this.seen.add(key)
+    this.entries.set(key, entry)
+    this.dirty = true
+  }
+
+  /**
+   * Drop entries under a scanned directory that were not visited (deleted or now excluded files)
+   */
+  prune(dirPath: string): void {
+    const prefix = this.key(dirPath)
+    for (const key of this.entries.keys()) {
+      const inside = prefix === "" || key.startsWith(`${prefix}/`)
+      if (inside && !this.seen.has(key)) {
+        this.entries.delete(key)
+        this.dirty = true
+      }
+    }
+  }
+
+  /**
+   * Write the index if anything changed (atomically, via a temp file)
+   */
+  async save(): Promise<void> {
+    if (!this.dirty) {
+      return
+    }
+    const data: ScanCacheFile = {
+      version: SCAN_CACHE_VERSION,
+      policyHash: this.policyHash,
+      entries: Object.fromEntries(this.entries),
+    }
+    const tempPath = `${this.options.path}.tmp`
+    const cacheDir = dirname(this.options.path)
+    await mkdir(cacheDir, { recursive: true })
+    // Keep the cache (which holds match excerpts) out of git, as pytest and ruff do for theirs
+    await writeFile(join(cacheDir, ".gitignore"), "*\n", { flag: "wx" }).catch(() => {})
+    await writeFile(tempPath, JSON.stringify(data))
+    await rename(tempPath, this.options.path)
+    this.dirty = false
+  }
+}
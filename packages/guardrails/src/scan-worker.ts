@@ -0,0 +1,48 @@
+/**
+ * Scan worker entry point (see pool.ts)
+ * Compiles the policy once, then reads and scans each file it is sent
+ */
+
+import { parentPort, workerData } from "worker_threads"
+import { getCompiledPolicy } from "./compiled"
+import { ScanProfiler } from "./profile"
+import { getQualityRules } from "./quality"
+import { RegexSandbox } from "./regex-sandbox"
+import { readAndScanFile } from "./scanner"
+import type { ScanWorkerData, ScanWorkerRequest, ScanWorkerResponse } from "./pool"
+
+const data = workerData as ScanWorkerData
+const policy = getCompiledPolicy(data.patterns)
+// Each scan worker has its own sandbox; one thread apiece, since the pool already spreads files
+const sandbox = policy.patterns.some((compiled) => compiled.guarded)
+  ? new RegexSandbox(policy, new URL(data.regexWorkerUrl), 1)
+  : undefined
+const quality = getQualityRules(data.quality)
+// Stopped patterns already sent back to the main thread
+let stoppedReported = 0
+
+parentPort?.on("message", async (request: ScanWorkerRequest) => {
+  let response: ScanWorkerResponse
+  try {
+    // A fresh profiler per file: the main thread merges each file's counters as they come back
+    const profiler = data.profile ? new ScanProfiler(policy) : undefined
+    const result = await readAndScanFile(request, {
+      policy,
+      sandbox,
+      maxFileSize: data.maxFileSize,
+      profiler,
+      quality,
+    })
+    if (profiler) {
+      result.profile = profiler.counters()
+    }
+    if (sandbox && sandbox.stopped.length > stoppedReported) {
+      result.stoppedPatterns = sandbox.stopped.slice(stoppedReported)
+      stoppedReported = sandbox.stopped.length
+    }
+    response = { id: request.id, result }
+  } catch (error) {
+    response = { id: request.id, error: error instanceof Error ? error.message : String(error) }
+  }
+  parentPort?.postMessage(response)
+})
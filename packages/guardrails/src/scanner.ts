@@ -0,0 +1,1299 @@
+/**
+ * Secrets detection scanner
+ * Productionized from validation/q003-guardrails/prototype.ts
+ */
+
+import { createHash } from "crypto"
+import { open, stat, type FileHandle } from "fs/promises"
+import type { Stats } from "fs"
+import { StringDecoder } from "string_decoder"
+import { dirname, join, relative, resolve, extname } from "path"
+import type { PolicyPattern, Policies } from "./policy"
+import { DEFAULT_PATTERNS, SCANNABLE_EXTENSIONS, SKIP_DIRECTORIES } from "./patterns"
+import { getCompiledPolicy, getPatternId, type CompiledPattern, type CompiledPolicy } from "./compiled"
+import { findTokens, isHighEntropy, scoreText, scoreTokens, type TokenShape } from "./entropy"
+import {
+  createKeyValueReader,
+  hasKeyHints,
+  isPlaceholderValue,
+  JudgedEntries,
+  normalizeKey,
+  structuredFormat,
+  type KeyValue,
+} from "./structured"
+import { LineIndex } from "./line-index"
+import { LineFalsePositives, type FalsePositiveReason } from "./false-positives"
+import { DEFAULT_SCAN_CONCURRENCY, walkFileList, walkFiles } from "./walker"
+import { listGitFiles } from "./git-files"
+import { IGNORE_FILES, OTC_IGNORE_FILE } from "./ignore"
+import { ScanPool } from "./pool"
+import {
+  ScanCache,
+  hashContent,
+  type CachedDetection,
+  type CachedQualityFinding,
+  type ScanCacheOptions,
+} from "./scan-cache"
+import { REGEX_WORKER_URL, RegexSandbox, type StoppedPattern } from "./regex-sandbox"
+import { ScanProfiler, type PatternProfile, type ProfileCounters, type ScanProfile } from "./profile"
+import type { QualityFinding, QualityRules } from "./quality"
+import { hashMatch, type Baseline } from "./baseline"
+
+// Files larger than this (5MB) are streamed in chunks instead of read whole
+const STREAM_THRESHOLD = 5 * 1024 * 1024
+
+// Bytes read per chunk when streaming a large file
+const STREAM_CHUNK_SIZE = 1024 * 1024
+
+// Characters of trailing text re-scanned with the next chunk, so matches that span
+// a chunk boundary (up to a whole PEM block) are still found
+const STREAM_OVERLAP = 8 * 1024
+
+// Leading bytes inspected to decide whether a file is binary (same window git uses)
+const BINARY_SNIFF_SIZE = 8000
+
+// Share of non-text bytes in the sniffed window above which a file is treated as binary
+const BINARY_THRESHOLD = 0.3
+
+// Control characters that still occur in text: backspace, tab, newline, form feed, carriage return, escape
+const TEXT_CONTROL_BYTES = new Set([0x08, 0x09, 0x0a, 0x0c, 0x0d, 0x1b])
+
+export interface DetectionResult {
+  file: string
+  line: number
+  pattern: string
+  match: string
+  confidence: "high" | "medium" | "low"
+  patternId: string
+  // Hash of the full (untruncated) match, for baseline fingerprints
+  matchHash: string
+  // Last line of a multiline match that runs past its first line
+  endLine?: number
+}
+
+export interface ScanOptions {
+  patterns?: PolicyPattern[]
+  excludePaths?: string[]
+  excludeExtensions?: string[]
+  basePath?: string
+  // Precompiled policy; takes precedence over `patterns`
+  policy?: CompiledPolicy
+  // Maximum number of file reads kept in flight during directory scans
+  concurrency?: number
+  // Number of worker threads to spread matching across (opt-in; 0 or 1 scans in-process)
+  workers?: number
+  // Persistent incremental cache; unchanged files reuse their stored detections
+  // (pass a loaded ScanCache to keep the index in memory between scans)
+  cache?: ScanCacheOptions | ScanCache
+  // Skip files larger than this many bytes (default: no limit; large files are streamed)
+  maxFileSize?: number
+  // Called for each detection as soon as its file has been scanned
+  onDetection?: (detection: DetectionResult) => void
+  // Keep detections in `summary.detections` (default true); turn off with `onDetection` for flat memory
+  collectDetections?: boolean
+  // Runs guarded (team-supplied) patterns under a match deadline; detectSecrets then leaves them to it
+  sandbox?: RegexSandbox
+  // Set when a structured file's key/value entries are checked by a separate (streaming) reader:
+  // whether columns [start, end) of a 0-based line of the content are on an entry a key rule
+  // already judged, where the assignment patterns' matches are dropped
+  keyValueJudged?: (line: number, start: number, end: number) => boolean
+  // List directory contents with `git ls-files` when inside a git repo (default true);
+  // otherwise the tree is walked honouring .gitignore and .otcignore files
+  git?: boolean
+  // With git listing, also scan untracked files that are not ignored (default true)
+  untracked?: boolean
+  // Collect per-pattern match time and counts into `summary.profile`
+  profile?: boolean
+  // Receives the profile counters while matching (set up by the scan when `profile` is on)
+  profiler?: ScanProfiler
+  // Code quality rules checked on the same content as the secrets scan
+  quality?: QualityRules
+  // Called for each quality finding as soon as its file has been checked
+  onQualityFinding?: (finding: QualityFinding) => void
+  // Accepted findings; detections it holds are counted in `baselineSuppressed` instead of reported
+  baseline?: Baseline
+}
+
+export interface ScanSummary {
+  totalFiles: number
+  filesScanned: number
+  filesSkipped: number
+  detections: DetectionResult[]
+  // Quality rule findings (reported, never blocking); kept unless `collectDetections` is off
+  quality: QualityFinding[]
+  qualityFindings: number
+  highConfidence: number
+  mediumConfidence: number
+  lowConfidence: number
+  // Detections left out because the baseline accepts them
+  baselineSuppressed: number
+  compileTimeMs: number
+  matchTimeMs: number
+  wallClockMs: number
+  bytesRead: number
+  filesPerSecond: number
+  workers: number
+  cacheHits: number
+  cacheMisses: number
+  filesStreamed: number
+  filesTooLarge: number
+  filesBinary: number
+  // Patterns that could not be compiled
+  skippedPatterns: { id: string; reason: string }[]
+  // Guarded patterns stopped for exceeding the match deadline (not run on later files)
+  stoppedPatterns: StoppedPattern[]
+  // How directory contents were enumerated: from the git index, or by walking the tree
+  fileSource?: "git" | "walk"
+  // Per-pattern profile, when the scan ran with `profile`
+  profile?: ScanProfile
+}
+
+export interface FileScanTask {
+  filePath: string
+  relativePath: string
+  // Hash the content (for the scan cache)
+  hashContent?: boolean
+  // Skip matching if the content still hashes to this value
+  knownHash?: string
+}
+
+export interface FileScanResult {
+  detections: DetectionResult[]
+  bytesRead: number
+  matchTimeMs: number
+  contentHash?: string
+  // Content matched `knownHash`; detections were not recomputed
+  unchanged?: boolean
+  // Read in chunks because it is larger than the stream threshold
+  streamed?: boolean
+  // Skipped because it is larger than `maxFileSize`
+  tooLarge?: boolean
+  // Skipped because its first bytes look binary
+  binary?: boolean
+  // Some guarded patterns were not run (stopped for exceeding the match deadline)
+  incomplete?: boolean
+  // Patterns stopped while scanning on a worker, for the main thread to report
+  stoppedPatterns?: StoppedPattern[]
+  // Profile counters gathered on a worker, for the main thread to merge
+  profile?: ProfileCounters
+  // Quality rule findings, when the scan checks quality rules
+  quality?: QualityFinding[]
+}
+
+interface ScanContext {
+  basePath: string
+  options: ScanOptions
+  summary: ScanSummary
+  pool?: ScanPool
+  cache?: ScanCache
+}
+
+/**
+ * Count a false-positive suppression by kind when profiling; true if the match is dropped
+ */
+function countSuppression(reason: FalsePositiveReason | null, stats: PatternProfile | undefined): boolean {
+  if (reason && stats) {
+    if (reason === "indicator") {
+      stats.suppressedByIndicators++
+    } else {
+      stats.suppressedByContexts++
+    }
+  }
+  return reason !== null
+}
+
+/**
+ * Whether a match of a medium/low confidence pattern on a 0-based line should be dropped as a likely false positive
+ */
+function isSuppressed(
+  pattern: PolicyPattern,
+  k: number,
+  line: number,
+  falsePositives: LineFalsePositives,
+  stats: PatternProfile | undefined
+): boolean {
+  if (pattern.confidence === "high") {
+    return false
+  }
+  return countSuppression(falsePositives.reason(k, line), stats)
+}
+
+interface PendingDetection {
+  // Pattern position in the policy, so results keep a stable (line, pattern) order
+  order: number
+  result: DetectionResult
+  // Column of a regex match on its line, and its length
+  column?: number
+  length?: number
+}
+
+/**
+ * Build a detection result for a match on a 0-based line
+ */
+function toDetection(compiled: CompiledPattern, filename: string, line: number, matchText: string): DetectionResult {
+  // Truncate long matches for display
+  const displayMatch = matchText.length > 40 ? matchText.substring(0, 37) + "..." : matchText
+
+  return {
+    file: filename,
+    line: line + 1,
+    pattern: compiled.pattern.name,
+    match: displayMatch,
+    confidence: compiled.pattern.confidence,
+    patternId: compiled.id,
+    matchHash: hashMatch(matchText),
+  }
+}
+
+/**
+ * Whether a regex match clears its pattern's entropy threshold (if it has one)
+ */
+function passesEntropy(pattern: PolicyPattern, match: RegExpExecArray): boolean {
+  if (pattern.entropyThreshold === undefined) {
+    return true
+  }
+  const { entropy, classes } = scoreText(match.groups?.secret ?? match[0])
+  return isHighEntropy(entropy, classes, pattern.entropyThreshold)
+}
+
+/**
+ * Run a pattern over the text of a single line
+ */
+function matchLine(
+  compiled: CompiledPattern,
+  order: number,
+  text: string,
+  line: number,
+  filename: string,
+  found: PendingDetection[],
+  falsePositives: LineFalsePositives,
+  stats?: PatternProfile
+): void {
+  const { regex, pattern } = compiled
+  regex.lastIndex = 0
+
+  let match
+  while ((match = regex.exec(text)) !== null) {
+    // Guard against empty matches looping forever
+    if (match[0].length === 0) {
+      regex.lastIndex++
+      continue
+    }
+    if (stats) {
+      stats.matches++
+    }
+
+    // Skip likely false positives for medium/low confidence patterns
+    if (isSuppressed(pattern, order, line, falsePositives, stats)) {
+      continue
+    }
+
+    if (!passesEntropy(pattern, match)) {
+      continue
+    }
+
+    const result = toDetection(compiled, filename, line, match[0])
+    found.push({ order, result, column: match.index, length: match[0].length })
+  }
+}
+
+/**
+ * Run a pattern over the whole buffer, mapping match offsets back to lines
+ */
+function matchBuffer(
+  compiled: CompiledPattern,
+  order: number,
+  content: string,
+  index: LineIndex,
+  filename: string,
+  found: PendingDetection[],
+  falsePositives: LineFalsePositives,
+  stats?: PatternProfile
+): void {
+  const { regex, pattern } = compiled
+  regex.lastIndex = 0
+  // Profile counters as they stood before the current line's first match, so a redone line
+  // is counted once
+  let countedLine = -1
+  let counted: PatternProfile | undefined
+
+  let match
+  while ((match = regex.exec(content)) !== null) {
+    if (match[0].length === 0) {
+      regex.lastIndex++
+      continue
+    }
+
+    const line = index.lineOf(match.index)
+    if (stats && line !== countedLine) {
+      countedLine = line
+      counted = { ...stats }
+    }
+
+    // A line-bounded pattern ran past the end of its line (or into a CRLF's carriage return):
+    // redo that line on its own so results are exactly what matching the split line would
+    // have produced, and drop what the line's earlier matches added
+    if (!pattern.multiline && match.index + match[0].length > index.lineEnd(line)) {
+      let last = found[found.length - 1]
+      while (last && last.order === order && last.result.line === line + 1) {
+        found.pop()
+        last = found[found.length - 1]
+      }
+      if (stats && counted) {
+        stats.matches = counted.matches
+        stats.suppressedByIndicators = counted.suppressedByIndicators
+        stats.suppressedByContexts = counted.suppressedByContexts
+      }
+      matchLine(compiled, order, index.lineText(content, line), line, filename, found, falsePositives, stats)
+      regex.lastIndex = index.lineStart(line + 1)
+      continue
+    }
+    if (stats) {
+      stats.matches++
+    }
+
+    if (isSuppressed(pattern, order, line, falsePositives, stats)) {
+      continue
+    }
+
+    if (!passesEntropy(pattern, match)) {
+      continue
+    }
+
+    const result = toDetection(compiled, filename, line, match[0])
+    const endLine = index.lineOf(match.index + match[0].length - 1)
+    if (endLine > line) {
+      result.endLine = endLine + 1
+    }
+    found.push({ order, result, column: match.index - index.lineStart(line), length: match[0].length })
+  }
+}
+
+/**
+ * Run a bare-token pattern as the entropy token stage: one pass collects the candidate
+ * tokens, the batch is scored, and only tokens above the entropy threshold are reported
+ */
+function matchTokens(
+  compiled: CompiledPattern,
+  token: TokenShape,
+  order: number,
+  content: string,
+  index: LineIndex,
+  filename: string,
+  found: PendingDetection[],
+  falsePositives: LineFalsePositives,
+  stats?: PatternProfile
+): void {
+  const { pattern } = compiled
+  const batch = findTokens(content, token)
+  if (batch.count === 0) {
+    return
+  }
+  const threshold = pattern.entropyThreshold
+  const scores = threshold !== undefined ? scoreTokens(content, batch) : null
+  if (stats) {
+    stats.matches += batch.count
+  }
+
+  for (let t = 0; t < batch.count; t++) {
+    if (scores && threshold !== undefined && !isHighEntropy(scores.entropy[t], scores.classes[t], threshold)) {
+      continue
+    }
+
+    const start = batch.starts[t]
+    const line = index.lineOf(start)
+    if (isSuppressed(pattern, order, line, falsePositives, stats)) {
+      continue
+    }
+
+    found.push({ order, result: toDetection(compiled, filename, line, content.slice(start, batch.ends[t])) })
+  }
+}
+
+/**
+ * Check one key/value entry of a structured file against the policy's key rules; returns whether
+ * a key rule judged it (the assignment patterns' matches on it are then dropped)
+ */
+function matchKeyValue(
+  policy: CompiledPolicy,
+  entry: KeyValue,
+  filename: string,
+  found: PendingDetection[],
+  profiler?: ScanProfiler
+): boolean {
+  const key = normalizeKey(entry.key)
+  const bound = policy.keyRules.find(({ rule, index }) => {
+    if (profiler) {
+      profiler.patterns[index].linesTested++
+    }
+    return rule.key.test(key)
+  })
+  if (!bound) {
+    return false
+  }
+  if (!bound.rule.value.test(entry.value) || isPlaceholderValue(entry.value)) {
+    return true
+  }
+
+  const compiled = policy.patterns[bound.index]
+  const { pattern } = compiled
+  const stats = profiler?.patterns[bound.index]
+  if (stats) {
+    stats.matches++
+  }
+  const text = `${entry.key}: ${entry.value}`
+  // False-positive terms count wherever they are on the line, as for regex matches
+  if (
+    pattern.confidence !== "high" &&
+    countSuppression(
+      policy.falsePositives.reason(bound.index, policy.falsePositives.evaluate(entry.text ?? text)),
+      stats
+    )
+  ) {
+    return true
+  }
+  if (pattern.entropyThreshold !== undefined) {
+    const { entropy, classes } = scoreText(entry.value)
+    if (!isHighEntropy(entropy, classes, pattern.entropyThreshold)) {
+      return true
+    }
+  }
+
+  found.push({ order: bound.index, result: toDetection(compiled, filename, entry.line, text) })
+  return true
+}
+
+/**
+ * Drop the matches found since `first` that fall on a key/value entry a key rule judged
+ */
+function dropJudged(
+  found: PendingDetection[],
+  first: number,
+  judged: (line: number, start: number, end: number) => boolean
+): void {
+  const kept = found.splice(first).filter(({ result, column = 0, length = Infinity }) => {
+    return !judged(result.line - 1, column, column + length)
+  })
+  found.push(...kept)
+}
+
+/**
+ * Detect secrets in file content
+ *
+ * Matches run over the whole buffer; only lines that produce a prefilter hit or a
+ * match are ever sliced out, and patterns marked `multiline` may span lines.
+ */
+export function detectSecrets(content: string, filename: string, options: ScanOptions = {}): DetectionResult[] {
+  const policy = options.policy || getCompiledPolicy(options.patterns || DEFAULT_PATTERNS)
+  const index = new LineIndex(content)
+  const found: PendingDetection[] = []
+  const { profiler } = options
+  // Each line's false-positive terms are looked up once, on its first match
+  const falsePositives = new LineFalsePositives(policy.falsePositives, content, index)
+
+  // Structured config files are read as key/value entries; on the entries a key rule judged, it
+  // replaces the assignment regexes
+  const format = policy.keyRules.length > 0 ? structuredFormat(filename) : null
+  const keyChecked = new Set(format ? policy.keyRules.map((bound) => bound.index) : [])
+  let keyValueJudged = options.keyValueJudged
+  if (format && !keyValueJudged && hasKeyHints(content)) {
+    const readStart = profiler ? performance.now() : 0
+    const judged = new JudgedEntries()
+    keyValueJudged = (line, start, end) => judged.covers(line, start, end)
+    const reader = createKeyValueReader(format, (entry) => {
+      if (matchKeyValue(policy, entry, filename, found, profiler)) {
+        judged.add(entry)
+      }
+    })
+    reader.write(content)
+    reader.end()
+    if (profiler) {
+      profiler.keyValueTimeMs += performance.now() - readStart
+    }
+  }
+
+  // One pass over the content picks the lines (and patterns) worth running regexes on
+  const prefilterStart = profiler ? performance.now() : 0
+  const candidates = policy.prefilter.candidateLines(content)
+  if (profiler) {
+    profiler.prefilterTimeMs += performance.now() - prefilterStart
+  }
+
+  // Anchored, line-bounded patterns only run on the lines where one of their literals was seen
+  for (const [line, hits] of candidates) {
+    let text: string | undefined
+    for (const k of hits) {
+      const compiled = policy.patterns[k]
+      if (compiled.pattern.multiline || (compiled.guarded && options.sandbox)) {
+        continue
+      }
+      text ??= index.lineText(content, line)
+      const stats = profiler?.patterns[k]
+      const start = stats ? performance.now() : 0
+      const first = found.length
+      matchLine(compiled, k, text, line, filename, found, falsePositives, stats)
+      if (keyValueJudged && keyChecked.has(k)) {
+        dropJudged(found, first, keyValueJudged)
+      }
+      if (stats) {
+        stats.matchTimeMs += performance.now() - start
+        stats.linesTested++
+      }
+    }
+  }
+
+  // Slow-path and multi-line patterns get one exec loop over the whole buffer (bare-token
+  // patterns a single tokenizing pass instead)
+  let anchoredHits: Set<number> | undefined
+  for (let k = 0; k < policy.patterns.length; k++) {
+    const compiled = policy.patterns[k]
+    if (compiled.guarded && options.sandbox) {
+      continue
+    }
+    if (compiled.literals) {
+      if (!compiled.pattern.multiline) {
+        continue
+      }
+      anchoredHits ??= new Set([...candidates.values()].flat())
+      if (!anchoredHits.has(k)) {
+        continue
+      }
+    }
+    const stats = profiler?.patterns[k]
+    const start = stats ? performance.now() : 0
+    const first = found.length
+    if (compiled.token) {
+      matchTokens(compiled, compiled.token, k, content, index, filename, found, falsePositives, stats)
+    } else {
+      matchBuffer(compiled, k, content, index, filename, found, falsePositives, stats)
+    }
+    if (keyValueJudged && keyChecked.has(k)) {
+      dropJudged(found, first, keyValueJudged)
+    }
+    if (stats) {
+      stats.matchTimeMs += performance.now() - start
+      stats.linesTested += index.lineCount
+    }
+  }
+
+  found.sort((a, b) => a.result.line - b.result.line || a.order - b.order)
+  return found.map((f) => f.result)
+}
+
+/**
+ * Detect secrets with every pattern: built-in ones inline, guarded ones in the regex sandbox
+ */
+export async function matchContent(
+  content: string,
+  filename: string,
+  options: ScanOptions = {}
+): Promise<DetectionResult[]> {
+  const detections = detectSecrets(content, filename, options)
+  if (!options.sandbox?.active) {
+    return detections
+  }
+
+  const guarded = await options.sandbox.match(content, filename, options.profiler)
+  if (guarded.length === 0) {
+    return detections
+  }
+
+  const policy = options.policy || getCompiledPolicy(options.patterns || DEFAULT_PATTERNS)
+  return sortByPolicyOrder(detections.concat(guarded), policy)
+}
+
+/**
+ * Sort merged detections the way detectSecrets orders them: by line, then by pattern position
+ */
+function sortByPolicyOrder(detections: DetectionResult[], policy: CompiledPolicy): DetectionResult[] {
+  const order = new Map<string, number>()
+  policy.patterns.forEach((compiled, k) => {
+    if (!order.has(compiled.id)) {
+      order.set(compiled.id, k)
+    }
+  })
+  return detections.sort((a, b) => a.line - b.line || (order.get(a.patternId) ?? 0) - (order.get(b.patternId) ?? 0))
+}
+
+/**
+ * Check if a file should be scanned based on extension
+ */
+export function shouldScanFile(filename: string, excludeExtensions?: string[]): boolean {
+  const ext = extname(filename).slice(1).toLowerCase()
+
+  // Check if explicitly excluded
+  if (excludeExtensions?.includes(`.${ext}`)) {
+    return false
+  }
+
+  // Check if it's a known scannable extension
+  if (SCANNABLE_EXTENSIONS.includes(ext)) {
+    return true
+  }
+
+  // Also scan files without extensions (could be scripts, configs)
+  if (!ext) {
+    return true
+  }
+
+  return false
+}
+
+/**
+ * Check if a directory should be skipped
+ */
+export function shouldSkipDirectory(dirname: string, excludePaths?: string[]): boolean {
+  if (SKIP_DIRECTORIES.includes(dirname)) {
+    return true
+  }
+  if (excludePaths?.includes(dirname)) {
+    return true
+  }
+  return false
+}
+
+/**
+ * Whether the leading bytes of a file look binary: any NUL byte, or a high share of
+ * control characters and invalid UTF-8 sequences
+ */
+export function looksBinary(bytes: Uint8Array): boolean {
+  if (bytes.length === 0) {
+    return false
+  }
+  let nonText = 0
+  let i = 0
+  while (i < bytes.length) {
+    const byte = bytes[i]
+    if (byte === 0) {
+      return true
+    }
+    if (byte < 0x80) {
+      if (!TEXT_CONTROL_BYTES.has(byte) && (byte < 0x20 || byte === 0x7f)) {
+        nonText++
+      }
+      i++
+      continue
+    }
+
+    // Multi-byte UTF-8: the lead byte gives the length, continuation bytes are 10xxxxxx
+    let length = 0
+    if (byte >= 0xc2 && byte <= 0xdf) {
+      length = 2
+    } else if (byte >= 0xe0 && byte <= 0xef) {
+      length = 3
+    } else if (byte >= 0xf0 && byte <= 0xf4) {
+      length = 4
+    }
+    let valid = length > 0
+    // A sequence cut off by the end of the window is not evidence either way
+    for (let k = 1; valid && k < length && i + k < bytes.length; k++) {
+      valid = (bytes[i + k] & 0xc0) === 0x80
+    }
+    if (valid) {
+      i += length
+    } else {
+      nonText++
+      i++
+    }
+  }
+  return nonText / bytes.length > BINARY_THRESHOLD
+}
+
+/**
+ * Number of newlines in text[0, end)
+ */
+function countNewlines(text: string, end: number): number {
+  let count = 0
+  let newline = text.indexOf("\n")
+  while (newline !== -1 && newline < end) {
+    count++
+    newline = text.indexOf("\n", newline + 1)
+  }
+  return count
+}
+
+/**
+ * Detect secrets in a file by reading it in fixed-size chunks.
+ * Each window of complete lines is matched with line numbers carried across chunks; the tail
+ * of every window is carried into the next one so boundary-spanning matches are not lost.
+ */
+async function detectSecretsInFile(
+  handle: FileHandle,
+  relativePath: string,
+  options: ScanOptions
+): Promise<{ detections: DetectionResult[]; quality: QualityFinding[]; bytesRead: number; contentHash: string }> {
+  const detections: DetectionResult[] = []
+  const quality: QualityFinding[] = []
+  // Quality findings already reported, by line and rule (windows overlap, and a rule reports a line once)
+  const qualitySeen = new Set<string>()
+  const hash = createHash("sha256")
+  const decoder = new StringDecoder("utf8")
+  const buffer = Buffer.alloc(STREAM_CHUNK_SIZE)
+  let bytesRead = 0
+
+  // Text not yet fully matched, starting at 0-based line `pendingLine`
+  let pending = ""
+  let pendingLine = 0
+  // Detections already reported for the overlap at the start of `pending` (with multiplicity)
+  let reported = new Map<string, number>()
+
+  // Structured files are also read as one continuous key/value stream, since a window
+  // can start in the middle of a string
+  const policy = options.policy || getCompiledPolicy(options.patterns || DEFAULT_PATTERNS)
+  const format = policy.keyRules.length > 0 ? structuredFormat(relativePath) : null
+  const keyValues: PendingDetection[] = []
+  // Entries of the file a key rule judged (the reader is always at least as far as the window)
+  const judged = new JudgedEntries()
+  const { profiler } = options
+  const reader = format
+    ? createKeyValueReader(format, (entry) => {
+        if (matchKeyValue(policy, entry, relativePath, keyValues, profiler)) {
+          judged.add(entry)
+        }
+      })
+    : null
+  const windowOptions: ScanOptions = reader
+    ? {
+        ...options,
+        policy,
+        keyValueJudged: (line, start, end) => judged.covers(line + pendingLine, start, end),
+      }
+    : options
+
+  const keyOf = (detection: DetectionResult) => `${detection.line}:${detection.patternId}:${detection.match}`
+
+  const matchWindow = async (text: string): Promise<DetectionResult[]> => {
+    const found = await matchContent(text, relativePath, windowOptions)
+    for (const detection of found) {
+      detection.line += pendingLine
+      if (detection.endLine) {
+        detection.endLine += pendingLine
+      }
+    }
+    for (const finding of options.quality?.check(text, relativePath) ?? []) {
+      finding.line += pendingLine
+      const key = `${finding.line}:${finding.ruleId}`
+      if (!qualitySeen.has(key)) {
+        qualitySeen.add(key)
+        quality.push(finding)
+      }
+    }
+    return found
+  }
+
+  const report = (found: DetectionResult[]): void => {
+    for (const detection of found) {
+      const key = keyOf(detection)
+      const seen = reported.get(key) ?? 0
+      if (seen > 0) {
+        // Found again in the overlap; earlier occurrences on a line come first
+        reported.set(key, seen - 1)
+      } else {
+        detections.push(detection)
+      }
+    }
+  }
+
+  for (;;) {
+    const { bytesRead: count } = await handle.read(buffer, 0, STREAM_CHUNK_SIZE, null)
+    const done = count === 0
+    if (!done) {
+      bytesRead += count
+      hash.update(buffer.subarray(0, count))
+    }
+    const text = done ? decoder.end() : decoder.write(buffer.subarray(0, count))
+    if (reader) {
+      const readStart = profiler ? performance.now() : 0
+      reader.write(text)
+      if (done) {
+        // The last line has no newline to end it
+        reader.end()
+      }
+      if (profiler) {
+        profiler.keyValueTimeMs += performance.now() - readStart
+      }
+    }
+    pending += text
+    if (done) {
+      if (pending) {
+        report(await matchWindow(pending))
+      }
+      break
+    }
+
+    const lastNewline = pending.lastIndexOf("\n")
+    const splitLine = pending.length - lastNewline - 1 > STREAM_CHUNK_SIZE
+    let carryFrom: number
+    if (splitLine) {
+      // One enormous line (e.g. minified): match what we have and keep only its tail
+      report(await matchWindow(pending))
+      carryFrom = pending.length - STREAM_OVERLAP
+    } else if (lastNewline !== -1) {
+      // Match every complete line, then carry whole trailing lines (up to the overlap) forward
+      report(await matchWindow(pending.slice(0, lastNewline)))
+      carryFrom = lastNewline + 1
+      while (carryFrom > 0) {
+        const lineStart = carryFrom >= 2 ? pending.lastIndexOf("\n", carryFrom - 2) + 1 : 0
+        if (lastNewline + 1 - lineStart > STREAM_OVERLAP) {
+          break
+        }
+        carryFrom = lineStart
+      }
+    } else {
+      continue
+    }
+
+    pendingLine += countNewlines(pending, carryFrom)
+    pending = pending.slice(carryFrom)
+    // Only detections inside the carried text can be found again. Carried whole lines were
+    // matched in full; a split line's tail is matched alone to count what it holds
+    let carried: DetectionResult[] = []
+    if (splitLine) {
+      carried = await matchWindow(pending)
+    } else {
+      for (let i = detections.length - 1; i >= 0 && detections[i].line > pendingLine; i--) {
+        carried.push(detections[i])
+      }
+    }
+    reported = new Map()
+    for (const detection of carried) {
+      const key = keyOf(detection)
+      reported.set(key, (reported.get(key) ?? 0) + 1)
+    }
+  }
+
+  if (reader) {
+    for (const { result } of keyValues) {
+      detections.push(result)
+    }
+    sortByPolicyOrder(detections, policy)
+  }
+
+  return { detections, quality, bytesRead, contentHash: hash.digest("hex") }
+}
+
+/**
+ * Read a single file and detect secrets in it (shared by in-process scans and scan workers)
+ */
+export async function readAndScanFile(task: FileScanTask, options: ScanOptions): Promise<FileScanResult> {
+  const { filePath, relativePath } = task
+  const result: FileScanResult = { detections: [], bytesRead: 0, matchTimeMs: 0 }
+  try {
+    const fileStat = await stat(filePath)
+    if (options.maxFileSize !== undefined && fileStat.size > options.maxFileSize) {
+      result.tooLarge = true
+      return result
+    }
+
+    const handle = await open(filePath, "r")
+    try {
+      // Sniff the first bytes before paying for a full UTF-8 decode
+      const head = Buffer.alloc(Math.min(BINARY_SNIFF_SIZE, fileStat.size))
+      const { bytesRead: headBytes } = await handle.read(head, 0, head.length, 0)
+      if (looksBinary(head.subarray(0, headBytes))) {
+        result.binary = true
+        return result
+      }
+
+      // Stream large files so memory depends on the chunk size, not the file size
+      if (fileStat.size > STREAM_THRESHOLD) {
+        const matchStart = performance.now()
+        const streamed = await detectSecretsInFile(handle, relativePath, options)
+        result.matchTimeMs = performance.now() - matchStart
+        result.detections = streamed.detections
+        if (options.quality) {
+          result.quality = streamed.quality
+        }
+        result.bytesRead = streamed.bytesRead
+        result.streamed = true
+        result.incomplete = (options.sandbox?.stopped.length ?? 0) > 0
+        if (task.hashContent || task.knownHash) {
+          // Hashed while streaming; matching already happened, so an unchanged hash saves nothing
+          result.contentHash = streamed.contentHash
+        }
+        return result
+      }
+
+      // The sniff used a positional read, so this still reads from the start
+      const content = await handle.readFile("utf-8")
+      result.bytesRead = fileStat.size
+      if (task.hashContent || task.knownHash) {
+        result.contentHash = hashContent(content)
+        if (result.contentHash === task.knownHash) {
+          result.unchanged = true
+          return result
+        }
+      }
+      const matchStart = performance.now()
+      result.detections = await matchContent(content, relativePath, options)
+      // Quality rules check the content already in memory instead of reading the file again
+      if (options.quality) {
+        result.quality = options.quality.check(content, relativePath)
+      }
+      result.matchTimeMs = performance.now() - matchStart
+      result.incomplete = (options.sandbox?.stopped.length ?? 0) > 0
+    } finally {
+      await handle.close()
+    }
+  } catch {
+    // Could be a permission issue, skip
+  }
+  return result
+}
+
+/**
+ * Read and match one file, on a worker when the scan has a pool
+ */
+async function runFileScan(task: FileScanTask, context: ScanContext): Promise<FileScanResult> {
+  if (context.pool) {
+    try {
+      return await context.pool.run(task)
+    } catch {
+      // Worker died; scan this file in-process instead
+    }
+  }
+  return readAndScanFile(task, context.options)
+}
+
+/**
+ * Scan a single file for secrets, reusing cached detections when the file is unchanged
+ */
+async function scanFile(filePath: string, context: ScanContext): Promise<void> {
+  const { summary, cache } = context
+  const task: FileScanTask = { filePath, relativePath: relative(context.basePath, filePath) }
+  const withFile = (detection: CachedDetection): DetectionResult => ({ file: task.relativePath, ...detection })
+  const findingWithFile = (finding: CachedQualityFinding): QualityFinding => ({ file: task.relativePath, ...finding })
+
+  let key: string | undefined
+  let fileStat: Stats | undefined
+  if (cache) {
+    key = cache.key(filePath)
+    fileStat = await stat(filePath).catch(() => undefined)
+    const fresh = fileStat && cache.lookup(key, fileStat.size, fileStat.mtimeMs)
+    if (fresh) {
+      cache.hits++
+      summary.filesScanned++
+      for (const detection of fresh.detections) {
+        recordFileDetection(summary, withFile(detection), filePath, context.options)
+      }
+      for (const finding of fresh.quality ?? []) {
+        recordQualityFinding(summary, findingWithFile(finding), context.options)
+      }
+      return
+    }
+    // Size or mtime changed: re-read, but only re-match if the content did too
+    task.hashContent = true
+    task.knownHash = cache.get(key)?.contentHash
+  }
+
+  const scannedAtMs = Date.now()
+  const result = await runFileScan(task, context)
+  if (result.tooLarge || result.binary) {
+    summary.filesSkipped++
+    if (result.tooLarge) {
+      summary.filesTooLarge++
+    } else {
+      summary.filesBinary++
+    }
+    return
+  }
+  summary.filesScanned++
+  if (result.streamed) {
+    summary.filesStreamed++
+  }
+  summary.bytesRead += result.bytesRead
+  summary.matchTimeMs += result.matchTimeMs
+  for (const stopped of result.stoppedPatterns ?? []) {
+    summary.stoppedPatterns.push(stopped)
+  }
+  const { profiler } = context.options
+  if (profiler) {
+    if (result.profile) {
+      profiler.merge(result.profile)
+    }
+    if (!result.unchanged) {
+      profiler.recordFile(task.relativePath, result.matchTimeMs, result.bytesRead)
+    }
+  }
+
+  let detections = result.detections
+  let quality = result.quality ?? []
+  if (cache && key) {
+    const previous = cache.get(key)
+    if (result.unchanged && previous) {
+      cache.hits++
+      detections = previous.detections.map(withFile)
+      quality = (previous.quality ?? []).map(findingWithFile)
+    } else {
+      cache.misses++
+    }
+    // Don't cache results that are missing a stopped pattern's matches
+    if (fileStat && result.contentHash && !result.incomplete) {
+      cache.record(key, {
+        size: fileStat.size,
+        mtimeMs: fileStat.mtimeMs,
+        contentHash: result.contentHash,
+        scannedAtMs,
+        detections: detections.map(({ file: _file, ...detection }) => detection),
+        ...(quality.length > 0 ? { quality: quality.map(({ file: _file, ...finding }) => finding) } : {}),
+      })
+    }
+  }
+
+  for (const detection of detections) {
+    recordFileDetection(summary, detection, filePath, context.options)
+  }
+  for (const finding of quality) {
+    recordQualityFinding(summary, finding, context.options)
+  }
+}
+
+/**
+ * Scan a directory recursively for secrets, keeping several file reads in flight
+ */
+async function scanDirectory(dirPath: string, context: ScanContext): Promise<void> {
+  const { options, summary } = context
+  const skipDirectory = (name: string) => shouldSkipDirectory(name, options.excludePaths)
+
+  // Keep every worker busy even if the read concurrency is set lower than the pool size
+  const concurrency = Math.max(options.concurrency ?? DEFAULT_SCAN_CONCURRENCY, context.pool?.size ?? 0)
+
+  // Never scan the cache directory itself (the index holds match excerpts)
+  const cacheDir = context.cache && dirname(resolve(context.cache.path))
+
+  const visit = async (fullPath: string, name: string): Promise<void> => {
+    if (cacheDir && dirname(resolve(fullPath)) === cacheDir) {
+      return
+    }
+    summary.totalFiles++
+
+    if (shouldScanFile(name, options.excludeExtensions)) {
+      await scanFile(fullPath, context)
+    } else {
+      summary.filesSkipped++
+    }
+  }
+
+  // Git already knows which files are tracked or ignored; SKIP_DIRECTORIES still applies as a safety net
+  const gitFiles = options.git === false ? null : await listGitFiles(dirPath, { untracked: options.untracked })
+  if (gitFiles) {
+    summary.fileSource = "git"
+    await walkFileList(dirPath, gitFiles, { concurrency, skipDirectory, ignoreFiles: [OTC_IGNORE_FILE] }, visit)
+  } else {
+    summary.fileSource = "walk"
+    await walkFiles(dirPath, { concurrency, skipDirectory, ignoreFiles: IGNORE_FILES }, visit)
+  }
+}
+
+/**
+ * Order detections by path, then line, so concurrent scans produce stable output
+ */
+function compareDetections(a: { file: string; line: number }, b: { file: string; line: number }): number {
+  if (a.file !== b.file) {
+    return a.file < b.file ? -1 : 1
+  }
+  return a.line - b.line
+}
+
+/**
+ * Empty summary for a new scan
+ */
+export function createSummary(): ScanSummary {
+  return {
+    totalFiles: 0,
+    filesScanned: 0,
+    filesSkipped: 0,
+    detections: [],
+    quality: [],
+    qualityFindings: 0,
+    highConfidence: 0,
+    mediumConfidence: 0,
+    lowConfidence: 0,
+    baselineSuppressed: 0,
+    compileTimeMs: 0,
+    matchTimeMs: 0,
+    wallClockMs: 0,
+    bytesRead: 0,
+    filesPerSecond: 0,
+    workers: 0,
+    cacheHits: 0,
+    cacheMisses: 0,
+    filesStreamed: 0,
+    filesTooLarge: 0,
+    filesBinary: 0,
+    skippedPatterns: [],
+    stoppedPatterns: [],
+  }
+}
+
+/**
+ * Count a detection, hand it to the `onDetection` callback and keep it unless collection is off
+ */
+export function recordDetection(summary: ScanSummary, detection: DetectionResult, options: ScanOptions): void {
+  if (detection.confidence === "high") {
+    summary.highConfidence++
+  } else if (detection.confidence === "medium") {
+    summary.mediumConfidence++
+  } else {
+    summary.lowConfidence++
+  }
+  options.onDetection?.(detection)
+  if (options.collectDetections !== false) {
+    summary.detections.push(detection)
+  }
+}
+
+/**
+ * Record a detection in a file unless the baseline accepts it (one set lookup per detection)
+ */
+export function recordFileDetection(
+  summary: ScanSummary,
+  detection: DetectionResult,
+  filePath: string,
+  options: ScanOptions
+): void {
+  if (options.baseline?.has(detection, filePath)) {
+    summary.baselineSuppressed++
+    return
+  }
+  recordDetection(summary, detection, options)
+}
+
+/**
+ * Count a quality finding, hand it to the `onQualityFinding` callback and keep it unless collection is off
+ */
+export function recordQualityFinding(summary: ScanSummary, finding: QualityFinding, options: ScanOptions): void {
+  summary.qualityFindings++
+  options.onQualityFinding?.(finding)
+  if (options.collectDetections !== false) {
+    summary.quality.push(finding)
+  }
+}
+
+/**
+ * Sort detections and record timings once a scan is done
+ */
+export function finalizeSummary(summary: ScanSummary, scanStart: number): ScanSummary {
+  // Reads complete in any order; sort so output is deterministic
+  summary.detections.sort(compareDetections)
+  summary.quality.sort(compareDetections)
+
+  summary.wallClockMs = performance.now() - scanStart
+  summary.filesPerSecond = summary.wallClockMs > 0 ? (summary.filesScanned * 1000) / summary.wallClockMs : 0
+
+  return summary
+}
+
+/**
+ * Scan a path (file or directory) for secrets
+ */
+export async function scan(targetPath: string, options: ScanOptions = {}): Promise<ScanSummary> {
+  const scanStart = performance.now()
+  const summary = createSummary()
+
+  let targetStat
+  try {
+    targetStat = await stat(targetPath)
+  } catch (error) {
+    const code = (error as NodeJS.ErrnoException).code
+    if (code === "ENOENT") {
+      throw new Error(`Cannot scan "${targetPath}": Path does not exist`)
+    }
+    if (code === "EACCES") {
+      throw new Error(`Cannot scan "${targetPath}": Permission denied`)
+    }
+    throw new Error(`Cannot scan "${targetPath}": ${error}`)
+  }
+  const basePath = options.basePath || (targetStat.isDirectory() ? targetPath : join(targetPath, ".."))
+
+  // Compile the policy once for the whole scan (reused by later scans of the same policy)
+  const compileStart = performance.now()
+  const policy = options.policy || getCompiledPolicy(options.patterns || DEFAULT_PATTERNS)
+  summary.compileTimeMs = performance.now() - compileStart
+  summary.skippedPatterns = policy.skipped.map(({ id, reason }) => ({ id, reason }))
+  summary.skippedPatterns.push(...(options.quality?.skipped ?? []))
+  const scanOptions: ScanOptions = { ...options, policy }
+  if (options.profile && !scanOptions.profiler) {
+    scanOptions.profiler = new ScanProfiler(policy)
+  }
+  const context: ScanContext = { basePath, options: scanOptions, summary }
+
+  // Team-supplied patterns run on a worker that is stopped if a pattern exceeds its deadline
+  if (!scanOptions.sandbox && policy.patterns.some((compiled) => compiled.guarded)) {
+    scanOptions.sandbox = new RegexSandbox(policy)
+  }
+  if (options.cache) {
+    // Entries hold quality findings too, so either rule set changing invalidates the cache
+    const cacheHash = options.quality ? `${policy.hash}:${options.quality.hash}` : policy.hash
+    context.cache =
+      options.cache instanceof ScanCache
+        ? options.cache.reuse(cacheHash)
+        : await ScanCache.load(options.cache, cacheHash)
+  }
+
+  // Opt-in multi-core engine: matching runs on worker threads, results merge here
+  const workers = Math.floor(options.workers ?? 0)
+  if (workers > 1 && targetStat.isDirectory()) {
+    context.pool = new ScanPool(workers, {
+      patterns: policy.source,
+      maxFileSize: options.maxFileSize,
+      regexWorkerUrl: REGEX_WORKER_URL.href,
+      profile: !!scanOptions.profiler,
+      quality: options.quality?.source,
+    })
+    summary.workers = workers
+  }
+
+  try {
+    if (targetStat.isDirectory()) {
+      await scanDirectory(targetPath, context)
+    } else {
+      summary.totalFiles = 1
+      if (shouldScanFile(targetPath, options.excludeExtensions)) {
+        await scanFile(targetPath, context)
+      } else {
+        summary.filesSkipped = 1
+      }
+    }
+  } finally {
+    await context.pool?.close()
+    if (scanOptions.sandbox && scanOptions.sandbox !== options.sandbox) {
+      await scanOptions.sandbox.close()
+    }
+  }
+  for (const stopped of scanOptions.sandbox?.stopped ?? []) {
+    summary.stoppedPatterns.push(stopped)
+  }
+  if (scanOptions.profiler) {
+    summary.profile = scanOptions.profiler.report()
+  }
+
+  if (context.cache) {
+    if (targetStat.isDirectory()) {
+      context.cache.prune(targetPath)
+    }
+    summary.cacheHits = context.cache.hits
+    summary.cacheMisses = context.cache.misses
+    try {
+      await context.cache.save()
+    } catch {
+      // A read-only checkout just loses the cache; the scan result stands
+    }
+  }
+
+  return finalizeSummary(summary, scanStart)
+}
+
+/**
+ * Load patterns from policies config
+ */
+export function patternsFromPolicies(policies: Policies): PolicyPattern[] {
+  return policies.patterns
+}
+
+/**
+ * Get a pattern by ID
+ */
+export function getPatternById(patterns: PolicyPattern[], id: string): PolicyPattern | undefined {
+  return patterns.find((p) => getPatternId(p) === id)
+}
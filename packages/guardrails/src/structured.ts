@@ -0,0 +1,418 @@
+/**
+ * Structure-aware scanning for config files
+ * JSON, YAML and .env files are read once as key/value entries, and values are checked against
+ * the key they are assigned to (`client_secret`, `private_key`, ...). The `key = "value"`
+ * assignment regexes, which miss quoted JSON keys, still run everywhere outside the entries a
+ * key rule judged (block scalars, values of other keys, the rest of a minified line)
+ */
+
+import { basename, extname } from "path"
+
+export type StructuredFormat = "json" | "yaml" | "env"
+
+export interface KeyValue {
+  key: string
+  value: string
+  // 0-based line the value starts on
+  line: number
+  // Source line the entry is on, for false-positive checks (absent when the line was too long to keep)
+  text?: string
+  // Columns from the key to the end of the value on `line`; absent when the entry is the whole line
+  start?: number
+  end?: number
+}
+
+/**
+ * Key-name check standing in for one of the built-in assignment patterns
+ */
+export interface KeyRule {
+  // Built-in pattern this rule replaces for structured files
+  patternId: string
+  // Tested against the key lowercased with separators removed (clientSecret -> clientsecret)
+  key: RegExp
+  // Shape a value must have to be reported
+  value: RegExp
+}
+
+export interface KeyValueReader {
+  write(text: string): void
+  end(): void
+}
+
+// Checked in order; the first rule whose key matches decides
+export const KEY_RULES: KeyRule[] = [
+  {
+    patternId: "generic-api-key-assignment",
+    key: /apikey$/,
+    value: /^[A-Za-z0-9_\-.]{20,}$/,
+  },
+  {
+    patternId: "password-assignment",
+    key: /(password|passwd|pwd|passphrase)$/,
+    value: /^.{8,}$/,
+  },
+  {
+    patternId: "generic-secret-assignment",
+    key: /(secret|token|credentials?|privatekey|secretkey|accesskey)$/,
+    value: /^[A-Za-z0-9_\-.\/+=~]{16,}$/,
+  },
+]
+
+// Every key rule needs one of these in the key name; content without any has nothing to check
+const KEY_HINTS = /key|pass|pwd|secret|token|credential/i
+
+// References to a value kept elsewhere: ${VAR}, $VAR, {{ var }}, <your-key>, %(var)s, env lookups
+const PLACEHOLDER_VALUE = /^(\$\{.*\}|\$[A-Za-z_][A-Za-z0-9_]*|\{\{.*\}\}|<[^>]*>|%\(.*\)s|(process\.)?env[.:(].*|os\.environ.*)$/i
+
+// Longest value kept per entry; anything longer is a document, not a credential
+const MAX_VALUE_LENGTH = 4096
+
+// Longest line the line-based readers buffer before giving up on it
+const MAX_LINE_LENGTH = 64 * 1024
+
+const YAML_ENTRY = /^\s*(?:-\s+)?(?:"([^"]+)"|'([^']+)'|([^\s#"'{[][^:#]*?))\s*:(?:\s+(.*))?$/
+
+const ENV_ENTRY = /^\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_.-]*)\s*=\s*(.*)$/
+
+/**
+ * Format of a structured config file, or null for anything else
+ */
+export function structuredFormat(filename: string): StructuredFormat | null {
+  const name = basename(filename).toLowerCase()
+  const ext = extname(name)
+  if (ext === ".json") {
+    return "json"
+  }
+  if (ext === ".yaml" || ext === ".yml") {
+    return "yaml"
+  }
+  if (name === ".env" || name.startsWith(".env.") || ext === ".env") {
+    return "env"
+  }
+  return null
+}
+
+/**
+ * Whether content could hold a key any key rule matches (cheap check before reading it)
+ */
+export function hasKeyHints(content: string): boolean {
+  return KEY_HINTS.test(content)
+}
+
+/**
+ * Key name as key rules see it: lowercase, without separators
+ */
+export function normalizeKey(key: string): string {
+  return key.toLowerCase().replace(/[^a-z0-9]/g, "")
+}
+
+/**
+ * Whether a value only points at a secret kept somewhere else
+ */
+export function isPlaceholderValue(value: string): boolean {
+  return PLACEHOLDER_VALUE.test(value.trim())
+}
+
+/**
+ * Strip quotes (or a trailing comment, if unquoted) from a YAML or .env scalar
+ */
+function scalarValue(raw: string): string {
+  const text = raw.trim()
+  const quote = text[0]
+  if (quote === '"' || quote === "'") {
+    const close = text.indexOf(quote, 1)
+    return close === -1 ? text.slice(1) : text.slice(1, close)
+  }
+  const comment = text.search(/\s#/)
+  return (comment === -1 ? text : text.slice(0, comment)).trim()
+}
+
+/**
+ * Feed text through in pieces and hand complete lines to `onLine` (with 0-based line numbers)
+ */
+function createLineReader(onLine: (text: string, line: number) => void): KeyValueReader {
+  let carry = ""
+  let line = 0
+  // The current line outgrew MAX_LINE_LENGTH; ignore it up to its newline
+  let overlong = false
+
+  return {
+    write(text) {
+      let start = 0
+      let newline = text.indexOf("\n")
+      while (newline !== -1) {
+        if (!overlong) {
+          onLine(carry + text.slice(start, newline), line)
+        }
+        carry = ""
+        overlong = false
+        line++
+        start = newline + 1
+        newline = text.indexOf("\n", start)
+      }
+      if (!overlong) {
+        carry += text.slice(start)
+        if (carry.length > MAX_LINE_LENGTH) {
+          carry = ""
+          overlong = true
+        }
+      }
+    },
+    end() {
+      if (carry && !overlong) {
+        onLine(carry, line)
+      }
+      carry = ""
+    },
+  }
+}
+
+function createYamlReader(onEntry: (entry: KeyValue) => void): KeyValueReader {
+  return createLineReader((raw, line) => {
+    const text = raw.replace(/\r$/, "")
+    const entry = YAML_ENTRY.exec(text)
+    if (!entry || entry[4] === undefined) {
+      return
+    }
+    const value = entry[4].trim()
+    // Block scalars, anchors, aliases, tags and flow collections are not plain values
+    if (!value || /^[|>&*!{[#]/.test(value)) {
+      return
+    }
+    onEntry({ key: entry[1] ?? entry[2] ?? entry[3], value: scalarValue(value), line, text })
+  })
+}
+
+function createEnvReader(onEntry: (entry: KeyValue) => void): KeyValueReader {
+  return createLineReader((raw, line) => {
+    const text = raw.replace(/\r$/, "")
+    const entry = ENV_ENTRY.exec(text)
+    if (entry) {
+      onEntry({ key: entry[1], value: scalarValue(entry[2]), line, text })
+    }
+  })
+}
+
+// Character codes the JSON tokenizer looks at
+const TAB = 0x09
+const NEWLINE = 0x0a
+const RETURN = 0x0d
+const SPACE = 0x20
+const QUOTE = 0x22
+const STAR = 0x2a
+const SLASH = 0x2f
+const COLON = 0x3a
+const BACKSLASH = 0x5c
+
+// JSON tokenizer states ("value" is between tokens)
+type JsonState = "value" | "string" | "escape" | "slash" | "line-comment" | "block-comment" | "block-comment-star"
+
+/**
+ * Streaming JSON (and JSONC) tokenizer that reports `"key": "string"` pairs at any depth.
+ * Works character by character, so a document can arrive in arbitrary pieces. Entries are
+ * handed on once their line ends, with its text.
+ */
+function createJsonReader(onEntry: (entry: KeyValue) => void): KeyValueReader {
+  let state: JsonState = "value"
+  let line = 0
+  let text = ""
+  let textLine = 0
+  // Column of the current string's opening quote
+  let textStart = 0
+  let truncated = false
+  // Last string seen where a key could be, waiting for its colon (with its line and column)
+  let pendingKey: string | null = null
+  let pendingKeyLine = 0
+  let pendingKeyStart = 0
+  // Key whose value comes next, set once the colon is seen
+  let valueKey: string | null = null
+  let valueKeyLine = 0
+  let valueKeyStart = 0
+  // Current line from earlier pieces (and its length, kept even when the text is not), and
+  // the entries on it waiting for its end
+  let lineText = ""
+  let lineLength = 0
+  let overlong = false
+  let waiting: KeyValue[] = []
+
+  const endLine = (rest: string) => {
+    const fits = !overlong && lineText.length + rest.length <= MAX_LINE_LENGTH
+    for (const entry of waiting) {
+      onEntry(fits ? { ...entry, text: (lineText + rest).replace(/\r$/, "") } : entry)
+    }
+    waiting = []
+    lineText = ""
+    overlong = false
+  }
+
+  // `end` is the column just past the closing quote
+  const endString = (end: number) => {
+    if (valueKey !== null) {
+      if (!truncated) {
+        const entry: KeyValue = {
+          key: valueKey,
+          value: text,
+          line: textLine,
+          start: valueKeyLine === textLine ? valueKeyStart : 0,
+          end: line === textLine ? end : Infinity,
+        }
+        if (overlong) {
+          onEntry(entry)
+        } else {
+          waiting.push(entry)
+        }
+      }
+      valueKey = null
+    } else {
+      pendingKey = truncated ? null : text
+      pendingKeyLine = textLine
+      pendingKeyStart = textStart
+    }
+  }
+
+  return {
+    write(chunk) {
+      let lineStart = 0
+      for (let i = 0; i < chunk.length; i++) {
+        const code = chunk.charCodeAt(i)
+        if (code === NEWLINE) {
+          line++
+          endLine(waiting.length > 0 ? chunk.slice(lineStart, i) : "")
+          lineStart = i + 1
+          lineLength = 0
+        }
+        switch (state) {
+          case "string":
+            if (code === QUOTE) {
+              state = "value"
+              endString(lineLength + i - lineStart + 1)
+            } else if (code === BACKSLASH) {
+              state = "escape"
+            } else {
+              // Take the whole run of plain characters in one slice
+              let end = i + 1
+              while (end < chunk.length) {
+                const next = chunk.charCodeAt(end)
+                if (next === QUOTE || next === BACKSLASH || next === NEWLINE) {
+                  break
+                }
+                end++
+              }
+              if (!truncated) {
+                text += chunk.slice(i, end)
+                if (text.length > MAX_VALUE_LENGTH) {
+                  text = ""
+                  truncated = true
+                }
+              }
+              i = end - 1
+            }
+            continue
+          case "escape":
+            state = "string"
+            if (!truncated) {
+              // Escapes are kept verbatim, except the common \" \\ \/ ones
+              text += code === QUOTE || code === BACKSLASH || code === SLASH ? chunk[i] : `\\${chunk[i]}`
+            }
+            continue
+          case "slash":
+            state = code === SLASH ? "line-comment" : code === STAR ? "block-comment" : "value"
+            continue
+          case "line-comment":
+            if (code === NEWLINE) {
+              state = "value"
+            }
+            continue
+          case "block-comment":
+            if (code === STAR) {
+              state = "block-comment-star"
+            }
+            continue
+          case "block-comment-star":
+            state = code === SLASH ? "value" : code === STAR ? "block-comment-star" : "block-comment"
+            continue
+        }
+
+        // Between tokens
+        if (code === QUOTE) {
+          state = "string"
+          text = ""
+          textLine = line
+          textStart = lineLength + i - lineStart
+          truncated = false
+        } else if (code === COLON) {
+          valueKey = pendingKey
+          valueKeyLine = pendingKeyLine
+          valueKeyStart = pendingKeyStart
+          pendingKey = null
+        } else if (code === SLASH) {
+          state = "slash"
+        } else if (code !== SPACE && code !== TAB && code !== NEWLINE && code !== RETURN) {
+          // Objects, arrays, numbers and literals: no string value for the pending key
+          pendingKey = null
+          valueKey = null
+        }
+      }
+      lineLength += chunk.length - lineStart
+      if (!overlong) {
+        lineText += chunk.slice(lineStart)
+        if (lineText.length > MAX_LINE_LENGTH) {
+          // Too long to keep (minified): entries on it go out without their line
+          endLine("")
+          overlong = true
+        }
+      }
+    },
+    end() {
+      endLine("")
+      state = "value"
+    },
+  }
+}
+
+/**
+ * The entries a key rule judged, by line; the assignment regexes leave matches on them alone
+ */
+export class JudgedEntries {
+  // Per 0-based line, the judged column ranges as flat start/end pairs
+  private spans = new Map<number, number[]>()
+
+  add(entry: KeyValue): void {
+    let spans = this.spans.get(entry.line)
+    if (!spans) {
+      spans = []
+      this.spans.set(entry.line, spans)
+    }
+    spans.push(entry.start ?? 0, entry.end ?? Infinity)
+  }
+
+  /**
+   * Whether columns [start, end) of a 0-based line overlap a judged entry
+   */
+  covers(line: number, start: number, end: number): boolean {
+    const spans = this.spans.get(line)
+    if (!spans) {
+      return false
+    }
+    for (let k = 0; k < spans.length; k += 2) {
+      if (start < spans[k + 1] && end > spans[k]) {
+        return true
+      }
+    }
+    return false
+  }
+}
+
+/**
+ * Reader that turns a structured document, fed in any number of pieces, into key/value entries
+ */
+export function createKeyValueReader(format: StructuredFormat, onEntry: (entry: KeyValue) => void): KeyValueReader {
+  switch (format) {
+    case "json":
+      return createJsonReader(onEntry)
+    case "yaml":
+      return createYamlReader(onEntry)
+    case "env":
+      return createEnvReader(onEntry)
+  }
+}
@@ -0,0 +1,179 @@
+/**
+ * Bounded-concurrency directory walker
+ * Keeps up to N filesystem operations in flight instead of awaiting one entry at a time
+ */
+
+import { readdir, stat } from "fs/promises"
+import { join } from "path"
+import { IgnoreRules, isIgnored } from "./ignore"
+
+// Default number of file reads kept in flight during a scan
+export const DEFAULT_SCAN_CONCURRENCY = 16
+
+export interface WalkOptions {
+  concurrency?: number
+  // Return true to skip descending into a directory (receives the directory name)
+  skipDirectory?: (name: string) => boolean
+  // Ignore files (.gitignore syntax) read from each directory; matching files and directories are skipped
+  ignoreFiles?: string[]
+}
+
+/**
+ * Create a limiter that runs at most `concurrency` tasks at once; extra tasks wait in a FIFO queue
+ */
+export function createLimiter(concurrency: number): <T>(task: () => Promise<T>) => Promise<T> {
+  let active = 0
+  const waiting: (() => void)[] = []
+
+  const acquire = (): Promise<void> => {
+    if (active < concurrency) {
+      active++
+      return Promise.resolve()
+    }
+    return new Promise<void>((resolve) => waiting.push(resolve))
+  }
+
+  // Hand the slot straight to the next waiter so a new caller can't jump the queue
+  const release = (): void => {
+    const next = waiting.shift()
+    if (next) {
+      next()
+    } else {
+      active--
+    }
+  }
+
+  return async <T>(task: () => Promise<T>): Promise<T> => {
+    await acquire()
+    try {
+      return await task()
+    } finally {
+      release()
+    }
+  }
+}
+
+/**
+ * Walk a directory tree and call `visit` for every file.
+ * Directory listings and visits share one limiter, so the whole walk never has more
+ * than `concurrency` operations in flight; visit order is not deterministic.
+ */
+export async function walkFiles(
+  root: string,
+  options: WalkOptions,
+  visit: (filePath: string, name: string) => Promise<void>
+): Promise<void> {
+  const limit = createLimiter(Math.max(1, options.concurrency ?? DEFAULT_SCAN_CONCURRENCY))
+
+  const ignoreFiles = options.ignoreFiles ?? []
+
+  // `relativeDir` is the directory's path from the root ("" for the root), `/`-separated
+  const walkDirectory = async (dirPath: string, relativeDir: string, ignores: IgnoreRules[]): Promise<void> => {
+    let entries
+    try {
+      entries = await limit(() => readdir(dirPath, { withFileTypes: true }))
+    } catch {
+      // Could be permission issue, skip
+      return
+    }
+
+    // Only read the ignore files the listing shows, so directories without one cost nothing extra
+    const present = ignoreFiles.filter((name) => entries.some((entry) => entry.name === name && entry.isFile()))
+    if (present.length > 0) {
+      const rules = await limit(() => IgnoreRules.load(dirPath, relativeDir, present))
+      if (rules) {
+        ignores = [...ignores, rules]
+      }
+    }
+
+    const tasks: Promise<void>[] = []
+    for (const entry of entries) {
+      const fullPath = join(dirPath, entry.name)
+      const relativePath = relativeDir ? `${relativeDir}/${entry.name}` : entry.name
+      const isDirectory = entry.isDirectory()
+      if (ignores.length > 0 && isIgnored(ignores, relativePath, isDirectory)) {
+        continue
+      }
+      if (isDirectory) {
+        if (!options.skipDirectory?.(entry.name)) {
+          tasks.push(walkDirectory(fullPath, relativePath, ignores))
+        }
+      } else {
+        tasks.push(limit(() => visit(fullPath, entry.name)))
+      }
+    }
+    await Promise.all(tasks)
+  }
+
+  await walkDirectory(root, "", [])
+}
+
+/**
+ * Visit a known list of files (paths relative to `root`, `/`-separated, e.g. from `git ls-files`)
+ * under the same limiter and filters as `walkFiles`. Ignore files are taken from the list itself;
+ * entries that are no longer regular files (removed, submodules) are skipped.
+ */
+export async function walkFileList(
+  root: string,
+  files: string[],
+  options: WalkOptions,
+  visit: (filePath: string, name: string) => Promise<void>
+): Promise<void> {
+  const limit = createLimiter(Math.max(1, options.concurrency ?? DEFAULT_SCAN_CONCURRENCY))
+  const ignoreFiles = options.ignoreFiles ?? []
+
+  // Ignore files found in the list, grouped by directory and ordered from the root down
+  const ruleFiles = new Map<string, string[]>()
+  for (const file of files) {
+    const slash = file.lastIndexOf("/")
+    const name = file.slice(slash + 1)
+    if (ignoreFiles.includes(name)) {
+      const dir = slash === -1 ? "" : file.slice(0, slash)
+      ruleFiles.set(dir, [...(ruleFiles.get(dir) ?? []), name])
+    }
+  }
+  const depth = (dir: string) => (dir ? dir.split("/").length : 0)
+  const directories = [...ruleFiles.keys()].sort((a, b) => depth(a) - depth(b))
+  const loaded = await Promise.all(
+    directories.map((dir) => limit(() => IgnoreRules.load(join(root, dir), dir, ruleFiles.get(dir)!)))
+  )
+  const ignores = loaded.filter((rules): rules is IgnoreRules => rules !== null)
+
+  // Whether a directory (or any directory above it) is excluded, memoized per path
+  const excludedDirectories = new Map<string, boolean>()
+  const isExcludedDirectory = (dir: string): boolean => {
+    let excluded = excludedDirectories.get(dir)
+    if (excluded === undefined) {
+      const slash = dir.lastIndexOf("/")
+      const name = dir.slice(slash + 1)
+      excluded =
+        (slash !== -1 && isExcludedDirectory(dir.slice(0, slash))) ||
+        !!options.skipDirectory?.(name) ||
+        (ignores.length > 0 && isIgnored(ignores, dir, true))
+      excludedDirectories.set(dir, excluded)
+    }
+    return excluded
+  }
+
+  const tasks: Promise<void>[] = []
+  for (const file of files) {
+    const slash = file.lastIndexOf("/")
+    if (slash !== -1 && isExcludedDirectory(file.slice(0, slash))) {
+      continue
+    }
+    if (ignores.length > 0 && isIgnored(ignores, file, false)) {
+      continue
+    }
+    const fullPath = join(root, file)
+    const name = file.slice(slash + 1)
+    tasks.push(
+      limit(async () => {
+        const fileStat = await stat(fullPath).catch(() => null)
+        if (fileStat?.isFile()) {
+          await visit(fullPath, name)
+        }
+      })
+    )
+  }
+  await Promise.all(tasks)
+}
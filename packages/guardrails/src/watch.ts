@@ -0,0 +1,397 @@
+/**
+ * Watch mode
+ * One full scan, then only the files a recursive fs watcher reports are read and matched again.
+ * The compiled policy and every file's findings stay in memory, and each rescan comes back as
+ * the findings it added and cleared.
+ */
+
+import { watch, type FSWatcher } from "fs"
+import { stat } from "fs/promises"
+import { dirname, join, resolve, sep } from "path"
+import { DEFAULT_PATTERNS } from "./patterns"
+import { getCompiledPolicy } from "./compiled"
+import { listGitIgnored, listGitTracked } from "./git-files"
+import { IGNORE_FILES, IgnoreRules, OTC_IGNORE_FILE, isIgnored } from "./ignore"
+import { RegexSandbox } from "./regex-sandbox"
+import { createLimiter, DEFAULT_SCAN_CONCURRENCY } from "./walker"
+import type { QualityFinding } from "./quality"
+import {
+  readAndScanFile,
+  scan,
+  shouldScanFile,
+  shouldSkipDirectory,
+  type DetectionResult,
+  type ScanOptions,
+  type ScanSummary,
+} from "./scanner"
+
+// Quiet period after the last change before rescanning (saves arrive as several events)
+export const WATCH_DEBOUNCE_MS = 100
+
+export interface WatchOptions extends ScanOptions {
+  debounceMs?: number
+  // Called after every rescan
+  onRescan?: (result: RescanResult) => void
+  // Called when the fs watcher fails (watching has stopped)
+  onError?: (error: Error) => void
+}
+
+/**
+ * What changed in one file's findings
+ */
+export interface FindingsDelta {
+  // Path relative to the watched directory
+  file: string
+  added: DetectionResult[]
+  cleared: DetectionResult[]
+  qualityAdded: QualityFinding[]
+  qualityCleared: QualityFinding[]
+}
+
+export interface RescanResult {
+  // Files read and matched again
+  files: number
+  // Files whose findings changed
+  deltas: FindingsDelta[]
+  elapsedMs: number
+  // An ignore file changed, so the whole tree was scanned again
+  full: boolean
+}
+
+export interface FileFindings {
+  detections: DetectionResult[]
+  quality: QualityFinding[]
+}
+
+/**
+ * Findings in `after` but not `before` and the other way round, matched by key regardless of
+ * line so findings that only moved are not reported; among equal keys, ones whose line changed
+ * are reported first
+ */
+function diffFindings<T extends { line: number }>(
+  before: T[],
+  after: T[],
+  keyOf: (finding: T) => string
+): { added: T[]; cleared: T[] } {
+  const group = (findings: T[]) => {
+    const groups = new Map<string, T[]>()
+    for (const finding of findings) {
+      const key = keyOf(finding)
+      groups.set(key, [...(groups.get(key) ?? []), finding])
+    }
+    return groups
+  }
+  const surplus = (mine: T[], theirs: T[] | undefined): T[] => {
+    const extra = mine.length - (theirs?.length ?? 0)
+    if (extra <= 0) {
+      return []
+    }
+    const lines = new Set(theirs?.map((finding) => finding.line))
+    const moved = mine.filter((finding) => !lines.has(finding.line))
+    const stayed = mine.filter((finding) => lines.has(finding.line))
+    return [...moved, ...stayed].slice(0, extra)
+  }
+
+  const beforeGroups = group(before)
+  const afterGroups = group(after)
+  const added: T[] = []
+  const cleared: T[] = []
+  for (const [key, findings] of afterGroups) {
+    added.push(...surplus(findings, beforeGroups.get(key)))
+  }
+  for (const [key, findings] of beforeGroups) {
+    cleared.push(...surplus(findings, afterGroups.get(key)))
+  }
+  return { added, cleared }
+}
+
+const detectionKey = (detection: DetectionResult) => `${detection.patternId}\0${detection.matchHash}`
+const qualityKey = (finding: QualityFinding) => `${finding.ruleId}\0${finding.match}`
+
+/**
+ * Scans a directory once, then keeps its findings current as files change
+ */
+export class ScanWatcher {
+  // Directory being watched (the scan target)
+  readonly root: string
+  private options: WatchOptions
+  private findings = new Map<string, FileFindings>()
+  // Paths reported by the watcher since the last rescan, relative to `root`
+  private changed = new Set<string>()
+  private watcher: FSWatcher | null = null
+  private timer: ReturnType<typeof setTimeout> | null = null
+  private running: Promise<void> | null = null
+  private fileSource: ScanSummary["fileSource"]
+  // Ignore rules of each directory, loaded on first use
+  private ignoreRules = new Map<string, Promise<IgnoreRules | null>>()
+  // Created here rather than per scan, so stopped patterns stay stopped across rescans
+  private ownSandbox: RegexSandbox | undefined
+
+  constructor(root: string, options: WatchOptions = {}) {
+    this.root = root
+    const policy = options.policy || getCompiledPolicy(options.patterns || DEFAULT_PATTERNS)
+    let sandbox = options.sandbox
+    if (!sandbox && policy.patterns.some((compiled) => compiled.guarded)) {
+      sandbox = this.ownSandbox = new RegexSandbox(policy)
+    }
+    this.options = { ...options, policy, sandbox, basePath: root, collectDetections: true }
+  }
+
+  /**
+   * Full scan of the directory; its findings become the state later rescans are compared to
+   */
+  async scanAll(): Promise<ScanSummary> {
+    const { onDetection: _onDetection, onQualityFinding: _onQualityFinding, ...options } = this.options
+    const summary = await scan(this.root, options)
+    this.fileSource = summary.fileSource
+    this.findings = new Map()
+    const entry = (file: string): FileFindings => {
+      let findings = this.findings.get(file)
+      if (!findings) {
+        findings = { detections: [], quality: [] }
+        this.findings.set(file, findings)
+      }
+      return findings
+    }
+    for (const detection of summary.detections) {
+      entry(detection.file).detections.push(detection)
+    }
+    for (const finding of summary.quality) {
+      entry(finding.file).quality.push(finding)
+    }
+    return summary
+  }
+
+  /**
+   * Current findings across the directory
+   */
+  current(): FileFindings {
+    const current: FileFindings = { detections: [], quality: [] }
+    for (const findings of this.findings.values()) {
+      current.detections.push(...findings.detections)
+      current.quality.push(...findings.quality)
+    }
+    return current
+  }
+
+  /**
+   * Start watching the directory recursively; changes are rescanned after a quiet period
+   */
+  watch(): void {
+    if (this.watcher) {
+      return
+    }
+    this.watcher = watch(this.root, { recursive: true }, (_event, filename) => {
+      if (!filename) {
+        return
+      }
+      const path = filename.toString().split(sep).join("/")
+      if (!path.split("/").slice(0, -1).some((name) => shouldSkipDirectory(name, this.options.excludePaths))) {
+        this.changed.add(path)
+        this.scheduleRescan()
+      }
+    })
+    this.watcher.on("error", (error) => {
+      this.watcher?.close()
+      this.watcher = null
+      this.options.onError?.(error)
+    })
+  }
+
+  /**
+   * Rescan whatever has changed now, without waiting for the debounce
+   */
+  flush(): Promise<void> {
+    if (this.running) {
+      return this.running
+    }
+    this.running = (async () => {
+      try {
+        // Changes that arrive during a rescan are picked up by the next round
+        while (this.changed.size > 0) {
+          const paths = [...this.changed]
+          this.changed.clear()
+          const result = await this.rescan(paths)
+          this.options.onRescan?.(result)
+        }
+      } finally {
+        this.running = null
+      }
+    })()
+    return this.running
+  }
+
+  /**
+   * Read and match the given files again (paths relative to `root`) and report what changed.
+   * A changed ignore file rescans the whole tree, since it can change which files are scanned.
+   */
+  async rescan(paths: string[]): Promise<RescanResult> {
+    const start = performance.now()
+    if (paths.some((path) => IGNORE_FILES.includes(path.slice(path.lastIndexOf("/") + 1)))) {
+      this.ignoreRules.clear()
+      const before = this.findings
+      const summary = await this.scanAll()
+      const files = new Set([...before.keys(), ...this.findings.keys()])
+      const deltas = [...files].flatMap((file) => this.delta(file, before.get(file), this.findings.get(file)))
+      return { files: summary.filesScanned, deltas, elapsedMs: performance.now() - start, full: true }
+    }
+
+    paths = await this.withFilesUnder(paths)
+    const scannable = await this.scannable(paths)
+    const limit = createLimiter(Math.max(1, this.options.concurrency ?? DEFAULT_SCAN_CONCURRENCY))
+    let files = 0
+    const deltas = await Promise.all(
+      paths.map((path) =>
+        limit(async () => {
+          const filePath = join(this.root, path)
+          let after: FileFindings | undefined
+          if (scannable.has(path) && (await stat(filePath).catch(() => null))?.isFile()) {
+            files++
+            after = await this.scanFile(path, filePath)
+          }
+          const before = this.findings.get(path)
+          if (after && (after.detections.length > 0 || after.quality.length > 0)) {
+            this.findings.set(path, after)
+          } else {
+            this.findings.delete(path)
+          }
+          return this.delta(path, before, after)
+        })
+      )
+    )
+    return { files, deltas: deltas.flat(), elapsedMs: performance.now() - start, full: false }
+  }
+
+  async close(): Promise<void> {
+    if (this.timer) {
+      clearTimeout(this.timer)
+      this.timer = null
+    }
+    this.watcher?.close()
+    this.watcher = null
+    await this.running
+    await this.ownSandbox?.close()
+  }
+
+  private scheduleRescan(): void {
+    if (this.timer) {
+      clearTimeout(this.timer)
+    }
+    this.timer = setTimeout(() => {
+      this.timer = null
+      void this.flush()
+    }, this.options.debounceMs ?? WATCH_DEBOUNCE_MS)
+  }
+
+  /**
+   * Findings of one file, filtered by the baseline as a scan would
+   */
+  private async scanFile(path: string, filePath: string): Promise<FileFindings> {
+    const result = await readAndScanFile({ filePath, relativePath: path }, this.options)
+    const { baseline } = this.options
+    return {
+      detections: baseline ? result.detections.filter((d) => !baseline.has(d, filePath)) : result.detections,
+      quality: result.quality ?? [],
+    }
+  }
+
+  private delta(file: string, before: FileFindings | undefined, after: FileFindings | undefined): FindingsDelta[] {
+    const detections = diffFindings(before?.detections ?? [], after?.detections ?? [], detectionKey)
+    const quality = diffFindings(before?.quality ?? [], after?.quality ?? [], qualityKey)
+    const changed =
+      detections.added.length + detections.cleared.length + quality.added.length + quality.cleared.length > 0
+    if (!changed) {
+      return []
+    }
+    return [
+      {
+        file,
+        added: detections.added,
+        cleared: detections.cleared,
+        qualityAdded: quality.added,
+        qualityCleared: quality.cleared,
+      },
+    ]
+  }
+
+  /**
+   * Which changed paths a directory scan would visit: same extension, directory and ignore
+   * filters, and with git listing, not ignored by git (and tracked, unless untracked files are scanned)
+   */
+  /**
+   * The paths plus every file with findings under those that are now missing or directories.
+   * A deleted or renamed directory is reported as the directory alone, so its files' findings
+   * would otherwise stay; those files are rechecked and cleared if they are gone.
+   */
+  private async withFilesUnder(paths: string[]): Promise<string[]> {
+    const expanded = new Set(paths)
+    for (const path of paths) {
+      const stats = await stat(join(this.root, path)).catch(() => null)
+      if (stats && !stats.isDirectory()) {
+        continue
+      }
+      for (const file of this.findings.keys()) {
+        if (file.startsWith(`${path}/`)) {
+          expanded.add(file)
+        }
+      }
+    }
+    return [...expanded]
+  }
+
+  private async scannable(paths: string[]): Promise<Set<string>> {
+    const { options } = this
+    const cacheDir = options.cache && resolve(dirname(options.cache.path))
+    const candidates: string[] = []
+    for (const path of paths) {
+      const name = path.slice(path.lastIndexOf("/") + 1)
+      if (!shouldScanFile(name, options.excludeExtensions)) {
+        continue
+      }
+      // Never scan the cache directory itself (the index holds match excerpts)
+      if (cacheDir && dirname(resolve(this.root, path)) === cacheDir) {
+        continue
+      }
+      if (await this.isIgnored(path)) {
+        continue
+      }
+      candidates.push(path)
+    }
+    if (this.fileSource !== "git") {
+      return new Set(candidates)
+    }
+    if (options.untracked === false) {
+      return (await listGitTracked(this.root, candidates)) ?? new Set()
+    }
+    const ignored = (await listGitIgnored(this.root, candidates)) ?? new Set()
+    return new Set(candidates.filter((path) => !ignored.has(path)))
+  }
+
+  /**
+   * Whether the ignore files of the path's directories exclude it (.otcignore only when git
+   * lists the files, as in a directory scan)
+   */
+  private async isIgnored(path: string): Promise<boolean> {
+    const names = this.fileSource === "git" ? [OTC_IGNORE_FILE] : IGNORE_FILES
+    const segments = path.split("/")
+    const stack: IgnoreRules[] = []
+    for (let depth = 0; depth < segments.length; depth++) {
+      const dir = segments.slice(0, depth).join("/")
+      let rules = this.ignoreRules.get(dir)
+      if (!rules) {
+        rules = IgnoreRules.load(join(this.root, dir), dir, names)
+        this.ignoreRules.set(dir, rules)
+      }
+      const loaded = await rules
+      if (loaded) {
+        stack.push(loaded)
+      }
+      // A directory excluded by rules above it hides everything inside
+      const next = segments.slice(0, depth + 1).join("/")
+      if (depth < segments.length - 1 && stack.length > 0 && isIgnored(stack, next, true)) {
+        return true
+      }
+    }
+    return stack.length > 0 && isIgnored(stack, path, false)
+  }
+}
@@ -0,0 +1,23 @@
+import { describe, expect, test } from "bun:test"
+import { getCompiledPolicy } from "../src/compiled"
+import type { PolicyPattern } from "../src/policy"
+
+// A fresh array each call, as a reloaded policies.yaml would give
+const edit = (n: number): PolicyPattern[] => [{ name: "Team Token", regex: `tok${n}_[a-z]{8}`, confidence: "high" }]
+
+describe("getCompiledPolicy", () => {
+  test("compiles an identical pattern list once", () => {
+    expect(getCompiledPolicy(edit(0))).toBe(getCompiledPolicy(edit(0)))
+  })
+
+  test("keeps only the recently used policies across many edits", () => {
+    const first = getCompiledPolicy(edit(1))
+    const recent = getCompiledPolicy(edit(2))
+    for (let n = 3; n < 40; n++) {
+      getCompiledPolicy(edit(n))
+      // Used on every edit, so it stays
+      expect(getCompiledPolicy(edit(2))).toBe(recent)
+    }
+    expect(getCompiledPolicy(edit(1))).not.toBe(first)
+  })
+})
@@ -0,0 +1,93 @@
+import { describe, expect, test } from "bun:test"
+import { getCompiledPolicy } from "../src/compiled"
+import { LineIndex } from "../src/line-index"
+import { ScanProfiler } from "../src/profile"
+import { detectSecrets } from "../src/scanner"
+
+describe("LineIndex", () => {
+  test("maps offsets to 0-based lines", () => {
+    const content = "ab\ncd\n\nef"
+    const index = new LineIndex(content)
+    expect(index.lineCount).toBe(4)
+    expect([0, 1, 2, 3, 4, 5, 6, 7, 8].map((offset) => index.lineOf(offset))).toEqual([0, 0, 0, 1, 1, 1, 2, 3, 3])
+    // Past the end still belongs to the last line
+    expect(index.lineOf(content.length)).toBe(3)
+  })
+
+  test("gives line bounds and text without the newline", () => {
+    const content = "ab\ncd\n\nef"
+    const index = new LineIndex(content)
+    expect([0, 1, 2, 3].map((line) => index.lineText(content, line))).toEqual(["ab", "cd", "", "ef"])
+    expect(index.lineStart(1)).toBe(3)
+    expect(index.lineEnd(1)).toBe(5)
+    expect(index.lineStart(4)).toBe(content.length)
+  })
+
+  test("ends CRLF lines before the carriage return", () => {
+    const content = "ab\r\n\r\ncd\r\nlast\r"
+    const index = new LineIndex(content)
+    expect(index.lineCount).toBe(4)
+    expect([0, 1, 2, 3].map((line) => index.lineText(content, line))).toEqual(["ab", "", "cd", "last\r"])
+    expect(index.lineOf(content.indexOf("cd"))).toBe(2)
+  })
+
+  test("counts a trailing newline as starting an empty line", () => {
+    const content = "one\ntwo\n"
+    const index = new LineIndex(content)
+    expect(index.lineCount).toBe(3)
+    expect(index.lineText(content, 2)).toBe("")
+  })
+})
+
+describe("whole-buffer matching", () => {
+  // No literal anchor, so it runs over the whole buffer; `$` is multiline there
+  const policy = getCompiledPolicy([
+    { name: "Tail", regex: "(?:ab\\d|zz[^;]*$)", confidence: "medium", falsePositiveIndicators: ["ab2"] },
+  ])
+
+  test("reports what matching each line on its own would", () => {
+    const content = "zzfoo\nab1 zzbar\nnothing\nlast zzq"
+    const found = detectSecrets(content, "a.txt", { policy })
+    expect(found.map((d) => [d.line, d.match])).toEqual([
+      [1, "zzfoo"],
+      [2, "ab1"],
+      [2, "zzbar"],
+      [4, "zzq"],
+    ])
+  })
+
+  test("leaves the carriage return of CRLF lines out of matches", () => {
+    const content = "zzfoo\r\nab1 zzbar\r\nlast zzq"
+    const found = detectSecrets(content, "a.txt", { policy })
+    expect(found.map((d) => [d.line, d.match])).toEqual([
+      [1, "zzfoo"],
+      [2, "ab1"],
+      [2, "zzbar"],
+      [3, "zzq"],
+    ])
+    expect(detectSecrets(content.replace(/\r/g, ""), "a.txt", { policy }).map((d) => d.matchHash)).toEqual(
+      found.map((d) => d.matchHash)
+    )
+  })
+
+  test("gives multiline matches the line they end on", () => {
+    const pem = getCompiledPolicy([
+      { name: "Pem", regex: "-----BEGIN KEY-----[\\s\\S]*?-----END KEY-----", confidence: "high", multiline: true },
+    ])
+    const content = "x\n-----BEGIN KEY-----\nabc\n-----END KEY-----\n-----BEGIN KEY----- -----END KEY-----\n"
+    const found = detectSecrets(content, "a.pem", { policy: pem })
+    expect(found.map((d) => [d.line, d.endLine])).toEqual([
+      [2, 4],
+      [5, undefined],
+    ])
+  })
+
+  test("counts a redone line's matches once when profiling", () => {
+    const profiler = new ScanProfiler(policy)
+    const found = detectSecrets("ab1 ab2 zzfoo\r\nzzbar\r\nlast zzq", "a.txt", { policy, profiler })
+    expect(found.map((d) => d.line)).toEqual([2, 3])
+    const [stats] = profiler.patterns
+    expect(stats.matches).toBe(5)
+    expect(stats.suppressedByIndicators).toBe(3)
+  })
+})
@@ -0,0 +1,153 @@
+import { describe, expect, test } from "bun:test"
+import { detectSecrets } from "../src/scanner"
+import {
+  createKeyValueReader,
+  isPlaceholderValue,
+  normalizeKey,
+  structuredFormat,
+  type KeyValue,
+  type StructuredFormat,
+} from "../src/structured"
+
+/**
+ * Entries a reader finds in a document fed in pieces of `size` characters
+ */
+function read(format: StructuredFormat, text: string, size = text.length): KeyValue[] {
+  const entries: KeyValue[] = []
+  const reader = createKeyValueReader(format, (entry) => entries.push(entry))
+  for (let i = 0; i < text.length; i += size) {
+    reader.write(text.slice(i, i + size))
+  }
+  reader.end()
+  return entries
+}
+
+const summarize = (text: string, filename: string) =>
+  detectSecrets(text, filename).map((d) => [d.line, d.patternId, d.match])
+
+describe("structuredFormat", () => {
+  test("recognizes JSON, YAML and .env files by name", () => {
+    expect(["a.json", "b.yaml", "c.YML", ".env", ".env.local", "prod.env", "a.ts"].map(structuredFormat)).toEqual([
+      "json",
+      "yaml",
+      "yaml",
+      "env",
+      "env",
+      "env",
+      null,
+    ])
+  })
+
+  test("normalizes keys and spots placeholders", () => {
+    expect(normalizeKey("Client_Secret")).toBe("clientsecret")
+    expect(normalizeKey("api-key")).toBe("apikey")
+    expect(["${TOKEN}", "$TOKEN", "{{ token }}", "<your-key>", "process.env.TOKEN"].every(isPlaceholderValue)).toBe(true)
+    expect(isPlaceholderValue("s3cr3t-value")).toBe(false)
+  })
+})
+
+describe("JSON reader", () => {
+  const json = [
+    "{",
+    '  "db": { "password": "hunter2hunter2", "port": 5432 },',
+    '  // comment with "quotes": "ignored"',
+    '  "list": ["not", "pairs"],',
+    '  "escaped\\"key": "a\\"b\\\\c", "next": "x" /* inline */',
+    "}",
+  ].join("\n")
+
+  test("reports string values with their key, line, columns and source line", () => {
+    const db = '  "db": { "password": "hunter2hunter2", "port": 5432 },'
+    const escaped = '  "escaped\\"key": "a\\"b\\\\c", "next": "x" /* inline */'
+    expect(read("json", json)).toEqual([
+      { key: "password", value: "hunter2hunter2", line: 1, start: 10, end: 38, text: db },
+      { key: 'escaped"key', value: 'a"b\\c', line: 4, start: 2, end: 27, text: escaped },
+      { key: "next", value: "x", line: 4, start: 29, end: 40, text: escaped },
+    ])
+  })
+
+  test("gives the same entries however the document is split", () => {
+    const whole = read("json", json)
+    for (const size of [1, 2, 3, 7, 16]) {
+      expect(read("json", json, size)).toEqual(whole)
+    }
+  })
+
+  test("leaves the carriage return out of the source line", () => {
+    expect(read("json", '{"token": "abc"}\r\n').map((entry) => entry.text)).toEqual(['{"token": "abc"}'])
+  })
+})
+
+describe("YAML reader", () => {
+  test("reads plain, quoted and list-item scalars, but not block scalars or anchors", () => {
+    const yaml = [
+      "db:",
+      "  password: hunter2hunter2 # comment",
+      '  "api key": \'quoted value\'',
+      "  - token: listed",
+      "script: |",
+      "  echo hi",
+      "anchor: &ref value",
+      "url: http://host:80/path",
+    ].join("\r\n")
+    expect(read("yaml", yaml, 5).map(({ key, value, line }) => [key, value, line])).toEqual([
+      ["password", "hunter2hunter2", 1],
+      ["api key", "quoted value", 2],
+      ["token", "listed", 3],
+      ["url", "http://host:80/path", 7],
+    ])
+    expect(read("yaml", yaml)[0].text).toBe("  password: hunter2hunter2 # comment")
+  })
+})
+
+describe(".env reader", () => {
+  test("reads assignments, with or without export and quotes", () => {
+    const env = ["# comment", "export API_KEY='abc def'", "PASSWORD=hunter2 # trailing", "EMPTY=", "not an entry"].join("\n")
+    expect(read("env", env, 4).map(({ key, value, line }) => [key, value, line])).toEqual([
+      ["API_KEY", "abc def", 1],
+      ["PASSWORD", "hunter2", 2],
+      ["EMPTY", "", 3],
+    ])
+  })
+})
+
+describe("structured detection", () => {
+  test("checks values against their key, including quoted JSON keys", () => {
+    const json = '{\n  "clientSecret": "Zm9vYmFyYmF6cXV4cXV1eA",\n  "apiKey": "${API_KEY}"\n}\n'
+    expect(summarize(json, "config.json")).toEqual([[2, "generic-secret-assignment", "clientSecret: Zm9vYmFyYmF6cXV4cXV1eA"]])
+  })
+
+  test("still runs the assignment regexes on lines no key rule judged", () => {
+    const yaml = [
+      "deploy:",
+      "  script: |",
+      '    export API_KEY="abcdefghijklmnopqrstuvwxyz123456"',
+      "  password: hunter2hunter2",
+    ].join("\n")
+    expect(summarize(yaml, "ci.yml")).toEqual([
+      [3, "generic-api-key-assignment", 'API_KEY="abcdefghijklmnopqrstuvwxyz12...'],
+      [4, "password-assignment", "password: hunter2hunter2"],
+    ])
+
+    const json = '{\n  "scripts": { "deploy": "password=\'s3cr3tpassw0rd\' ./deploy.sh" }\n}\n'
+    expect(summarize(json, "package.json")).toEqual([[2, "password-assignment", "password='s3cr3tpassw0rd'"]])
+  })
+
+  test("does not report a line twice when its key rule already judged it", () => {
+    expect(summarize('password: "hunter2hunter2"', "a.yaml")).toEqual([
+      [1, "password-assignment", "password: hunter2hunter2"],
+    ])
+    // The key rule saw a placeholder; the assignment regex must not report it instead
+    expect(summarize('password: "<your-password>"', "a.yaml")).toEqual([])
+  })
+
+  test("keeps running the assignment regexes on the rest of a minified line", () => {
+    const json = '{"apiKey":"${API_KEY}","deploy":"password=\'s3cr3tpassw0rd\' ./run.sh","password":"<set-me>"}'
+    expect(summarize(json, "app.json")).toEqual([[1, "password-assignment", "password='s3cr3tpassw0rd'"]])
+  })
+
+  test("looks for false-positive terms on the real source line", () => {
+    expect(summarize('{"password": "hunter2hunter2", "note": "test fixture"}', "a.json")).toEqual([])
+    expect(summarize("password: hunter2hunter2 # example only", "a.yaml")).toEqual([])
+  })
+})
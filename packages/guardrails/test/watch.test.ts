@@ -0,0 +1,44 @@
+import { afterAll, describe, expect, test } from "bun:test"
+import { mkdirSync, mkdtempSync, renameSync, rmSync, writeFileSync } from "fs"
+import { tmpdir } from "os"
+import { dirname, join } from "path"
+import { ScanWatcher } from "../src/watch"
+
+describe("ScanWatcher.rescan", () => {
+  const root = mkdtempSync(join(tmpdir(), "otc-watch-"))
+  const write = (path: string, key: string) => {
+    mkdirSync(dirname(join(root, path)), { recursive: true })
+    writeFileSync(join(root, path), `k = "AKIA${key.repeat(16)}"\n`)
+  }
+  const files = (watcher: ScanWatcher) => watcher.current().detections.map((d) => d.file).sort()
+
+  afterAll(() => {
+    rmSync(root, { recursive: true, force: true })
+  })
+
+  test("clears the findings of every file under a renamed or deleted directory", async () => {
+    write("lib/a.py", "A")
+    write("lib/deep/b.py", "B")
+    write("libx.py", "C")
+    const watcher = new ScanWatcher(root, { git: false })
+    await watcher.scanAll()
+    expect(files(watcher)).toEqual(["lib/a.py", "lib/deep/b.py", "libx.py"])
+
+    // The watcher reports a renamed directory by its old name only
+    renameSync(join(root, "lib"), join(root, "moved"))
+    const renamed = await watcher.rescan(["lib"])
+    expect(renamed.deltas.map((d) => [d.file, d.cleared.length]).sort()).toEqual([
+      ["lib/a.py", 1],
+      ["lib/deep/b.py", 1],
+    ])
+    expect(files(watcher)).toEqual(["libx.py"])
+
+    await watcher.scanAll()
+    rmSync(join(root, "moved/deep"), { recursive: true })
+    const deleted = await watcher.rescan(["moved/deep", "moved"])
+    expect(deleted.deltas.map((d) => [d.file, d.cleared.length])).toEqual([["moved/deep/b.py", 1]])
+    // Files still under a changed directory are read again and keep their findings
+    expect(files(watcher)).toEqual(["libx.py", "moved/a.py"])
+    await watcher.close()
+  })
+})
@@ -2,7 +2,7 @@
 
 /**
  * Bundle the plugin for distribution
- * Uses esbuild to create a single-file bundle
+ * Uses esbuild to bundle the plugin entry point and the guardrail workers
  */
 
 import * as esbuild from "esbuild"
@@ -15,9 +15,15 @@ const rootDir = join(__dirname, "..")
 async function build() {
   try {
     await esbuild.build({
-      entryPoints: [join(rootDir, "src/index.ts")],
+      entryPoints: {
+        index: join(rootDir, "src/index.ts"),
+        // Loaded at runtime by the scan pool via new URL("./guardrails/scan-worker.js", import.meta.url)
+        "guardrails/scan-worker": join(rootDir, "src/guardrails/scan-worker.ts"),
+        // Loaded by the regex sandbox via new URL("./guardrails/regex-worker.js", import.meta.url)
+        "guardrails/regex-worker": join(rootDir, "src/guardrails/regex-worker.ts"),
+      },
       bundle: true,
-      outfile: join(rootDir, "dist/index.js"),
+      outdir: join(rootDir, "dist"),
       platform: "node",
       target: "node20",
       format: "esm",
@@ -32,7 +38,7 @@ async function build() {
         js: "// @opencode-ai/otc-plugin - OpenTeamCode Plugin for OpenCode\n",
       },
     })
-    console.log("Build complete: dist/index.js")
+    console.log("Build complete: dist/index.js, dist/guardrails/scan-worker.js, dist/guardrails/regex-worker.js")
   } catch (error) {
     console.error("Build failed:", error)
     process.exit(1)
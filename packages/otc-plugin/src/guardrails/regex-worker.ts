@@ -0,0 +1,6 @@
+/**
+ * Regex sandbox worker bundle entry
+ * Built to dist/guardrails/regex-worker.js, where the bundled regex sandbox looks for it
+ */
+
+import "@openteamcode/guardrails/regex-worker"
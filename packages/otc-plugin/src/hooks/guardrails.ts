@@ -5,9 +5,173 @@
  * Uses the permission.ask hook to intercept write/edit tool permissions.
  */
 
+import { readFile } from "fs/promises"
 import type { Hooks } from "@opencode-ai/plugin"
 import type { OTCPluginState } from "../index"
-import { detectSecrets, DEFAULT_PATTERNS } from "../lib/scanner"
+import { matchContent, type CompiledPolicy, type DetectionResult, type RegexSandbox } from "@openteamcode/guardrails"
+import { VerdictCache } from "../lib/verdict-cache"
+
+// Lines of the file kept on each side of an edit, so multi-line patterns and YAML/JSON keys
+// still see the text around the new lines
+const EDIT_CONTEXT_LINES = 3
+
+// Checks slower than this are reported on stderr
+const SLOW_CHECK_MS = 250
+
+// Detections per checked content, shared by every hook instance in the process
+const verdicts = new VerdictCache()
+
+/**
+ * Timing of the hook's checks over the life of the process
+ */
+export interface GuardrailCheckStats {
+  checks: number
+  // Checks answered from the verdict cache
+  cached: number
+  // Checks that matched only an edit's new text and its context
+  incremental: number
+  totalMs: number
+  maxMs: number
+  lastMs: number
+}
+
+export const guardrailCheckStats: GuardrailCheckStats = {
+  checks: 0,
+  cached: 0,
+  incremental: 0,
+  totalMs: 0,
+  maxMs: 0,
+  lastMs: 0,
+}
+
+/**
+ * Text to check for one write or edit, and where its new lines sit in the file
+ */
+interface CheckTarget {
+  content: string
+  // Lines of the file before `content` starts (detection lines are shifted by this much)
+  lineOffset: number
+  // First and last line of `content` holding new text; detections wholly outside come from the context
+  firstLine: number
+  lastLine: number
+  incremental: boolean
+}
+
+/**
+ * Whole new content of a write: every line is new
+ */
+function writeTarget(content: string): CheckTarget {
+  return { content, lineOffset: 0, firstLine: 1, lastLine: Infinity, incremental: false }
+}
+
+/**
+ * An edit's new text with up to EDIT_CONTEXT_LINES lines of the current file on each side.
+ * Falls back to the new text alone when the file can't be read or the replaced text isn't in it.
+ */
+async function editTarget(filePath: string | undefined, oldString: unknown, newString: string): Promise<CheckTarget> {
+  const alone = { ...writeTarget(newString), incremental: true }
+  if (!filePath || typeof oldString !== "string" || !oldString) {
+    return alone
+  }
+  let current: string
+  try {
+    current = await readFile(filePath, "utf-8")
+  } catch {
+    return alone
+  }
+  const start = current.indexOf(oldString)
+  if (start === -1) {
+    return alone
+  }
+  const end = start + oldString.length
+
+  // Back to the start of the edited line, then EDIT_CONTEXT_LINES lines further
+  let windowStart = current.lastIndexOf("\n", start - 1) + 1
+  for (let k = 0; k < EDIT_CONTEXT_LINES && windowStart > 0; k++) {
+    windowStart = windowStart >= 2 ? current.lastIndexOf("\n", windowStart - 2) + 1 : 0
+  }
+  // On to the end of the edited line (unless the replaced text ends one), then EDIT_CONTEXT_LINES lines further
+  let windowEnd = end
+  for (let k = current[end - 1] === "\n" ? 1 : 0; k <= EDIT_CONTEXT_LINES && windowEnd < current.length; k++) {
+    const newline = current.indexOf("\n", windowEnd)
+    windowEnd = newline === -1 ? current.length : newline + 1
+  }
+
+  const before = current.slice(windowStart, start)
+  const firstLine = countLines(before)
+  return {
+    content: before + newString + current.slice(end, windowEnd),
+    lineOffset: countLines(current.slice(0, windowStart)) - 1,
+    firstLine,
+    lastLine: firstLine + countLines(newString) - 1,
+    incremental: true,
+  }
+}
+
+/**
+ * Number of lines `text` spans (one more than its newlines)
+ */
+function countLines(text: string): number {
+  let lines = 1
+  for (let i = text.indexOf("\n"); i !== -1; i = text.indexOf("\n", i + 1)) {
+    lines++
+  }
+  return lines
+}
+
+/**
+ * Detections in the new text of a write or edit, with line numbers in the file;
+ * repeated content is answered from the verdict cache
+ */
+async function checkTarget(
+  target: CheckTarget,
+  filename: string,
+  policy: CompiledPolicy,
+  sandbox: RegexSandbox | undefined
+): Promise<{ findings: DetectionResult[]; cached: boolean }> {
+  const key = VerdictCache.key(policy, filename, target.content)
+  let detections = verdicts.get(key)
+  const cached = detections !== undefined
+  if (!detections) {
+    detections = await matchContent(target.content, filename, { policy, sandbox })
+    verdicts.set(key, detections)
+  }
+  // A multiline match that starts in the context before the new text still counts if it runs into it
+  const findings = detections
+    .filter((detection) => {
+      const endLine = detection.endLine ?? detection.line
+      return endLine >= target.firstLine && detection.line <= target.lastLine
+    })
+    .map((detection) => ({
+      ...detection,
+      line: detection.line + target.lineOffset,
+      ...(detection.endLine ? { endLine: detection.endLine + target.lineOffset } : {}),
+    }))
+  return { findings, cached }
+}
+
+/**
+ * Count one check's time, and report it if it was slow
+ */
+function recordCheck(filePath: string, elapsedMs: number, target: CheckTarget, cached: boolean): void {
+  const stats = guardrailCheckStats
+  stats.checks++
+  stats.totalMs += elapsedMs
+  stats.maxMs = Math.max(stats.maxMs, elapsedMs)
+  stats.lastMs = elapsedMs
+  if (cached) {
+    stats.cached++
+  }
+  if (target.incremental) {
+    stats.incremental++
+  }
+  if (elapsedMs > SLOW_CHECK_MS) {
+    console.warn(
+      `⚠️  OTC GUARDRAIL: checking ${filePath} took ${elapsedMs.toFixed(0)}ms ` +
+        `(${target.content.length} chars${target.incremental ? ", edit" : ""})`
+    )
+  }
+}
 
 /**
  * Create the guardrails hook
@@ -17,7 +181,8 @@ export function guardrailsHook(
 ): NonNullable<Hooks["permission.ask"]> {
   return async (info, output) => {
     // Skip if guardrails are disabled
-    if (state.config?.guardrails?.enabled === false) {
+    const snapshot = state.current
+    if (snapshot.config?.guardrails?.enabled === false) {
       return
     }
 
@@ -32,27 +197,39 @@ export function guardrailsHook(
       return
     }
 
+    const checkStart = performance.now()
+    const filePath = (info.metadata?.path as string) || "file"
+
     // Get the content being written
     // The content may be in different places depending on the tool:
-    // - Write tool: metadata.content
-    // - Edit tool: metadata.new_string
-    const content =
-      (info.metadata?.content as string) ||
-      (info.metadata?.new_string as string) ||
-      ""
-
-    if (!content || typeof content !== "string") {
+    // - Write tool: metadata.content (the whole file, checked in full)
+    // - Edit tool: metadata.new_string (checked with a few lines of the file around it)
+    const content = info.metadata?.content
+    const newString = info.metadata?.new_string
+    let target: CheckTarget
+    if (content && typeof content === "string") {
+      target = writeTarget(content)
+    } else if (newString && typeof newString === "string") {
+      target = await editTarget(info.metadata?.path as string | undefined, info.metadata?.old_string, newString)
+    } else {
       return
     }
 
-    // Get patterns from policies or use defaults
-    const patterns = state.policies?.patterns?.length
-      ? state.policies.patterns
-      : DEFAULT_PATTERNS
+    // The policy is compiled when the snapshot is loaded, from policies.yaml or the defaults
+    const { policy, sandbox, baseline } = snapshot
 
     // Scan the content for secrets
     const filename = (info.metadata?.path as string) || "inline-check"
-    const findings = detectSecrets(content, filename, { patterns })
+    const stoppedBefore = sandbox?.stopped.length ?? 0
+    const checked = await checkTarget(target, filename, policy, sandbox)
+    recordCheck(filePath, performance.now() - checkStart, target, checked.cached)
+    // Findings accepted in the guardrail baseline don't block rewriting the file they are in
+    const findings = baseline ? checked.findings.filter((f) => !baseline.has(f, filePath)) : checked.findings
+
+    // A pattern that hit the match deadline stays disabled for the session; say so once
+    for (const stopped of sandbox?.stopped.slice(stoppedBefore) ?? []) {
+      console.warn(`⚠️  OTC GUARDRAIL: pattern "${stopped.id}" disabled (${stopped.reason} on ${stopped.file})`)
+    }
 
     // Only block on high confidence detections
     const highConfidenceFindings = findings.filter((f) => f.confidence === "high")
@@ -62,7 +239,6 @@ export function guardrailsHook(
       output.status = "deny"
 
       // Build detailed feedback message
-      const filePath = (info.metadata?.path as string) || "file"
       const findingsList = highConfidenceFindings
         .map((f) => `  • ${f.pattern} at line ${f.line}: ${f.match.substring(0, 40)}...`)
         .join("\n")
@@ -89,7 +265,6 @@ export function guardrailsHook(
     // This is a balance between security and usability
     const mediumConfidenceFindings = findings.filter((f) => f.confidence === "medium")
     if (mediumConfidenceFindings.length > 0 && highConfidenceFindings.length === 0) {
-      const filePath = (info.metadata?.path as string) || "file"
       const findingsList = mediumConfidenceFindings
         .map((f) => `  • ${f.pattern} at line ${f.line}: ${f.match.substring(0, 40)}...`)
         .join("\n")
@@ -3,54 +3,42 @@
  *
  * Injects team coding standards from .ai/standards.md into the system prompt.
  * This ensures the AI follows team conventions and best practices.
+ * Only the sections relevant to the files the session works on are injected, within
+ * the standards.maxTokens budget from config.yaml.
  */
 
 import type { Hooks } from "@opencode-ai/plugin"
 import type { OTCPluginState } from "../index"
-
-/**
- * Sanitize content to prevent prompt injection attacks.
- * Escapes patterns that could be interpreted as prompt delimiters.
- */
-function sanitizeContent(content: string): string {
-  return content
-    .replace(/<system>/gi, "&lt;system&gt;")
-    .replace(/<\/system>/gi, "&lt;/system&gt;")
-    .replace(/<user>/gi, "&lt;user&gt;")
-    .replace(/<\/user>/gi, "&lt;/user&gt;")
-    .replace(/<assistant>/gi, "&lt;assistant&gt;")
-    .replace(/<\/assistant>/gi, "&lt;/assistant&gt;")
-    .replace(/<human>/gi, "&lt;human&gt;")
-    .replace(/<\/human>/gi, "&lt;/human&gt;")
-}
+import { DEFAULT_STANDARDS_TOKENS, type SessionFiles } from "../lib/standards"
 
 /**
  * Create the standards injection hook
  */
 export function standardsHook(
-  state: OTCPluginState
+  state: OTCPluginState,
+  files: SessionFiles
 ): NonNullable<Hooks["experimental.chat.system.transform"]> {
   return async ({ sessionID }, output) => {
     // Skip if no standards configured
-    if (!state.standards) {
+    const { config, standardsSections } = state.current
+    if (!standardsSections) {
       return
     }
 
-    // Sanitize standards content to prevent prompt injection
-    const sanitizedStandards = sanitizeContent(state.standards)
-
-    // Inject standards into system prompt
-    const standardsSection = `
-## Team Standards (OpenTeamCode)
-
-The following are your team's coding standards. Follow these guidelines strictly:
-
-${sanitizedStandards}
-
----
-`
+    // Sections were sanitized when the snapshot was loaded; the prompt for this pick is cached
+    const maxTokens = config?.standards?.maxTokens ?? DEFAULT_STANDARDS_TOKENS
+    output.system.push(standardsSections.prompt(files.get(sessionID), maxTokens))
+  }
+}
 
-    // Push to the system prompt array
-    output.system.push(standardsSection)
+/**
+ * Create the hook that remembers which files each session reads and edits
+ */
+export function sessionFilesHook(files: SessionFiles): NonNullable<Hooks["tool.execute.before"]> {
+  return async ({ sessionID }, output) => {
+    const filePath = output.args?.filePath ?? output.args?.file_path
+    if (typeof filePath === "string" && filePath) {
+      files.record(sessionID, filePath)
+    }
   }
 }
@@ -11,11 +11,12 @@
 
 import type { Plugin, Hooks, PluginInput } from "@opencode-ai/plugin"
 import { tool } from "@opencode-ai/plugin"
-import { join } from "path"
+import { dirname, join } from "path"
 
-import { loadConfig, loadStandards, loadPolicies, AI_FOLDER, findAiFolder } from "./lib/config"
-import { detectSecrets, scan } from "./lib/scanner"
-import { standardsHook } from "./hooks/standards"
+import { findAiFolder } from "./lib/config"
+import { SnapshotStore, type OTCSnapshot } from "./lib/snapshot"
+import { SessionFiles } from "./lib/standards"
+import { sessionFilesHook, standardsHook } from "./hooks/standards"
 import { guardrailsHook } from "./hooks/guardrails"
 import { createPRReviewTool } from "./tools/pr-review"
 import { createPRSummarizeTool } from "./tools/pr-summarize"
@@ -23,11 +24,11 @@ import { createPRTestplanTool } from "./tools/pr-testplan"
 import { createGuardrailScanTool } from "./tools/guardrail-scan"
 import { createSessionExportTool } from "./tools/session-export"
 
+/**
+ * State handed to hooks and tools; read `current` once per call so a reload mid-call can't mix snapshots
+ */
 export interface OTCPluginState {
-  aiFolder: string | null
-  config: Awaited<ReturnType<typeof loadConfig>>
-  policies: Awaited<ReturnType<typeof loadPolicies>>
-  standards: string | null
+  readonly current: OTCSnapshot
 }
 
 /**
@@ -37,33 +38,6 @@ export const OTCPlugin: Plugin = async (input: PluginInput): Promise<Hooks> => {
   // Look for .ai/ folder in the project directory
   const aiFolder = await findAiFolder(input.directory)
 
-  // Load configuration if .ai/ folder exists
-  let config: Awaited<ReturnType<typeof loadConfig>> = null
-  let policies: Awaited<ReturnType<typeof loadPolicies>> = null
-  let standards: string | null = null
-
-  if (aiFolder) {
-    try {
-      config = await loadConfig(aiFolder)
-    } catch (e) {
-      console.warn(`[OTC] Failed to load config: ${e}`)
-    }
-
-    try {
-      policies = await loadPolicies(aiFolder)
-    } catch (e) {
-      console.warn(`[OTC] Failed to load policies: ${e}`)
-    }
-
-    try {
-      standards = await loadStandards(aiFolder)
-    } catch (e) {
-      console.warn(`[OTC] Failed to load standards: ${e}`)
-    }
-  }
-
-  const state: OTCPluginState = { aiFolder, config, policies, standards }
-
   // If no .ai/ folder, return minimal hooks
   if (!aiFolder) {
     return {
@@ -95,10 +69,19 @@ Run 'otc init' from the CLI to scaffold this structure automatically.`
     }
   }
 
+  // Load config, policies and standards, and reload them whenever the .ai/ folder changes
+  const state = await SnapshotStore.load(aiFolder)
+  state.watch()
+  // Files each session touches decide which standards sections it gets
+  const sessionFiles = new SessionFiles(dirname(aiFolder))
+
   // Full hooks when .ai/ folder is present
   return {
-    // Standards injection - adds .ai/standards.md content to system prompts
-    "experimental.chat.system.transform": standardsHook(state),
+    // Standards injection - adds the relevant .ai/standards.md sections to system prompts
+    "experimental.chat.system.transform": standardsHook(state, sessionFiles),
+
+    // Remembers the files each session reads and edits, for picking standards sections
+    "tool.execute.before": sessionFilesHook(sessionFiles),
 
     // Guardrails - blocks file writes containing secrets
     "permission.ask": guardrailsHook(state),
@@ -125,5 +108,6 @@ export default OTCPlugin
 
 // Re-export types and utilities for external use
 export { loadConfig, loadStandards, loadPolicies, AI_FOLDER } from "./lib/config"
-export { detectSecrets, scan } from "./lib/scanner"
-export type { DetectionResult, ScanSummary, ScanOptions } from "./lib/scanner"
+export { SnapshotStore, loadSnapshot, type OTCSnapshot } from "./lib/snapshot"
+export { detectSecrets, matchContent, scan, getCompiledPolicy } from "@openteamcode/guardrails"
+export type { DetectionResult, ScanSummary, ScanOptions, CompiledPolicy } from "@openteamcode/guardrails"
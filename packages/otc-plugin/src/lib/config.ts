@@ -7,6 +7,7 @@ import { readFile, access } from "fs/promises"
 import { join, resolve } from "path"
 import { parse as parseYaml } from "yaml"
 import { z } from "zod"
+import { PoliciesSchema, type Policies } from "@openteamcode/guardrails"
 
 // Schema for .ai/config.yaml
 export const ConfigSchema = z.object({
@@ -28,6 +29,16 @@ export const ConfigSchema = z.object({
     .object({
       enabled: z.boolean().default(true),
       policies: z.string().default("policies.yaml"),
+      // Worker threads for the otc:guardrail-scan tool (0 or 1 keeps matching in-process)
+      workers: z.number().int().nonnegative().optional(),
+      // Skip files larger than this many bytes (default: no limit; files over 5MB are streamed)
+      maxFileSize: z.number().int().positive().optional(),
+    })
+    .optional(),
+  standards: z
+    .object({
+      // Prompt budget for standards.md in tokens; sections for the files in play come first
+      maxTokens: z.number().int().positive().optional(),
     })
     .optional(),
   ado: z
@@ -48,24 +59,17 @@ export const ConfigSchema = z.object({
 
 export type Config = z.infer<typeof ConfigSchema>
 
-// Schema for .ai/policies.yaml
-export const PolicyPatternSchema = z.object({
-  name: z.string(),
-  regex: z.string(),
-  confidence: z.enum(["high", "medium", "low"]).default("medium"),
-  description: z.string().optional(),
-  falsePositiveIndicators: z.array(z.string()).optional(),
-})
-
-export const PoliciesSchema = z.object({
-  version: z.string().default("1"),
-  patterns: z.array(PolicyPatternSchema).default([]),
-  excludePaths: z.array(z.string()).optional(),
-  excludeExtensions: z.array(z.string()).optional(),
-})
-
-export type Policies = z.infer<typeof PoliciesSchema>
-export type PolicyPattern = z.infer<typeof PolicyPatternSchema>
+// Schema for .ai/policies.yaml (defined with the scanner)
+export {
+  PoliciesSchema,
+  PolicyPatternSchema,
+  QualityPolicySchema,
+  QualityRuleSchema,
+  type Policies,
+  type PolicyPattern,
+  type QualityPolicy,
+  type QualityRule,
+} from "@openteamcode/guardrails"
 
 export const AI_FOLDER = ".ai"
 export const CONFIG_FILE = "config.yaml"
@@ -0,0 +1,204 @@
+/**
+ * Plugin state snapshots with hot reload
+ * config.yaml, policies.yaml, standards.md and the guardrail baseline are loaded into an immutable snapshot. When a file in
+ * the .ai/ folder changes, a fresh snapshot is built after a short debounce and swapped in whole, so
+ * hooks and tools read the current one without any file I/O per call.
+ */
+
+import { watch, type FSWatcher } from "fs"
+import { dirname, join } from "path"
+import {
+  BASELINE_FILE,
+  Baseline,
+  DEFAULT_PATTERNS,
+  RegexSandbox,
+  getCompiledPolicy,
+  getQualityRules,
+  type CompiledPolicy,
+  type QualityRules,
+} from "@openteamcode/guardrails"
+import {
+  CONFIG_FILE,
+  POLICIES_FILE,
+  STANDARDS_FILE,
+  loadConfig,
+  loadPolicies,
+  loadStandards,
+  type Config,
+  type Policies,
+} from "./config"
+import { Standards } from "./standards"
+
+// Quiet period after the last change before reloading (editors write a file in several steps)
+export const RELOAD_DEBOUNCE_MS = 200
+
+// Files in .ai/ that a snapshot is built from
+const WATCHED_FILES = new Set([CONFIG_FILE, POLICIES_FILE, STANDARDS_FILE, BASELINE_FILE])
+
+export interface OTCSnapshot {
+  readonly aiFolder: string
+  readonly config: Config | null
+  readonly policies: Policies | null
+  readonly standards: string | null
+  // `standards` sanitized and split into sections, for picking what each turn injects
+  readonly standardsSections: Standards | null
+  // Guardrail policy compiled from `policies` (or the default patterns)
+  readonly policy: CompiledPolicy
+  // Runs the policy's guarded (team-supplied) patterns; its workers start on first use
+  readonly sandbox?: RegexSandbox
+  // Quality rules from `policies` (none when the section is missing or disabled)
+  readonly quality?: QualityRules
+  // Accepted findings from .ai/guardrail-baseline.json
+  readonly baseline: Baseline | null
+  // Increases with every reload
+  readonly version: number
+}
+
+/**
+ * Load, validate and compile a snapshot of the .ai/ folder. A file that fails to load keeps
+ * its value from `previous` (null at startup), with a warning.
+ */
+export async function loadSnapshot(aiFolder: string, previous?: OTCSnapshot): Promise<OTCSnapshot> {
+  const [config, policies, standards, baseline] = await Promise.all([
+    loadConfig(aiFolder).catch((e) => {
+      console.warn(`[OTC] Failed to load config: ${e}`)
+      return previous?.config ?? null
+    }),
+    loadPolicies(aiFolder).catch((e) => {
+      console.warn(`[OTC] Failed to load policies: ${e}`)
+      return previous?.policies ?? null
+    }),
+    loadStandards(aiFolder).catch((e) => {
+      console.warn(`[OTC] Failed to load standards: ${e}`)
+      return previous?.standards ?? null
+    }),
+    Baseline.load(join(aiFolder, BASELINE_FILE), dirname(aiFolder)).catch((e) => {
+      console.warn(`[OTC] Failed to load guardrail baseline: ${e}`)
+      return previous?.baseline ?? null
+    }),
+  ])
+
+  const policy = getCompiledPolicy(policies?.patterns?.length ? policies.patterns : DEFAULT_PATTERNS)
+  // An unchanged policy keeps its sandbox (and the patterns it has already stopped)
+  let sandbox = previous?.policy === policy ? previous.sandbox : undefined
+  if (!sandbox && policy.patterns.some((compiled) => compiled.guarded)) {
+    sandbox = new RegexSandbox(policy)
+  }
+
+  // Unchanged standards keep their parsed sections (and the prompts already built from them)
+  const standardsSections =
+    standards === previous?.standards ? previous.standardsSections : standards ? Standards.parse(standards) : null
+
+  return Object.freeze({
+    aiFolder,
+    config,
+    policies,
+    standards,
+    standardsSections,
+    policy,
+    sandbox,
+    quality: getQualityRules(policies?.quality),
+    baseline,
+    version: (previous?.version ?? 0) + 1,
+  })
+}
+
+/**
+ * Holds the current snapshot and replaces it when the .ai/ folder changes
+ */
+export class SnapshotStore {
+  private snapshot: OTCSnapshot
+  private watcher: FSWatcher | null = null
+  private timer: ReturnType<typeof setTimeout> | null = null
+  // Set when a change arrives during a reload, so the reload runs again once it finishes
+  private pending = false
+  private reloading: Promise<void> | null = null
+
+  constructor(snapshot: OTCSnapshot) {
+    this.snapshot = snapshot
+  }
+
+  static async load(aiFolder: string): Promise<SnapshotStore> {
+    return new SnapshotStore(await loadSnapshot(aiFolder))
+  }
+
+  /**
+   * The snapshot to use for one hook or tool call (read it once per call)
+   */
+  get current(): OTCSnapshot {
+    return this.snapshot
+  }
+
+  /**
+   * Watch the .ai/ folder and reload after changes; the watcher does not keep the process alive
+   */
+  watch(): void {
+    if (this.watcher) {
+      return
+    }
+    try {
+      this.watcher = watch(this.snapshot.aiFolder, { persistent: false }, (_event, filename) => {
+        // Some platforms leave out the file name; reload to be safe
+        if (!filename || WATCHED_FILES.has(filename.toString())) {
+          this.scheduleReload()
+        }
+      })
+      this.watcher.on("error", (e) => {
+        console.warn(`[OTC] Stopped watching ${this.snapshot.aiFolder}: ${e}`)
+        this.watcher?.close()
+        this.watcher = null
+      })
+    } catch (e) {
+      console.warn(`[OTC] Cannot watch ${this.snapshot.aiFolder} for changes: ${e}`)
+    }
+  }
+
+  /**
+   * Build a new snapshot now and swap it in
+   */
+  reload(): Promise<void> {
+    if (this.reloading) {
+      this.pending = true
+      return this.reloading
+    }
+    this.reloading = (async () => {
+      try {
+        do {
+          this.pending = false
+          const previous = this.snapshot
+          const next = await loadSnapshot(previous.aiFolder, previous)
+          this.snapshot = next
+          if (previous.sandbox && previous.sandbox !== next.sandbox) {
+            // Calls that already hold the old snapshot finish their queued matches first
+            void previous.sandbox.close()
+          }
+        } while (this.pending)
+      } finally {
+        this.reloading = null
+      }
+    })()
+    return this.reloading
+  }
+
+  async close(): Promise<void> {
+    if (this.timer) {
+      clearTimeout(this.timer)
+      this.timer = null
+    }
+    this.watcher?.close()
+    this.watcher = null
+    await this.reloading
+    await this.snapshot.sandbox?.close()
+  }
+
+  private scheduleReload(): void {
+    if (this.timer) {
+      clearTimeout(this.timer)
+    }
+    this.timer = setTimeout(() => {
+      this.timer = null
+      void this.reload()
+    }, RELOAD_DEBOUNCE_MS)
+    this.timer.unref?.()
+  }
+}
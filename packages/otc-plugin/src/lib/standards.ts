@@ -0,0 +1,245 @@
+/**
+ * Team standards, split into sections
+ * standards.md is sanitized and split at its top-level headings once per snapshot. Each chat turn then
+ * picks the sections relevant to the files the session works on, within a token budget, and the
+ * prompt text for a given pick is built once and looked up after that.
+ */
+
+import { extname, isAbsolute, relative, sep } from "path"
+import { globToRegex } from "@openteamcode/guardrails"
+
+// Prompt budget for standards when config.yaml sets none (standards.maxTokens)
+export const DEFAULT_STANDARDS_TOKENS = 4000
+
+// Files remembered per session, and sessions remembered, for picking sections
+const SESSION_FILES_LIMIT = 20
+const SESSIONS_LIMIT = 100
+
+// Prompts kept per parsed file (one per distinct pick of sections)
+const PROMPT_CACHE_LIMIT = 64
+
+// `<!-- applies-to: *.py, services/api/** -->` limits a section to matching files
+const APPLIES_TO = /<!--\s*applies-to:\s*([^>]*?)\s*-->/i
+
+// Languages recognized in section headings, and the file extensions they apply to
+const HEADING_LANGUAGES: { name: RegExp; extensions: string[] }[] = [
+  { name: /\bpython\b/i, extensions: ["py", "pyi"] },
+  { name: /\btypescript\b/i, extensions: ["ts", "tsx", "mts", "cts"] },
+  { name: /\bjavascript\b|\bnode\.?js\b/i, extensions: ["js", "jsx", "mjs", "cjs"] },
+  { name: /\breact\b/i, extensions: ["jsx", "tsx"] },
+  { name: /\bGo\b|\b[Gg]olang\b/, extensions: ["go"] },
+  { name: /\brust\b/i, extensions: ["rs"] },
+  { name: /\bjava\b/i, extensions: ["java"] },
+  { name: /\bkotlin\b/i, extensions: ["kt", "kts"] },
+  { name: /\bc#|\bcsharp\b|\.net\b/i, extensions: ["cs"] },
+  { name: /\bc\+\+|\bcpp\b/i, extensions: ["cc", "cpp", "cxx", "h", "hh", "hpp"] },
+  { name: /\bruby\b|\brails\b/i, extensions: ["rb"] },
+  { name: /\bphp\b/i, extensions: ["php"] },
+  { name: /\bswift\b/i, extensions: ["swift"] },
+  { name: /\bscala\b/i, extensions: ["scala"] },
+  { name: /\bshell\b|\bbash\b/i, extensions: ["sh", "bash", "zsh"] },
+  { name: /\bsql\b/i, extensions: ["sql"] },
+  { name: /\bterraform\b/i, extensions: ["tf", "tfvars"] },
+  { name: /\b(?:css|scss|sass)\b/i, extensions: ["css", "scss", "sass"] },
+  { name: /\bhtml\b/i, extensions: ["html", "htm"] },
+]
+
+/**
+ * Sanitize content to prevent prompt injection attacks.
+ * Escapes patterns that could be interpreted as prompt delimiters.
+ */
+export function sanitizeContent(content: string): string {
+  return content
+    .replace(/<system>/gi, "&lt;system&gt;")
+    .replace(/<\/system>/gi, "&lt;/system&gt;")
+    .replace(/<user>/gi, "&lt;user&gt;")
+    .replace(/<\/user>/gi, "&lt;/user&gt;")
+    .replace(/<assistant>/gi, "&lt;assistant&gt;")
+    .replace(/<\/assistant>/gi, "&lt;/assistant&gt;")
+    .replace(/<human>/gi, "&lt;human&gt;")
+    .replace(/<\/human>/gi, "&lt;/human&gt;")
+}
+
+/**
+ * Rough token count of prompt text (about four characters per token)
+ */
+export function estimateTokens(text: string): number {
+  return Math.ceil(text.length / 4)
+}
+
+export interface StandardsSection {
+  heading: string
+  // Sanitized text of the section, heading included
+  text: string
+  tokens: number
+  // Extensions (without the dot) and globs the section is limited to; both empty for general sections
+  extensions: Set<string>
+  globs: RegExp[]
+}
+
+/**
+ * Sections picked for one turn
+ */
+export interface StandardsSelection {
+  sections: StandardsSection[]
+  // Relevant sections left out to stay within the budget
+  omitted: StandardsSection[]
+}
+
+/**
+ * Limits of a section: an applies-to marker if it has one, else the languages in its heading
+ */
+function sectionScope(heading: string, text: string): { extensions: Set<string>; globs: RegExp[] } {
+  const marker = APPLIES_TO.exec(text)
+  if (marker) {
+    const globs = marker[1]
+      .split(",")
+      .map((glob) => glob.trim().replace(/^\.\//, ""))
+      .filter(Boolean)
+    return { extensions: new Set(), globs: globs.map((glob) => globToRegex(glob)) }
+  }
+  const extensions = new Set<string>()
+  for (const language of HEADING_LANGUAGES) {
+    if (language.name.test(heading)) {
+      language.extensions.forEach((extension) => extensions.add(extension))
+    }
+  }
+  return { extensions, globs: [] }
+}
+
+function isGeneral(section: StandardsSection): boolean {
+  return section.extensions.size === 0 && section.globs.length === 0
+}
+
+function appliesTo(section: StandardsSection, files: string[]): boolean {
+  return files.some(
+    (file) =>
+      section.extensions.has(extname(file).slice(1).toLowerCase()) || section.globs.some((glob) => glob.test(file))
+  )
+}
+
+/**
+ * A parsed standards.md
+ */
+export class Standards {
+  // Text before the first section (title and introduction), always included
+  readonly preamble: string
+  readonly sections: StandardsSection[]
+  private prompts = new Map<string, string>()
+
+  constructor(preamble: string, sections: StandardsSection[]) {
+    this.preamble = preamble
+    this.sections = sections
+  }
+
+  /**
+   * Sanitize standards.md and split it into sections at its `#` and `##` headings
+   * (headings inside fenced code blocks don't count)
+   */
+  static parse(markdown: string): Standards {
+    const lines = sanitizeContent(markdown).split(/\r?\n/)
+    const starts: number[] = []
+    let fence: string | null = null
+    lines.forEach((line, i) => {
+      const marker = /^\s*(```|~~~)/.exec(line)
+      if (marker) {
+        fence = fence === null ? marker[1] : fence === marker[1] ? null : fence
+      } else if (fence === null && /^#{1,2}\s/.test(line) && !(i === 0 && line.startsWith("# "))) {
+        starts.push(i)
+      }
+    })
+
+    const preamble = lines.slice(0, starts[0] ?? lines.length).join("\n").trim()
+    const sections = starts.map((start, k): StandardsSection => {
+      const text = lines.slice(start, starts[k + 1] ?? lines.length).join("\n").trim()
+      const heading = lines[start].replace(/^#+\s*/, "").trim()
+      return { heading, text, tokens: estimateTokens(text), ...sectionScope(heading, text) }
+    })
+    return new Standards(preamble, sections)
+  }
+
+  /**
+   * Sections for a turn on the given files (paths relative to the repository root): sections
+   * limited to those files first, then general ones, in document order, until the budget is
+   * spent. With no files known yet, every section is a candidate.
+   */
+  select(files: string[], maxTokens: number): StandardsSelection {
+    const candidates =
+      files.length === 0
+        ? this.sections
+        : [...this.sections.filter((s) => !isGeneral(s) && appliesTo(s, files)), ...this.sections.filter(isGeneral)]
+
+    let remaining = maxTokens - estimateTokens(this.preamble)
+    const chosen = new Set<StandardsSection>()
+    const omitted: StandardsSection[] = []
+    for (const section of candidates) {
+      if (section.tokens <= remaining) {
+        chosen.add(section)
+        remaining -= section.tokens
+      } else {
+        omitted.push(section)
+      }
+    }
+    return { sections: this.sections.filter((section) => chosen.has(section)), omitted }
+  }
+
+  /**
+   * System prompt text for a turn on the given files; built once per distinct selection
+   */
+  prompt(files: string[], maxTokens: number): string {
+    const selection = this.select(files, maxTokens)
+    const index = (section: StandardsSection) => this.sections.indexOf(section)
+    const key = `${selection.sections.map(index).join(",")}/${selection.omitted.map(index).join(",")}`
+    let prompt = this.prompts.get(key)
+    if (prompt === undefined) {
+      const parts = [this.preamble, ...selection.sections.map((section) => section.text)].filter(Boolean)
+      if (selection.omitted.length > 0) {
+        const headings = selection.omitted.map((section) => `"${section.heading}"`).join(", ")
+        parts.push(`(Also in .ai/standards.md, left out here for length: ${headings}. Read it when these apply.)`)
+      }
+      prompt = `
+## Team Standards (OpenTeamCode)
+
+The following are your team's coding standards. Follow these guidelines strictly:
+
+${parts.join("\n\n")}
+
+---
+`
+      if (this.prompts.size >= PROMPT_CACHE_LIMIT) {
+        this.prompts.clear()
+      }
+      this.prompts.set(key, prompt)
+    }
+    return prompt
+  }
+}
+
+/**
+ * Files each chat session has recently read or edited, most recent last
+ */
+export class SessionFiles {
+  // Repository root; recorded paths are relative to it
+  readonly root: string
+  private sessions = new Map<string, string[]>()
+
+  constructor(root: string) {
+    this.root = root
+  }
+
+  record(sessionID: string, filePath: string): void {
+    const path = isAbsolute(filePath) ? relative(this.root, filePath).split(sep).join("/") : filePath
+    const files = (this.sessions.get(sessionID) ?? []).filter((file) => file !== path)
+    files.push(path)
+    // Re-insert so the least recently active session is the first one dropped
+    this.sessions.delete(sessionID)
+    this.sessions.set(sessionID, files.slice(-SESSION_FILES_LIMIT))
+    if (this.sessions.size > SESSIONS_LIMIT) {
+      this.sessions.delete(this.sessions.keys().next().value as string)
+    }
+  }
+
+  get(sessionID: string): string[] {
+    return this.sessions.get(sessionID) ?? []
+  }
+}
@@ -0,0 +1,61 @@
+/**
+ * Verdict cache for the guardrails hook
+ * Remembers what a check of some content found, so an agent writing the same content again
+ * (or repeating an edit) is answered without matching it a second time
+ */
+
+import { hashContent, type CompiledPolicy, type DetectionResult } from "@openteamcode/guardrails"
+
+// Checks remembered per process; the least recently used is dropped first
+export const VERDICT_CACHE_SIZE = 512
+
+/**
+ * Least-recently-used map from (policy, file name, content) to the detections found
+ */
+export class VerdictCache {
+  hits = 0
+  misses = 0
+  private maxEntries: number
+  private entries = new Map<string, DetectionResult[]>()
+
+  constructor(maxEntries: number = VERDICT_CACHE_SIZE) {
+    this.maxEntries = maxEntries
+  }
+
+  /**
+   * Cache key for checking `content` as `filename` (the name picks structured-file handling)
+   * under `policy`; the policy hash changes whenever .ai/policies.yaml does
+   */
+  static key(policy: CompiledPolicy, filename: string, content: string): string {
+    return `${policy.hash}:${hashContent(`${filename}\0${content}`)}`
+  }
+
+  get(key: string): DetectionResult[] | undefined {
+    const detections = this.entries.get(key)
+    if (detections === undefined) {
+      this.misses++
+      return undefined
+    }
+    // Re-insert so the entry becomes the most recently used
+    this.entries.delete(key)
+    this.entries.set(key, detections)
+    this.hits++
+    return detections
+  }
+
+  set(key: string, detections: DetectionResult[]): void {
+    this.entries.delete(key)
+    this.entries.set(key, detections)
+    if (this.entries.size > this.maxEntries) {
+      // Maps iterate in insertion order, so the first key is the least recently used
+      const oldest = this.entries.keys().next().value
+      if (oldest !== undefined) {
+        this.entries.delete(oldest)
+      }
+    }
+  }
+
+  get size(): number {
+    return this.entries.size
+  }
+}
@@ -6,7 +6,7 @@
 
 import { tool, type ToolDefinition, type PluginInput } from "@opencode-ai/plugin"
 import type { OTCPluginState } from "../index"
-import { scan, DEFAULT_PATTERNS } from "../lib/scanner"
+import { scan } from "@openteamcode/guardrails"
 
 export function createGuardrailScanTool(state: OTCPluginState, input: PluginInput): ToolDefinition {
   return tool({
@@ -24,15 +24,17 @@ export function createGuardrailScanTool(state: OTCPluginState, input: PluginInpu
       try {
         const targetPath = scanPath || input.directory
 
-        // Get patterns from policies or use defaults
-        const patterns = state.policies?.patterns?.length
-          ? state.policies.patterns
-          : DEFAULT_PATTERNS
+        // Policy compiled from policies.yaml (or the defaults) when the snapshot was loaded
+        const { config, policies, policy, quality, baseline } = state.current
 
         const summary = await scan(targetPath, {
-          patterns,
-          excludePaths: state.policies?.excludePaths,
-          excludeExtensions: state.policies?.excludeExtensions,
+          policy,
+          quality,
+          baseline: baseline ?? undefined,
+          excludePaths: policies?.excludePaths,
+          excludeExtensions: policies?.excludeExtensions,
+          workers: config?.guardrails?.workers,
+          maxFileSize: config?.guardrails?.maxFileSize,
         })
 
         // Build result message
@@ -47,6 +49,21 @@ export function createGuardrailScanTool(state: OTCPluginState, input: PluginInpu
         lines.push(`- 🔴 High confidence: ${summary.highConfidence}`)
         lines.push(`- 🟡 Medium confidence: ${summary.mediumConfidence}`)
         lines.push(`- 🔵 Low confidence: ${summary.lowConfidence}`)
+        if (summary.baselineSuppressed > 0) {
+          lines.push(`- Accepted in baseline (not shown): ${summary.baselineSuppressed}`)
+        }
+
+        // Patterns that did not run (everywhere, or from some file on) leave gaps in the results
+        if (summary.skippedPatterns.length > 0 || summary.stoppedPatterns.length > 0) {
+          lines.push("")
+          lines.push(`### Pattern warnings`)
+          for (const skipped of summary.skippedPatterns) {
+            lines.push(`- Skipped \`${skipped.id}\`: ${skipped.reason}`)
+          }
+          for (const stopped of summary.stoppedPatterns) {
+            lines.push(`- Stopped \`${stopped.id}\` at ${stopped.file}: ${stopped.reason}`)
+          }
+        }
 
         if (summary.detections.length > 0) {
           lines.push("")
@@ -85,7 +102,20 @@ export function createGuardrailScanTool(state: OTCPluginState, input: PluginInpu
             lines.push(`#### 🔵 Low Confidence (informational)`)
             lines.push(`  ${lowFindings.length} low confidence findings (not shown)`)
           }
-        } else {
+        }
+
+        if (summary.quality.length > 0) {
+          lines.push("")
+          lines.push(`### Quality warnings`)
+          for (const finding of summary.quality.slice(0, 10)) {
+            lines.push(`- **${finding.file}:${finding.line}**: ${finding.rule} (${finding.message})`)
+          }
+          if (summary.quality.length > 10) {
+            lines.push(`  ... and ${summary.quality.length - 10} more`)
+          }
+        }
+
+        if (summary.detections.length === 0 && summary.quality.length === 0) {
           lines.push("")
           lines.push(`✅ No secrets or policy violations detected.`)
         }
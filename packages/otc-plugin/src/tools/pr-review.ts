@@ -23,9 +23,11 @@ export function createPRReviewTool(state: OTCPluginState, input: PluginInput): T
         .describe("If true, returns the review without posting to ADO"),
     },
     async execute({ prId, dryRun }, ctx) {
+      // One snapshot for the whole call, so a reload mid-review can't mix settings
+      const snapshot = state.current
       try {
         // Get credentials
-        const credentials = await getAdoCredentialsFromEnv(state.config)
+        const credentials = await getAdoCredentialsFromEnv(snapshot.config)
         const adoClient = new AdoClient(credentials)
 
         // Get PR details
@@ -33,12 +35,12 @@ export function createPRReviewTool(state: OTCPluginState, input: PluginInput): T
 
         // Load review rubric if available
         let rubric: string | null = null
-        if (state.aiFolder) {
-          rubric = await loadReviewRubric(state.aiFolder)
+        if (snapshot.aiFolder) {
+          rubric = await loadReviewRubric(snapshot.aiFolder)
         }
 
         // Create LLM client and generate review
-        const llmClient = createLLMClient(state.config)
+        const llmClient = createLLMClient(snapshot.config)
         const prContext = summarizeChangesForLLM(details)
         const review = await llmClient.generateReview(prContext, rubric || undefined)
 
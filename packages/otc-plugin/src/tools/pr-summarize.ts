@@ -22,16 +22,18 @@ export function createPRSummarizeTool(state: OTCPluginState, input: PluginInput)
         .describe("If true, returns the summary without updating the PR description"),
     },
     async execute({ prId, dryRun }, ctx) {
+      // One snapshot for the whole call, so a reload midway can't mix settings
+      const snapshot = state.current
       try {
         // Get credentials
-        const credentials = await getAdoCredentialsFromEnv(state.config)
+        const credentials = await getAdoCredentialsFromEnv(snapshot.config)
         const adoClient = new AdoClient(credentials)
 
         // Get PR details
         const details = await getPullRequestDetails(adoClient, prId)
 
         // Create LLM client and generate summary
-        const llmClient = createLLMClient(state.config)
+        const llmClient = createLLMClient(snapshot.config)
         const prContext = summarizeChangesForLLM(details)
         const summary = await llmClient.generateSummary(prContext)
 
@@ -22,16 +22,18 @@ export function createPRTestplanTool(state: OTCPluginState, input: PluginInput):
         .describe("If true, returns the test plan without posting to ADO"),
     },
     async execute({ prId, dryRun }, ctx) {
+      // One snapshot for the whole call, so a reload midway can't mix settings
+      const snapshot = state.current
       try {
         // Get credentials
-        const credentials = await getAdoCredentialsFromEnv(state.config)
+        const credentials = await getAdoCredentialsFromEnv(snapshot.config)
         const adoClient = new AdoClient(credentials)
 
         // Get PR details
         const details = await getPullRequestDetails(adoClient, prId)
 
         // Create LLM client and generate test plan
-        const llmClient = createLLMClient(state.config)
+        const llmClient = createLLMClient(snapshot.config)
         const prContext = summarizeChangesForLLM(details)
         const testPlan = await llmClient.generateTestPlan(prContext)
 
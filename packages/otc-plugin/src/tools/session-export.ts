@@ -24,8 +24,10 @@ export function createSessionExportTool(state: OTCPluginState, input: PluginInpu
       blockers: tool.schema.array(tool.schema.string()).optional().describe("Known blockers or issues"),
     },
     async execute({ title, intent, plan, blockers }, ctx) {
+      // One snapshot for the whole call, so a reload midway can't mix settings
+      const { aiFolder } = state.current
       try {
-        if (!state.aiFolder) {
+        if (!aiFolder) {
           return `Cannot export session: .ai/ folder not found.
 
 To enable session handoff:
@@ -46,7 +48,7 @@ Then try again.`
         const folderName = `${dateStr}-${slug}`
 
         // Create sessions directory if needed
-        const sessionsDir = join(state.aiFolder, SESSIONS_FOLDER)
+        const sessionsDir = join(aiFolder, SESSIONS_FOLDER)
         const sessionDir = join(sessionsDir, folderName)
 
         await mkdir(sessionDir, { recursive: true })
@@ -0,0 +1,110 @@
+import { afterAll, beforeAll, describe, expect, spyOn, test } from "bun:test"
+import { mkdirSync, mkdtempSync, rmSync, writeFileSync } from "fs"
+import { tmpdir } from "os"
+import { join } from "path"
+import { RELOAD_DEBOUNCE_MS, SnapshotStore } from "../src/lib/snapshot"
+
+const TEAM_POLICIES = `version: "1"
+patterns:
+  - name: Acme Token
+    regex: "acme_tok_[a-f0-9]{16}"
+    confidence: high
+`
+
+const EDITED_POLICIES = `version: "1"
+patterns:
+  - name: Acme Token
+    regex: "acme_tok_[a-f0-9]{16}"
+    confidence: high
+  - name: Acme Session
+    regex: "acme_sess_[a-f0-9]{16}"
+    confidence: medium
+`
+
+// Fails schema validation: a pattern without a regex
+const INVALID_POLICIES = `version: "1"
+patterns:
+  - name: Missing Regex
+`
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms))
+
+/**
+ * Wait for the store to swap in a snapshot newer than `version` (file events can lag behind the write)
+ */
+async function nextSnapshot(store: SnapshotStore, version: number): Promise<void> {
+  const deadline = Date.now() + 5000
+  while (store.current.version <= version) {
+    if (Date.now() > deadline) {
+      throw new Error(`No reload after version ${version}`)
+    }
+    await sleep(20)
+  }
+}
+
+describe("SnapshotStore hot reload", () => {
+  const root = mkdtempSync(join(tmpdir(), "otc-snapshot-"))
+  const aiFolder = join(root, ".ai")
+  let store: SnapshotStore
+
+  beforeAll(async () => {
+    mkdirSync(aiFolder)
+    writeFileSync(join(aiFolder, "policies.yaml"), TEAM_POLICIES)
+    store = await SnapshotStore.load(aiFolder)
+    store.watch()
+  })
+
+  afterAll(async () => {
+    await store.close()
+    rmSync(root, { recursive: true, force: true })
+  })
+
+  test("starts from the team policy, with a sandbox for its patterns", () => {
+    const { policy, sandbox, version } = store.current
+    expect(version).toBe(1)
+    expect(policy.patterns.map((compiled) => compiled.id)).toEqual(["acme-token"])
+    expect(sandbox).toBeDefined()
+  })
+
+  test("keeps the compiled policy and sandbox when another file changes", async () => {
+    const before = store.current
+    writeFileSync(join(aiFolder, "standards.md"), "# Standards\n\n## Naming\n\nUse camelCase.\n")
+    await nextSnapshot(store, before.version)
+    expect(store.current.standards).toContain("camelCase")
+    expect(store.current.policy).toBe(before.policy)
+    expect(store.current.sandbox).toBe(before.sandbox)
+  })
+
+  test("reloads an edited policies.yaml once after the debounce and closes the old sandbox", async () => {
+    const before = store.current
+    const close = spyOn(before.sandbox!, "close")
+    // An editor writing the file in several steps
+    writeFileSync(join(aiFolder, "policies.yaml"), "")
+    writeFileSync(join(aiFolder, "policies.yaml"), EDITED_POLICIES)
+    await sleep(RELOAD_DEBOUNCE_MS / 4)
+    expect(store.current).toBe(before)
+
+    await nextSnapshot(store, before.version)
+    await sleep(RELOAD_DEBOUNCE_MS * 2)
+    expect(store.current.version).toBe(before.version + 1)
+    expect(store.current.policy.patterns.map((compiled) => compiled.id)).toEqual(["acme-token", "acme-session"])
+    expect(store.current.sandbox).toBeDefined()
+    expect(store.current.sandbox).not.toBe(before.sandbox)
+    expect(close).toHaveBeenCalledTimes(1)
+  })
+
+  test("keeps the previous policy when the edited file is invalid", async () => {
+    const before = store.current
+    const warn = spyOn(console, "warn").mockImplementation(() => {})
+    try {
+      writeFileSync(join(aiFolder, "policies.yaml"), INVALID_POLICIES)
+      await nextSnapshot(store, before.version)
+      expect(warn).toHaveBeenCalled()
+    } finally {
+      warn.mockRestore()
+    }
+    expect(store.current.policies).toBe(before.policies)
+    expect(store.current.policy).toBe(before.policy)
+    expect(store.current.sandbox).toBe(before.sandbox)
+  })
+})
@@ -0,0 +1,378 @@
+/**
+ * Guardrail scanner benchmark
+ * Runs the shared guardrails scanner (what both `otc guardrail scan` and the OpenCode plugin run)
+ * and the q003 prototype over the q003 corpus and over synthetic scale-ups of it, reporting
+ * throughput, peak RSS and detection quality. With a saved
+ * baseline it exits 1 when a run gets slower or heavier than the threshold allows, or detects
+ * less (or flags more) than before, so a speedup can never cost detection quality.
+ *
+ * Run with: bun run bench:guardrails [options]
+ *   --datasets corpus,files-10k,bytes-1g   Datasets to run (default: all)
+ *   --engines guardrails,prototype         Scanners to run (default: all)
+ *   --runs 3                               Scans per engine and dataset; the fastest counts
+ *   --workers N                            Worker threads for the guardrails scanner
+ *   --threshold 0.2                        Allowed throughput / RSS regression (0.2 = 20%)
+ *   --save-baseline                        Write this run's results as the new baseline
+ */
+
+import { existsSync } from "fs"
+import { mkdir, readdir, readFile, rm, stat, writeFile } from "fs/promises"
+import { tmpdir } from "os"
+import { dirname, join, relative } from "path"
+
+const SCRIPT_DIR = dirname(import.meta.path)
+const CORPUS_DIR = join(SCRIPT_DIR, "../../../validation/q003-guardrails/corpus")
+const BASELINE_FILE = join(SCRIPT_DIR, "../bench/guardrails-baseline.json")
+
+// Generated datasets are kept between runs; bump to regenerate them
+const DATASET_VERSION = 1
+const DATASET_ROOT = join(tmpdir(), "otc-guardrails-bench")
+
+const SYNTHETIC_FILE_COUNT = 10_000
+const SYNTHETIC_FILES_PER_DIR = 100
+// 1GB in 4MB files: under the 5MB streaming threshold, so each file is read whole
+const LARGE_FILE_COUNT = 256
+const LARGE_FILE_SIZE = 4 * 1024 * 1024
+
+// Files under these top-level directories are labelled for quality metrics; others only count for speed
+const POSITIVE_DIR = "true-positives"
+const NEGATIVE_DIR = "true-negatives"
+
+const ENGINES = ["guardrails", "prototype"] as const
+const DATASETS = ["corpus", "files-10k", "bytes-1g"] as const
+
+type Engine = (typeof ENGINES)[number]
+type Dataset = (typeof DATASETS)[number]
+
+interface EngineRun {
+  // Fastest of the runs, in seconds
+  seconds: number
+  peakRssBytes: number
+  // Files with at least one detection, relative to the dataset root
+  flaggedFiles: string[]
+  // Files the engine actually matched (null if it doesn't say); size limits show up here
+  filesScanned: number | null
+}
+
+interface BenchResult {
+  mbPerSecond: number
+  filesPerSecond: number
+  peakRssMb: number
+  filesScanned: number | null
+  // Null when the dataset has no labelled files of that kind
+  tpRate: number | null
+  fpRate: number | null
+}
+
+type Baseline = Record<string, BenchResult>
+
+/**
+ * Every file under a directory, relative to it, with its size
+ */
+async function listFiles(root: string): Promise<{ path: string; size: number }[]> {
+  const files: { path: string; size: number }[] = []
+  const walk = async (dir: string): Promise<void> => {
+    for (const entry of await readdir(dir, { withFileTypes: true })) {
+      const fullPath = join(dir, entry.name)
+      if (entry.isDirectory()) {
+        await walk(fullPath)
+      } else if (entry.isFile()) {
+        files.push({ path: relative(root, fullPath), size: (await stat(fullPath)).size })
+      }
+    }
+  }
+  await walk(root)
+  return files.sort((a, b) => (a.path < b.path ? -1 : 1))
+}
+
+/**
+ * Labelled corpus files (the corpus README is left out)
+ */
+async function listCorpus(label?: string): Promise<{ path: string; size: number }[]> {
+  const labels = label ? [label] : [POSITIVE_DIR, NEGATIVE_DIR]
+  return (await listFiles(CORPUS_DIR)).filter((file) => labels.includes(file.path.split("/")[0]))
+}
+
+/**
+ * 10k files copied round-robin from the corpus, spread over directories, keeping their labels
+ */
+async function generateFiles(target: string): Promise<void> {
+  const corpus = await listCorpus()
+  const contents = await Promise.all(corpus.map((file) => readFile(join(CORPUS_DIR, file.path))))
+  const created = new Set<string>()
+  for (let i = 0; i < SYNTHETIC_FILE_COUNT; i++) {
+    const source = corpus[i % corpus.length]
+    const [label, name] = source.path.split("/")
+    const dir = join(target, label, `d${Math.floor(i / SYNTHETIC_FILES_PER_DIR)}`)
+    if (!created.has(dir)) {
+      await mkdir(dir, { recursive: true })
+      created.add(dir)
+    }
+    await writeFile(join(dir, `${i}-${name}`), contents[i % corpus.length])
+  }
+}
+
+/**
+ * 1GB in 4MB files of true-negative text, each ending in one true-positive file, so findings are
+ * as sparse as in a real tree (unlabelled: measures throughput only)
+ */
+async function generateBytes(target: string): Promise<void> {
+  const read = (file: { path: string }) => readFile(join(CORPUS_DIR, file.path), "utf-8")
+  const negatives = (await Promise.all((await listCorpus(NEGATIVE_DIR)).map(read))).join("\n")
+  const positives = await Promise.all((await listCorpus(POSITIVE_DIR)).map(read))
+  const filler = negatives.repeat(Math.ceil(LARGE_FILE_SIZE / negatives.length))
+  await mkdir(target, { recursive: true })
+  for (let i = 0; i < LARGE_FILE_COUNT; i++) {
+    const secret = `\n${positives[i % positives.length]}`
+    await writeFile(
+      join(target, `part-${String(i).padStart(3, "0")}.txt`),
+      filler.slice(0, LARGE_FILE_SIZE - secret.length) + secret
+    )
+  }
+}
+
+/**
+ * Directory holding a dataset, generating it on first use
+ */
+async function prepareDataset(dataset: Dataset): Promise<string> {
+  if (dataset === "corpus") {
+    return CORPUS_DIR
+  }
+  const target = join(DATASET_ROOT, dataset)
+  // Marker lives beside the dataset so the scanners never see it
+  const marker = `${target}.v${DATASET_VERSION}`
+  if (existsSync(marker)) {
+    return target
+  }
+  console.log(`Generating ${dataset} in ${target}...`)
+  await rm(target, { recursive: true, force: true })
+  await (dataset === "files-10k" ? generateFiles(target) : generateBytes(target))
+  await writeFile(marker, "")
+  return target
+}
+
+type EngineScan = (dir: string) => Promise<{ flagged: string[]; filesScanned: number | null }>
+
+/**
+ * Load an engine's scanner; the returned function scans a directory and lists the flagged files
+ */
+async function loadEngine(engine: Engine, workers: number | undefined): Promise<EngineScan> {
+  if (engine === "prototype") {
+    const { scanDirectory } = await import("../../../validation/q003-guardrails/prototype")
+    return async (dir) => ({
+      flagged: (await scanDirectory(dir, dir)).map((detection) => detection.file),
+      filesScanned: null,
+    })
+  }
+  const { scan } = await import("@openteamcode/guardrails")
+  return async (dir) => {
+    // Keep only the file names, as `otc guardrail scan --format ndjson` would, so a dataset with
+    // a million findings measures the scanner rather than the result array. The tree is walked
+    // (no git listing) so every engine sees the same files
+    const flagged = new Set<string>()
+    const summary = await scan(dir, {
+      workers,
+      git: false,
+      collectDetections: false,
+      onDetection: (detection) => flagged.add(detection.file),
+    })
+    return { flagged: [...flagged], filesScanned: summary.filesScanned }
+  }
+}
+
+/**
+ * Child process side: run one engine on one dataset and print the result as JSON
+ */
+async function runEngine(engine: Engine, dir: string, runs: number, workers: number | undefined): Promise<void> {
+  const scanDirectory = await loadEngine(engine, workers)
+  let seconds = Infinity
+  let scanned = { flagged: [] as string[], filesScanned: null as number | null }
+  for (let run = 0; run < runs; run++) {
+    const start = performance.now()
+    scanned = await scanDirectory(dir)
+    seconds = Math.min(seconds, (performance.now() - start) / 1000)
+  }
+  const result: EngineRun = {
+    seconds,
+    // maxRSS is reported in kilobytes
+    peakRssBytes: process.resourceUsage().maxRSS * 1024,
+    flaggedFiles: [...new Set(scanned.flagged)],
+    filesScanned: scanned.filesScanned,
+  }
+  console.log(JSON.stringify(result))
+}
+
+/**
+ * Run an engine in a fresh process, so peak RSS belongs to that run alone
+ */
+async function measure(engine: Engine, dir: string, runs: number, workers: number | undefined): Promise<EngineRun> {
+  const args = [process.execPath, "run", import.meta.path, "--run", engine, dir, "--runs", String(runs)]
+  if (workers !== undefined) {
+    args.push("--workers", String(workers))
+  }
+  const proc = Bun.spawn(args, { stdout: "pipe", stderr: "inherit" })
+  const stdout = await new Response(proc.stdout).text()
+  const exitCode = await proc.exited
+  const lastLine = stdout.trim().split("\n").pop()
+  if (exitCode !== 0 || !lastLine) {
+    throw new Error(`${engine} benchmark failed (exit code ${exitCode})`)
+  }
+  return JSON.parse(lastLine) as EngineRun
+}
+
+/**
+ * Throughput, memory and detection rates for one engine run over a dataset's files
+ */
+function summarize(run: EngineRun, files: { path: string; size: number }[]): BenchResult {
+  const flagged = new Set(run.flaggedFiles)
+  const rate = (label: string): number | null => {
+    const labelled = files.filter((file) => file.path.startsWith(`${label}/`))
+    return labelled.length > 0 ? labelled.filter((file) => flagged.has(file.path)).length / labelled.length : null
+  }
+  const bytes = files.reduce((total, file) => total + file.size, 0)
+  return {
+    mbPerSecond: bytes / 1e6 / run.seconds,
+    filesPerSecond: files.length / run.seconds,
+    peakRssMb: run.peakRssBytes / 1e6,
+    filesScanned: run.filesScanned,
+    tpRate: rate(POSITIVE_DIR),
+    fpRate: rate(NEGATIVE_DIR),
+  }
+}
+
+/**
+ * Ways a result is worse than its baseline; throughput and memory get `threshold` slack, while
+ * coverage and quality get none. Untimed datasets only gate coverage and quality.
+ */
+function regressions(result: BenchResult, baseline: BenchResult, threshold: number, timed: boolean): string[] {
+  const found: string[] = []
+  if (timed && result.mbPerSecond < baseline.mbPerSecond * (1 - threshold)) {
+    found.push(`throughput ${result.mbPerSecond.toFixed(1)} MB/s < baseline ${baseline.mbPerSecond.toFixed(1)} MB/s`)
+  }
+  if (timed && result.peakRssMb > baseline.peakRssMb * (1 + threshold)) {
+    found.push(`peak RSS ${result.peakRssMb.toFixed(0)} MB > baseline ${baseline.peakRssMb.toFixed(0)} MB`)
+  }
+  if (result.filesScanned !== null && baseline.filesScanned !== null && result.filesScanned < baseline.filesScanned) {
+    found.push(`files scanned ${result.filesScanned} < baseline ${baseline.filesScanned}`)
+  }
+  if (result.tpRate !== null && baseline.tpRate !== null && result.tpRate < baseline.tpRate) {
+    found.push(`TP rate ${percent(result.tpRate)} < baseline ${percent(baseline.tpRate)}`)
+  }
+  if (result.fpRate !== null && baseline.fpRate !== null && result.fpRate > baseline.fpRate) {
+    found.push(`FP rate ${percent(result.fpRate)} > baseline ${percent(baseline.fpRate)}`)
+  }
+  return found
+}
+
+function percent(rate: number | null): string {
+  return rate === null ? "-" : `${(rate * 100).toFixed(1)}%`
+}
+
+/**
+ * Value following `--name`, if given
+ */
+function option(args: string[], name: string): string | undefined {
+  const index = args.indexOf(`--${name}`)
+  return index === -1 ? undefined : args[index + 1]
+}
+
+/**
+ * Comma-separated list option, checked against the allowed values
+ */
+function listOption<T extends string>(args: string[], name: string, allowed: readonly T[]): T[] {
+  const value = option(args, name)
+  if (value === undefined) {
+    return [...allowed]
+  }
+  const selected = value.split(",").map((item) => item.trim())
+  const unknown = selected.filter((item) => !allowed.includes(item as T))
+  if (unknown.length > 0) {
+    throw new Error(`Unknown --${name}: ${unknown.join(", ")} (expected ${allowed.join(", ")})`)
+  }
+  return selected as T[]
+}
+
+async function main(): Promise<void> {
+  const args = process.argv.slice(2)
+  const runs = Math.max(1, parseInt(option(args, "runs") ?? "3", 10))
+  const workersOption = option(args, "workers")
+  const workers = workersOption === undefined ? undefined : parseInt(workersOption, 10)
+
+  const engineToRun = option(args, "run")
+  if (engineToRun) {
+    const dir = args[args.indexOf("--run") + 2]
+    await runEngine(engineToRun as Engine, dir, runs, workers)
+    return
+  }
+
+  const engines = listOption(args, "engines", ENGINES)
+  const datasets = listOption(args, "datasets", DATASETS)
+  const threshold = parseFloat(option(args, "threshold") ?? "0.2")
+  const baseline: Baseline | null = existsSync(BASELINE_FILE)
+    ? JSON.parse(await readFile(BASELINE_FILE, "utf-8"))
+    : null
+
+  const results: Baseline = {}
+  const failures: string[] = []
+  const columns = ["MB/s", "files/s", "RSS MB", "scanned", "TP", "FP"]
+  console.log(["engine/dataset".padEnd(22), ...columns.map((column) => column.padStart(9))].join(" "))
+  for (const dataset of datasets) {
+    const dir = await prepareDataset(dataset)
+    const files = await listFiles(dir)
+    for (const engine of engines) {
+      const key = `${engine}/${dataset}`
+      let result: BenchResult
+      try {
+        result = summarize(await measure(engine, dir, runs, workers), files)
+      } catch (error) {
+        // One engine falling over (e.g. out of memory on bytes-1g) shouldn't hide the others
+        const reason = error instanceof Error ? error.message : String(error)
+        console.log(`${key.padEnd(22)} ${reason}`)
+        if (baseline?.[key]) {
+          failures.push(`${key}: ${reason}`)
+        }
+        continue
+      }
+      results[key] = result
+      const cells = [
+        result.mbPerSecond.toFixed(1),
+        result.filesPerSecond.toFixed(0),
+        result.peakRssMb.toFixed(0),
+        result.filesScanned === null ? "-" : `${result.filesScanned}/${files.length}`,
+        percent(result.tpRate),
+        percent(result.fpRate),
+      ]
+      console.log([key.padEnd(22), ...cells.map((cell) => cell.padStart(9))].join(" "))
+      if (baseline?.[key]) {
+        // The corpus is too small (75 files) to time reliably, so it only gates quality
+        for (const regression of regressions(result, baseline[key], threshold, dataset !== "corpus")) {
+          failures.push(`${key}: ${regression}`)
+        }
+      }
+    }
+  }
+
+  if (args.includes("--save-baseline")) {
+    await mkdir(dirname(BASELINE_FILE), { recursive: true })
+    await writeFile(BASELINE_FILE, JSON.stringify({ ...baseline, ...results }, null, 2) + "\n")
+    console.log(`\nBaseline saved to ${relative(process.cwd(), BASELINE_FILE)}`)
+    return
+  }
+  if (!baseline) {
+    console.log("\nNo baseline yet; run with --save-baseline to record one")
+    return
+  }
+  if (failures.length > 0) {
+    console.log(`\nRegressions (threshold ${Math.round(threshold * 100)}%):`)
+    for (const failure of failures) {
+      console.log(`  ${failure}`)
+    }
+    process.exit(1)
+  }
+  console.log("\nNo regressions against baseline")
+}
+
+main().catch((error) => {
+  console.error(error instanceof Error ? error.message : error)
+  process.exit(1)
+})
@@ -1,19 +1,82 @@
 /**
  * otc guardrail - Guardrail management commands
- *   otc guardrail scan [path] - Run secret detection on files
+ *   otc guardrail scan [path] - Run secret detection (and policies.yaml quality rules) on files
+ *   otc guardrail scan --staged | --since <ref> - Scan only lines added in a git diff
+ *   otc guardrail baseline - Accept current findings so scans report only new ones
+ *   otc guardrail watch [path] - Rescan files as they change and print new and cleared findings
+ *   otc guardrail serve - Answer scans from a warm daemon over a local socket (used when running)
  *   otc guardrail list - Show active patterns
  *   otc guardrail explain <id> - Show pattern details
  */
 
 import type { CommandModule } from "yargs"
+import { stat } from "fs/promises"
+import { dirname, join, resolve } from "path"
 import * as output from "../util/output"
-import { findAiFolder, loadPolicies, type PolicyPattern } from "../util/config"
-import { scan, getPatternById } from "../guardrails/scanner"
-import { DEFAULT_PATTERNS } from "../guardrails/patterns"
+import { findAiFolder, loadConfig, loadPolicies, type PolicyPattern } from "../util/config"
+import {
+  BASELINE_FILE,
+  Baseline,
+  DEFAULT_PATTERNS,
+  DEFAULT_SCAN_CONCURRENCY,
+  SCAN_CACHE_FILE,
+  ScanWatcher,
+  WATCH_DEBOUNCE_MS,
+  getPatternById,
+  getQualityRules,
+  scan,
+  scanDiff,
+  writeBaseline,
+  type DetectionResult,
+  type FindingsDelta,
+  type QualityFinding,
+  type QualityRules,
+  type ScanCacheOptions,
+  type ScanProfile,
+  type ScanSummary,
+} from "@openteamcode/guardrails"
+import {
+  REPORT_FORMATS,
+  createNdjsonWriter,
+  createSarifWriter,
+  type ReportFormat,
+  type ReportWriter,
+} from "../guardrails/report"
+import { GuardrailDaemon, daemonSocketPath, requestDaemon, type DaemonScanSettings } from "../guardrails/daemon"
 
 interface ScanArgs {
   path?: string
   json?: boolean
+  concurrency?: number
+  workers?: number
+  cache?: boolean
+  staged?: boolean
+  since?: string
+  maxFileSize?: number
+  git?: boolean
+  untracked?: boolean
+  profile?: boolean
+  baseline?: boolean
+  daemon?: boolean
+  format?: "text" | "json" | ReportFormat
+}
+
+interface BaselineArgs {
+  json?: boolean
+}
+
+interface WatchArgs {
+  path?: string
+  debounce?: number
+  workers?: number
+  cache?: boolean
+  git?: boolean
+  untracked?: boolean
+  baseline?: boolean
+}
+
+interface ServeArgs {
+  json?: boolean
 }
 
 interface ListArgs {
@@ -26,10 +89,11 @@ interface ExplainArgs {
 }
 
 /**
- * Get active patterns from .ai/policies.yaml or defaults
+ * Get active patterns from .ai/policies.yaml (in the .ai/ folder found by the caller) or defaults
  */
-async function getPatterns(): Promise<{ patterns: PolicyPattern[]; source: "config" | "default" }> {
-  const aiPath = await findAiFolder()
+async function getPatterns(
+  aiPath: string | null
+): Promise<{ patterns: PolicyPattern[]; source: "config" | "default" }> {
   if (aiPath) {
     const policies = await loadPolicies(aiPath)
     if (policies && policies.patterns.length > 0) {
@@ -39,9 +103,254 @@ async function getPatterns(): Promise<{ patterns: PolicyPattern[]; source: "conf
   return { patterns: DEFAULT_PATTERNS, source: "default" }
 }
 
+/**
+ * Scan index settings: on with --cache, off with --no-cache, and otherwise only when .ai/.cache
+ * already exists, so plain scans don't start writing to the .ai/ folder
+ */
+async function getScanCache(aiPath: string, enabled: boolean | undefined): Promise<ScanCacheOptions | undefined> {
+  const path = join(aiPath, SCAN_CACHE_FILE)
+  const use = enabled ?? (await stat(dirname(path)).then((s) => s.isDirectory(), () => false))
+  return use ? { path, root: dirname(aiPath) } : undefined
+}
+
+/**
+ * Print a scan profile: patterns by time spent, then the slowest files
+ */
+function printProfile(profile: ScanProfile): void {
+  const patternTimeMs = profile.patterns.reduce((total, stats) => total + stats.matchTimeMs, 0)
+  const totalMs = patternTimeMs + profile.prefilterTimeMs + profile.keyValueTimeMs
+  const share = (ms: number) => (totalMs > 0 ? `${((ms / totalMs) * 100).toFixed(1)}%` : "-")
+
+  output.info("PATTERN PROFILE:")
+  output.table(
+    profile.patterns.map((stats) => ({
+      pattern: stats.patternId,
+      time: stats.matchTimeMs.toFixed(1),
+      share: share(stats.matchTimeMs),
+      lines: String(stats.linesTested),
+      matches: String(stats.matches),
+      indicators: String(stats.suppressedByIndicators),
+      contexts: String(stats.suppressedByContexts),
+    })),
+    [
+      { key: "pattern", header: "Pattern" },
+      { key: "time", header: "Time (ms)" },
+      { key: "share", header: "Share" },
+      { key: "lines", header: "Lines tested" },
+      { key: "matches", header: "Matches" },
+      { key: "indicators", header: "Suppressed (indicators)" },
+      { key: "contexts", header: "Suppressed (contexts)" },
+    ]
+  )
+  output.keyValue("Prefilter", `${profile.prefilterTimeMs.toFixed(1)}ms (${share(profile.prefilterTimeMs)})`, 2)
+  if (profile.keyValueTimeMs > 0) {
+    output.keyValue("Key/value reading", `${profile.keyValueTimeMs.toFixed(1)}ms (${share(profile.keyValueTimeMs)})`, 2)
+  }
+  console.log()
+
+  if (profile.slowestFiles.length > 0) {
+    output.info("SLOWEST FILES:")
+    output.table(
+      profile.slowestFiles.map((file) => ({
+        file: file.file,
+        time: file.matchTimeMs.toFixed(1),
+        size: `${(file.bytes / 1024).toFixed(1)} KB`,
+      })),
+      [
+        { key: "file", header: "File" },
+        { key: "time", header: "Time (ms)" },
+        { key: "size", header: "Size" },
+      ]
+    )
+    console.log()
+  }
+}
+
+/**
+ * Print quality rule findings, grouped by rule
+ */
+function printQuality(findings: QualityFinding[]): void {
+  output.warning(`Found ${findings.length} quality rule violations`)
+  console.log()
+  const byRule = new Map<string, QualityFinding[]>()
+  for (const finding of findings) {
+    const group = byRule.get(finding.ruleId)
+    if (group) {
+      group.push(finding)
+    } else {
+      byRule.set(finding.ruleId, [finding])
+    }
+  }
+  for (const group of byRule.values()) {
+    output.info(`${group[0].rule.toUpperCase()} (${group[0].action}):`)
+    output.dim(`  ${group[0].message}`)
+    for (const finding of group) {
+      console.log(`  ${finding.file}:${finding.line}  ${finding.match}`)
+    }
+    console.log()
+  }
+}
+
+/**
+ * Print one rescan's changes: "+" for new findings, "-" for cleared ones
+ */
+function printDelta(delta: FindingsDelta): void {
+  for (const detection of delta.added) {
+    output.warning(`+ ${detection.file}:${detection.line}  ${detection.pattern} (${detection.confidence})`)
+    output.keyValue("    Match", detection.match, 0)
+  }
+  for (const detection of delta.cleared) {
+    output.success(`- ${detection.file}:${detection.line}  ${detection.pattern} (cleared)`)
+  }
+  for (const finding of delta.qualityAdded) {
+    output.info(`+ ${finding.file}:${finding.line}  ${finding.rule} (${finding.action}): ${finding.message}`)
+  }
+  for (const finding of delta.qualityCleared) {
+    output.dim(`- ${finding.file}:${finding.line}  ${finding.rule} (cleared)`)
+  }
+}
+
+interface ScanReport {
+  target: string
+  // "staged" or the ref a diff scan started from
+  diff?: string
+  json: boolean
+  settings: DaemonScanSettings
+  // Socket of the daemon that ran the scan
+  daemon?: string
+}
+
+/**
+ * Exit once everything written to stdout has been flushed. On a non-blocking pipe (macOS, or
+ * piping into jq or a SARIF uploader) process.exit would cut off a large report mid-write.
+ */
+async function exitAfterOutput(code: number): Promise<never> {
+  await new Promise<void>((resolve) => process.stdout.write("", () => resolve()))
+  process.exit(code)
+}
+
+/**
+ * Print a scan's results as text or JSON and exit (1 if anything is high confidence)
+ */
+async function printScanReport(summary: ScanSummary, report: ScanReport): Promise<never> {
+  const { settings } = report
+  if (report.json) {
+    output.json({
+      target: report.target,
+      diff: report.diff,
+      patternsSource: settings.patternsSource,
+      ...summary,
+    })
+    return exitAfterOutput(summary.highConfidence > 0 ? 1 : 0)
+  }
+
+  output.header("Secrets Detection Scan")
+  output.keyValue("Target", report.target)
+  if (report.diff !== undefined) {
+    output.keyValue("Diff", `${report.diff === "staged" ? "staged changes" : `since ${report.diff}`} (added lines only)`)
+  }
+  output.keyValue("Patterns", `${settings.patterns} (${settings.patternsSource})`)
+  if (settings.qualityRules !== undefined) {
+    output.keyValue("Quality rules", String(settings.qualityRules))
+  }
+  if (summary.fileSource) {
+    output.keyValue("Files listed", summary.fileSource === "git" ? "git ls-files" : "directory walk")
+  }
+  output.keyValue("Files scanned", String(summary.filesScanned))
+  output.keyValue("Files skipped", String(summary.filesSkipped))
+  if (summary.filesStreamed > 0) {
+    output.keyValue("Files streamed", String(summary.filesStreamed))
+  }
+  if (summary.filesBinary > 0) {
+    output.keyValue("Binary files skipped", String(summary.filesBinary))
+  }
+  if (summary.filesTooLarge > 0) {
+    output.keyValue("Files over size limit", `${summary.filesTooLarge} (not scanned)`)
+  }
+  output.keyValue(
+    "Scan time",
+    `${(summary.wallClockMs / 1000).toFixed(2)}s (${Math.round(summary.filesPerSecond)} files/s)`
+  )
+  if (settings.cache) {
+    output.keyValue("Cache", `${summary.cacheHits} hits, ${summary.cacheMisses} misses`)
+  }
+  if (settings.baselineSize !== undefined) {
+    output.keyValue("Baseline", `${summary.baselineSuppressed} known findings left out (${settings.baselineSize} accepted)`)
+  }
+  if (report.daemon) {
+    output.keyValue("Scanned by", `daemon (${report.daemon})`)
+  }
+  for (const skipped of summary.skippedPatterns) {
+    output.warning(`Pattern "${skipped.id}" not run: ${skipped.reason}`)
+  }
+  for (const stopped of summary.stoppedPatterns) {
+    output.warning(`Pattern "${stopped.id}" stopped on ${stopped.file}: ${stopped.reason} (skipped for later files)`)
+  }
+  console.log()
+  if (summary.profile) {
+    printProfile(summary.profile)
+  }
+  if (summary.quality.length > 0) {
+    printQuality(summary.quality)
+  }
+
+  if (summary.detections.length === 0) {
+    output.success(summary.baselineSuppressed > 0 ? "No new secrets detected" : "No secrets detected")
+    console.log()
+    return exitAfterOutput(0)
+  }
+
+  output.warning(`Found ${summary.detections.length} potential secrets`)
+  output.keyValue("  High confidence", String(summary.highConfidence))
+  output.keyValue("  Medium confidence", String(summary.mediumConfidence))
+  output.keyValue("  Low confidence", String(summary.lowConfidence))
+  console.log()
+
+  // Group by confidence
+  const highConfidence = summary.detections.filter((d) => d.confidence === "high")
+  const mediumConfidence = summary.detections.filter((d) => d.confidence === "medium")
+  const lowConfidence = summary.detections.filter((d) => d.confidence === "low")
+
+  if (highConfidence.length > 0) {
+    output.info("HIGH CONFIDENCE:")
+    for (const detection of highConfidence) {
+      console.log(`  ${detection.file}:${detection.line}`)
+      output.keyValue("    Pattern", detection.pattern, 0)
+      output.keyValue("    Match", detection.match, 0)
+      console.log()
+    }
+  }
+
+  if (mediumConfidence.length > 0) {
+    output.info("MEDIUM CONFIDENCE:")
+    for (const detection of mediumConfidence) {
+      console.log(`  ${detection.file}:${detection.line}`)
+      output.keyValue("    Pattern", detection.pattern, 0)
+      output.keyValue("    Match", detection.match, 0)
+      console.log()
+    }
+  }
+
+  if (lowConfidence.length > 0) {
+    output.info("LOW CONFIDENCE:")
+    for (const detection of lowConfidence) {
+      console.log(`  ${detection.file}:${detection.line}`)
+      output.keyValue("    Pattern", detection.pattern, 0)
+      output.keyValue("    Match", detection.match, 0)
+      console.log()
+    }
+  }
+
+  output.dim("Run 'otc guardrail explain <pattern-id>' for pattern details")
+  console.log()
+
+  // Exit 1 if any high confidence findings
+  return exitAfterOutput(summary.highConfidence > 0 ? 1 : 0)
+}
+
 const ScanCommand: CommandModule<{}, ScanArgs> = {
   command: "scan [path]",
-  describe: "Run secret detection on files, exit 1 if findings",
+  describe: "Run secret detection (and quality rules) on files, exit 1 if secrets found",
   builder: (yargs) => {
     return yargs
       .positional("path", {
@@ -54,97 +363,479 @@ const ScanCommand: CommandModule<{}, ScanArgs> = {
         description: "Output as JSON",
         default: false,
       })
+      .option("format", {
+        choices: ["text", "json", ...REPORT_FORMATS] as const,
+        description: "Output format; ndjson and sarif stream each finding as it is found",
+        default: "text" as const,
+      })
+      .option("concurrency", {
+        type: "number",
+        description: "Maximum number of file reads in flight",
+        default: DEFAULT_SCAN_CONCURRENCY,
+      })
+      .option("workers", {
+        type: "number",
+        description: "Worker threads to spread matching across (default: guardrails.workers, else in-process)",
+      })
+      .option("cache", {
+        type: "boolean",
+        description:
+          "Reuse results for unchanged files from .ai/.cache (default: when .ai/.cache exists; --no-cache rescans everything)",
+      })
+      .option("staged", {
+        type: "boolean",
+        description: "Scan only lines added in staged changes (for pre-commit hooks)",
+        default: false,
+      })
+      .option("since", {
+        type: "string",
+        description: "Scan only lines added since a git ref (e.g. origin/main)",
+      })
+      .option("max-file-size", {
+        type: "number",
+        description: "Skip files larger than this many bytes (default: guardrails.maxFileSize, else no limit)",
+      })
+      .option("git", {
+        type: "boolean",
+        description: "List files with git ls-files inside a git repo (use --no-git to walk the tree with .gitignore/.otcignore)",
+        default: true,
+      })
+      .option("untracked", {
+        type: "boolean",
+        description: "Also scan untracked files that are not ignored (use --no-untracked for tracked files only)",
+        default: true,
+      })
+      .option("profile", {
+        type: "boolean",
+        description: "Report match time, lines tested, matches and suppressions per pattern, and the slowest files",
+        default: false,
+      })
+      .option("baseline", {
+        type: "boolean",
+        description: `Leave out findings accepted in .ai/${BASELINE_FILE} (use --no-baseline to report them too)`,
+        default: true,
+      })
+      .option("daemon", {
+        type: "boolean",
+        description: "Hand the scan to 'otc guardrail serve' when it is running (use --no-daemon to always scan in-process)",
+        default: true,
+      })
   },
   handler: async (args) => {
     const targetPath = args.path || "."
-    const { patterns, source } = await getPatterns()
+    const concurrency = args.concurrency ?? DEFAULT_SCAN_CONCURRENCY
+    if (!Number.isInteger(concurrency) || concurrency <= 0) {
+      output.error("--concurrency must be a positive integer")
+      process.exit(1)
+    }
+    if (args.workers !== undefined && (!Number.isInteger(args.workers) || args.workers < 0)) {
+      output.error("--workers must be a non-negative integer")
+      process.exit(1)
+    }
+    if (args.maxFileSize !== undefined && (!Number.isInteger(args.maxFileSize) || args.maxFileSize <= 0)) {
+      output.error("--max-file-size must be a positive integer")
+      process.exit(1)
+    }
+    if (args.staged && args.since) {
+      output.error("--staged and --since cannot be used together")
+      process.exit(1)
+    }
+    const diffMode = args.staged || args.since !== undefined
+    const format = args.json ? "json" : args.format || "text"
+    const aiPath = await findAiFolder()
+
+    // A running daemon has the policy and scan index loaded already; streaming reports and
+    // profiles need them in this process, and with no daemon listening the scan runs here
+    if (args.daemon !== false && !args.profile && (format === "text" || format === "json")) {
+      const socketPath = aiPath && daemonSocketPath(aiPath)
+      const response =
+        socketPath &&
+        (await requestDaemon(socketPath, {
+          type: "scan",
+          path: resolve(targetPath),
+          cwd: process.cwd(),
+          staged: args.staged,
+          since: args.since,
+          git: args.git,
+          untracked: args.untracked,
+          cache: args.cache,
+          baseline: args.baseline,
+          concurrency,
+          workers: args.workers,
+          maxFileSize: args.maxFileSize,
+        }))
+      if (response && !response.ok) {
+        output.error(response.error)
+        process.exit(1)
+      }
+      if (response && response.type === "scan") {
+        await printScanReport(response.summary, {
+          target: targetPath,
+          diff: args.staged ? "staged" : args.since,
+          json: format === "json",
+          settings: response.settings,
+          daemon: socketPath,
+        })
+      }
+    }
+
+    const { patterns, source } = await getPatterns(aiPath)
 
     // Get exclude settings from policies
     let excludePaths: string[] | undefined
     let excludeExtensions: string[] | undefined
-    const aiPath = await findAiFolder()
+    let workers = args.workers
+    let maxFileSize = args.maxFileSize
+    let cache: ScanCacheOptions | undefined
+    let quality: QualityRules | undefined
+    let baseline: Baseline | undefined
     if (aiPath) {
+      cache = await getScanCache(aiPath, args.cache)
+      if (workers === undefined || maxFileSize === undefined) {
+        const config = await loadConfig(aiPath)
+        workers ??= config?.guardrails?.workers
+        maxFileSize ??= config?.guardrails?.maxFileSize
+      }
       const policies = await loadPolicies(aiPath)
       if (policies) {
         excludePaths = policies.excludePaths
         excludeExtensions = policies.excludeExtensions
+        // Quality rules are checked on the content the secrets scan reads, not in a second pass
+        quality = getQualityRules(policies.quality)
       }
+      if (args.baseline !== false) {
+        try {
+          baseline = (await Baseline.load(join(aiPath, BASELINE_FILE), dirname(aiPath))) ?? undefined
+        } catch (error) {
+          output.error(error instanceof Error ? error.message : String(error))
+          process.exit(1)
+        }
+      }
+    }
+
+    // Cached files are not matched again, so a profile has to see every file
+    if (args.profile) {
+      cache = undefined
     }
 
-    const summary = await scan(targetPath, {
+    // Streaming formats write findings as they arrive and keep only the counters in memory
+    const writer: ReportWriter | undefined =
+      format === "ndjson"
+        ? createNdjsonWriter()
+        : format === "sarif"
+          ? createSarifWriter(patterns, quality?.source)
+          : undefined
+    const streaming = writer
+      ? {
+          onDetection: (detection: DetectionResult) => writer.detection(detection),
+          onQualityFinding: (finding: QualityFinding) => writer.quality(finding),
+          collectDetections: false,
+        }
+      : {}
+
+    let summary: ScanSummary
+    if (diffMode) {
+      // Only added lines are scanned, so the whole-file cache and worker pool don't apply
+      cache = undefined
+      try {
+        summary = await scanDiff({
+          patterns,
+          excludePaths,
+          excludeExtensions,
+          staged: args.staged,
+          since: args.since,
+          paths: [targetPath],
+          profile: args.profile,
+          quality,
+          baseline,
+          ...streaming,
+        })
+      } catch (error) {
+        output.error(error instanceof Error ? error.message : String(error))
+        process.exit(1)
+      }
+    } else {
+      summary = await scan(targetPath, {
+        patterns,
+        excludePaths,
+        excludeExtensions,
+        concurrency,
+        workers,
+        cache,
+        maxFileSize,
+        git: args.git,
+        untracked: args.untracked,
+        profile: args.profile,
+        quality,
+        baseline,
+        ...streaming,
+      })
+    }
+
+    if (writer) {
+      writer.end(summary)
+      await exitAfterOutput(summary.highConfidence > 0 ? 1 : 0)
+    }
+
+    await printScanReport(summary, {
+      target: targetPath,
+      diff: args.staged ? "staged" : args.since,
+      json: format === "json",
+      settings: {
+        patterns: patterns.length,
+        patternsSource: source,
+        qualityRules: quality?.rules.length,
+        cache: cache !== undefined,
+        baselineSize: baseline?.size,
+      },
+    })
+  },
+}
+
+const BaselineCommand: CommandModule<{}, BaselineArgs> = {
+  command: "baseline",
+  describe: `Accept every current finding in .ai/${BASELINE_FILE} so scans report only new ones`,
+  builder: (yargs) => {
+    return yargs.option("json", {
+      type: "boolean",
+      description: "Output as JSON",
+      default: false,
+    })
+  },
+  handler: async (args) => {
+    const aiPath = await findAiFolder()
+    if (!aiPath) {
+      output.error(".ai/ folder not found. Run 'otc init' first.")
+      process.exit(1)
+    }
+    const root = dirname(aiPath)
+    const { patterns } = await getPatterns(aiPath)
+    const [config, policies] = await Promise.all([loadConfig(aiPath), loadPolicies(aiPath)])
+
+    // The whole repository, with the scan's own settings, so the baseline matches what scans find
+    const summary = await scan(root, {
       patterns,
-      excludePaths,
-      excludeExtensions,
+      basePath: root,
+      excludePaths: policies?.excludePaths,
+      excludeExtensions: policies?.excludeExtensions,
+      workers: config?.guardrails?.workers,
+      maxFileSize: config?.guardrails?.maxFileSize,
+      cache: await getScanCache(aiPath, undefined),
     })
+    const baselinePath = join(aiPath, BASELINE_FILE)
+    const findings = await writeBaseline(baselinePath, root, summary.detections, (detection) =>
+      join(root, detection.file)
+    )
 
     if (args.json) {
-      output.json({
-        target: targetPath,
-        patternsSource: source,
-        ...summary,
-      })
-      process.exit(summary.highConfidence > 0 ? 1 : 0)
+      output.json({ path: baselinePath, findings })
+      return
     }
 
-    output.header("Secrets Detection Scan")
-    output.keyValue("Target", targetPath)
-    output.keyValue("Patterns", `${patterns.length} (${source})`)
+    output.header("Guardrail Baseline")
+    output.keyValue("Baseline", baselinePath)
     output.keyValue("Files scanned", String(summary.filesScanned))
-    output.keyValue("Files skipped", String(summary.filesSkipped))
+    output.keyValue("Accepted findings", String(findings.length))
     console.log()
+    output.success(`Scans now report only findings that are not in the baseline`)
+    output.dim("Commit the baseline file; run 'otc guardrail scan --no-baseline' to see every finding")
+    console.log()
+  },
+}
 
-    if (summary.detections.length === 0) {
-      output.success("No secrets detected")
-      console.log()
-      process.exit(0)
+const WatchCommand: CommandModule<{}, WatchArgs> = {
+  command: "watch [path]",
+  describe: "Scan a directory, then rescan files as they change and print new and cleared findings",
+  builder: (yargs) => {
+    return yargs
+      .positional("path", {
+        describe: "Directory to watch (default: current directory)",
+        type: "string",
+        default: ".",
+      })
+      .option("debounce", {
+        type: "number",
+        description: "Milliseconds to wait after the last change before rescanning",
+        default: WATCH_DEBOUNCE_MS,
+      })
+      .option("workers", {
+        type: "number",
+        description: "Worker threads for the initial scan (default: guardrails.workers, else in-process)",
+      })
+      .option("cache", {
+        type: "boolean",
+        description: "Reuse results for unchanged files from .ai/.cache in the initial scan (default: when .ai/.cache exists)",
+      })
+      .option("git", {
+        type: "boolean",
+        description: "List files with git ls-files inside a git repo (use --no-git to walk the tree with .gitignore/.otcignore)",
+        default: true,
+      })
+      .option("untracked", {
+        type: "boolean",
+        description: "Also scan untracked files that are not ignored (use --no-untracked for tracked files only)",
+        default: true,
+      })
+      .option("baseline", {
+        type: "boolean",
+        description: `Leave out findings accepted in .ai/${BASELINE_FILE} (use --no-baseline to report them too)`,
+        default: true,
+      })
+  },
+  handler: async (args) => {
+    const targetPath = resolve(args.path || ".")
+    if (!(await stat(targetPath).catch(() => null))?.isDirectory()) {
+      output.error(`${args.path} is not a directory`)
+      process.exit(1)
     }
+    if (args.debounce !== undefined && (!Number.isInteger(args.debounce) || args.debounce < 0)) {
+      output.error("--debounce must be a non-negative integer")
+      process.exit(1)
+    }
+    if (args.workers !== undefined && (!Number.isInteger(args.workers) || args.workers < 0)) {
+      output.error("--workers must be a non-negative integer")
+      process.exit(1)
+    }
+    const aiPath = await findAiFolder()
+    const { patterns, source } = await getPatterns(aiPath)
 
-    output.warning(`Found ${summary.detections.length} potential secrets`)
-    output.keyValue("  High confidence", String(summary.highConfidence))
-    output.keyValue("  Medium confidence", String(summary.mediumConfidence))
-    output.keyValue("  Low confidence", String(summary.lowConfidence))
-    console.log()
-
-    // Group by confidence
-    const highConfidence = summary.detections.filter((d) => d.confidence === "high")
-    const mediumConfidence = summary.detections.filter((d) => d.confidence === "medium")
-    const lowConfidence = summary.detections.filter((d) => d.confidence === "low")
-
-    if (highConfidence.length > 0) {
-      output.info("HIGH CONFIDENCE:")
-      for (const detection of highConfidence) {
-        console.log(`  ${detection.file}:${detection.line}`)
-        output.keyValue("    Pattern", detection.pattern, 0)
-        output.keyValue("    Match", detection.match, 0)
-        console.log()
+    // Same settings as a scan, loaded once: the compiled policy is reused by every rescan
+    let excludePaths: string[] | undefined
+    let excludeExtensions: string[] | undefined
+    let workers = args.workers
+    let maxFileSize: number | undefined
+    let cache: ScanCacheOptions | undefined
+    let quality: QualityRules | undefined
+    let baseline: Baseline | undefined
+    if (aiPath) {
+      cache = await getScanCache(aiPath, args.cache)
+      const config = await loadConfig(aiPath)
+      workers ??= config?.guardrails?.workers
+      maxFileSize = config?.guardrails?.maxFileSize
+      const policies = await loadPolicies(aiPath)
+      if (policies) {
+        excludePaths = policies.excludePaths
+        excludeExtensions = policies.excludeExtensions
+        quality = getQualityRules(policies.quality)
+      }
+      if (args.baseline !== false) {
+        try {
+          baseline = (await Baseline.load(join(aiPath, BASELINE_FILE), dirname(aiPath))) ?? undefined
+        } catch (error) {
+          output.error(error instanceof Error ? error.message : String(error))
+          process.exit(1)
+        }
       }
     }
 
-    if (mediumConfidence.length > 0) {
-      output.info("MEDIUM CONFIDENCE:")
-      for (const detection of mediumConfidence) {
-        console.log(`  ${detection.file}:${detection.line}`)
-        output.keyValue("    Pattern", detection.pattern, 0)
-        output.keyValue("    Match", detection.match, 0)
+    const watcher = new ScanWatcher(targetPath, {
+      patterns,
+      excludePaths,
+      excludeExtensions,
+      workers,
+      cache,
+      maxFileSize,
+      git: args.git,
+      untracked: args.untracked,
+      quality,
+      baseline,
+      debounceMs: args.debounce,
+      onRescan: (result) => {
+        if (result.deltas.length === 0) {
+          return
+        }
+        const time = new Date().toLocaleTimeString()
+        output.dim(`[${time}] ${result.full ? "ignore rules changed, rescanned" : "rescanned"} ${result.files} files in ${result.elapsedMs.toFixed(0)}ms`)
+        for (const delta of result.deltas) {
+          printDelta(delta)
+        }
+        const { detections } = watcher.current()
+        output.dim(`  ${detections.length} potential secrets (${detections.filter((d) => d.confidence === "high").length} high confidence)`)
         console.log()
-      }
+      },
+      onError: (error) => {
+        output.error(`Watching stopped: ${error.message}`)
+        process.exit(1)
+      },
+    })
+
+    const summary = await watcher.scanAll()
+    output.header("Guardrail Watch")
+    output.keyValue("Target", targetPath)
+    output.keyValue("Patterns", `${patterns.length} (${source})`)
+    if (quality) {
+      output.keyValue("Quality rules", String(quality.rules.length))
+    }
+    if (summary.fileSource) {
+      output.keyValue("Files listed", summary.fileSource === "git" ? "git ls-files" : "directory walk")
+    }
+    output.keyValue("Files scanned", String(summary.filesScanned))
+    output.keyValue("Scan time", `${(summary.wallClockMs / 1000).toFixed(2)}s`)
+    if (baseline) {
+      output.keyValue("Baseline", `${summary.baselineSuppressed} known findings left out (${baseline.size} accepted)`)
+    }
+    for (const skipped of summary.skippedPatterns) {
+      output.warning(`Pattern "${skipped.id}" not run: ${skipped.reason}`)
     }
+    output.keyValue("Potential secrets", `${summary.detections.length} (${summary.highConfidence} high confidence)`)
+    if (summary.quality.length > 0) {
+      output.keyValue("Quality rule violations", String(summary.quality.length))
+    }
+    console.log()
+    output.dim("Watching for changes (Ctrl+C to stop); run 'otc guardrail scan' for the full report")
+    console.log()
 
-    if (lowConfidence.length > 0) {
-      output.info("LOW CONFIDENCE:")
-      for (const detection of lowConfidence) {
-        console.log(`  ${detection.file}:${detection.line}`)
-        output.keyValue("    Pattern", detection.pattern, 0)
-        output.keyValue("    Match", detection.match, 0)
-        console.log()
-      }
+    watcher.watch()
+    process.on("SIGINT", async () => {
+      await watcher.close()
+      process.exit(0)
+    })
+  },
+}
+
+const ServeCommand: CommandModule<{}, ServeArgs> = {
+  command: "serve",
+  describe: "Keep policies and the scan index loaded and answer scans (e.g. from git hooks) over a local socket",
+  builder: (yargs) => {
+    return yargs.option("json", {
+      type: "boolean",
+      description: "Print the socket path as JSON once listening",
+      default: false,
+    })
+  },
+  handler: async (args) => {
+    const aiPath = await findAiFolder()
+    if (!aiPath) {
+      output.error(".ai/ folder not found. Run 'otc init' first.")
+      process.exit(1)
+    }
+    const daemon = new GuardrailDaemon(aiPath)
+    try {
+      await daemon.listen()
+    } catch (error) {
+      output.error(error instanceof Error ? error.message : String(error))
+      process.exit(1)
     }
 
-    output.dim("Run 'otc guardrail explain <pattern-id>' for pattern details")
-    console.log()
+    const stop = async () => {
+      await daemon.close()
+      process.exit(0)
+    }
+    process.on("SIGINT", stop)
+    process.on("SIGTERM", stop)
 
-    // Exit 1 if any high confidence findings
-    process.exit(summary.highConfidence > 0 ? 1 : 0)
+    if (args.json) {
+      output.json({ socket: daemon.socketPath, pid: process.pid })
+      return
+    }
+    output.header("Guardrail Daemon")
+    output.keyValue("Repository", dirname(aiPath))
+    output.keyValue("Socket", daemon.socketPath)
+    output.keyValue("PID", String(process.pid))
+    console.log()
+    output.success("Listening; 'otc guardrail scan' now runs here (Ctrl+C to stop)")
+    output.dim("Changes to config.yaml, policies.yaml and the baseline are picked up on the next scan")
+    console.log()
   },
 }
 
@@ -159,7 +850,7 @@ const ListCommand: CommandModule<{}, ListArgs> = {
     })
   },
   handler: async (args) => {
-    const { patterns, source } = await getPatterns()
+    const { patterns, source } = await getPatterns(await findAiFolder())
 
     if (args.json) {
       output.json({ patterns, source })
@@ -206,7 +897,7 @@ const ExplainCommand: CommandModule<{}, ExplainArgs> = {
       })
   },
   handler: async (args) => {
-    const { patterns, source } = await getPatterns()
+    const { patterns, source } = await getPatterns(await findAiFolder())
     const pattern = getPatternById(patterns, args.id)
 
     if (!pattern) {
@@ -281,6 +972,9 @@ export const GuardrailCommand: CommandModule = {
   builder: (yargs) => {
     return yargs
       .command(ScanCommand)
+      .command(BaselineCommand)
+      .command(WatchCommand)
+      .command(ServeCommand)
       .command(ListCommand)
       .command(ExplainCommand)
       .demandCommand(1, "Please specify a guardrail subcommand")
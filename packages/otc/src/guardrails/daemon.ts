@@ -0,0 +1,325 @@
+/**
+ * Guardrail scan daemon
+ * A long-running process per repository that keeps the compiled policy, quality rules, baseline
+ * and scan index in memory, and answers scan requests over a local socket (newline-delimited
+ * JSON, one request per connection). Only the CLI talks to it: git hooks reach it through
+ * `otc guardrail scan`, which scans in-process when no daemon is listening.
+ */
+
+import { createHash } from "crypto"
+import { connect, createServer, type Server, type Socket } from "net"
+import { mkdir, stat, unlink, writeFile } from "fs/promises"
+import { tmpdir } from "os"
+import { dirname, join, resolve } from "path"
+import {
+  BASELINE_FILE,
+  Baseline,
+  DEFAULT_PATTERNS,
+  RegexSandbox,
+  SCAN_CACHE_FILE,
+  ScanCache,
+  getCompiledPolicy,
+  getQualityRules,
+  scan,
+  scanDiff,
+  type CompiledPolicy,
+  type QualityRules,
+  type ScanSummary,
+} from "@openteamcode/guardrails"
+import { CONFIG_FILE, POLICIES_FILE, loadConfig, loadPolicies } from "../util/config"
+
+// Socket inside the .ai/ folder (next to the scan index, so it is gitignored with it)
+export const DAEMON_SOCKET_FILE = join(".cache", "guardrail.sock")
+
+// Unix socket paths are limited to ~104 bytes; longer ones move to the temp directory
+const MAX_SOCKET_PATH = 100
+
+/**
+ * Scan a path, or only the lines a git diff adds (`staged` / `since`), with the daemon's settings
+ */
+export interface DaemonScanRequest {
+  type: "scan"
+  // Absolute path to scan
+  path: string
+  // Directory the client runs in (diff results are relative to it)
+  cwd: string
+  staged?: boolean
+  since?: string
+  git?: boolean
+  untracked?: boolean
+  cache?: boolean
+  baseline?: boolean
+  concurrency?: number
+  workers?: number
+  maxFileSize?: number
+}
+
+export type DaemonRequest = DaemonScanRequest | { type: "ping" }
+
+/**
+ * Settings a scan ran with, for the report header
+ */
+export interface DaemonScanSettings {
+  patterns: number
+  patternsSource: "config" | "default"
+  qualityRules?: number
+  cache: boolean
+  baselineSize?: number
+}
+
+export type DaemonResponse =
+  | { ok: true; type: "scan"; summary: ScanSummary; settings: DaemonScanSettings }
+  | { ok: true; type: "ping"; root: string; pid: number }
+  | { ok: false; error: string }
+
+/**
+ * Socket the daemon of a repository listens on (a named pipe on Windows)
+ */
+export function daemonSocketPath(aiPath: string): string {
+  const id = createHash("sha256").update(resolve(aiPath)).digest("hex").slice(0, 16)
+  if (process.platform === "win32") {
+    return `\\\\.\\pipe\\otc-guardrail-${id}`
+  }
+  const path = join(resolve(aiPath), DAEMON_SOCKET_FILE)
+  if (Buffer.byteLength(path) <= MAX_SOCKET_PATH) {
+    return path
+  }
+  const runtimeDir = process.env.XDG_RUNTIME_DIR || tmpdir()
+  return join(runtimeDir, `otc-guardrail-${process.getuid?.() ?? 0}-${id}.sock`)
+}
+
+/**
+ * Send one request to a repository's daemon; null when none is listening (or it went away
+ * mid-request), so the caller scans in-process instead
+ */
+export function requestDaemon(socketPath: string, request: DaemonRequest): Promise<DaemonResponse | null> {
+  return new Promise((resolve) => {
+    const socket = connect(socketPath)
+    let text = ""
+    socket.setEncoding("utf-8")
+    socket.on("connect", () => {
+      socket.end(`${JSON.stringify(request)}\n`)
+    })
+    socket.on("data", (chunk: string) => {
+      text += chunk
+    })
+    socket.on("error", () => resolve(null))
+    socket.on("close", () => {
+      const line = text.slice(0, text.indexOf("\n"))
+      try {
+        resolve(line ? (JSON.parse(line) as DaemonResponse) : null)
+      } catch {
+        resolve(null)
+      }
+    })
+  })
+}
+
+/**
+ * Everything loaded from the .ai/ folder, rebuilt when one of its files changes
+ */
+interface DaemonState {
+  // mtimes of config.yaml, policies.yaml and the baseline
+  signature: string
+  patterns: number
+  patternsSource: "config" | "default"
+  policy: CompiledPolicy
+  quality?: QualityRules
+  baseline?: Baseline
+  excludePaths?: string[]
+  excludeExtensions?: string[]
+  workers?: number
+  maxFileSize?: number
+  sandbox?: RegexSandbox
+}
+
+/**
+ * Scan daemon for the repository that holds `aiPath`
+ */
+export class GuardrailDaemon {
+  readonly aiPath: string
+  readonly socketPath: string
+  private root: string
+  private server: Server | null = null
+  private state: DaemonState | null = null
+  // Index loaded once and kept in memory; saved after each scan that changes it
+  private cache: ScanCache | null = null
+  // Requests run one at a time: they share the cache's per-scan counters
+  private queue: Promise<unknown> = Promise.resolve()
+
+  constructor(aiPath: string) {
+    this.aiPath = resolve(aiPath)
+    this.root = dirname(this.aiPath)
+    this.socketPath = daemonSocketPath(this.aiPath)
+  }
+
+  /**
+   * Load the settings and start listening. A socket left behind by a daemon that died is
+   * replaced; one that still answers means a daemon is already running.
+   */
+  async listen(): Promise<void> {
+    await this.current()
+    if (process.platform !== "win32") {
+      const cacheDir = join(this.aiPath, dirname(DAEMON_SOCKET_FILE))
+      if (dirname(this.socketPath) === cacheDir) {
+        await mkdir(cacheDir, { recursive: true })
+        // Same ignore file the scan index writes, in case the daemon starts before any scan
+        await writeFile(join(cacheDir, ".gitignore"), "*\n", { flag: "wx" }).catch(() => {})
+      }
+      if (await requestDaemon(this.socketPath, { type: "ping" })) {
+        throw new Error(`A guardrail daemon is already listening on ${this.socketPath}`)
+      }
+      await unlink(this.socketPath).catch(() => {})
+    }
+    // Clients end their side once the request is sent; the answer still goes back
+    const server = createServer({ allowHalfOpen: true }, (socket) => this.accept(socket))
+    await new Promise<void>((resolve, reject) => {
+      server.once("error", reject)
+      server.listen(this.socketPath, () => {
+        server.off("error", reject)
+        resolve()
+      })
+    })
+    this.server = server
+  }
+
+  async close(): Promise<void> {
+    const server = this.server
+    this.server = null
+    if (server) {
+      await new Promise<void>((resolve) => server.close(() => resolve()))
+    }
+    await this.queue
+    await this.state?.sandbox?.close()
+    this.state = null
+  }
+
+  /**
+   * Answer a request (queued behind any in progress)
+   */
+  handle(request: DaemonRequest): Promise<DaemonResponse> {
+    const run = this.queue.then(() => this.run(request))
+    this.queue = run.catch(() => {})
+    return run.catch((error) => ({ ok: false, error: error instanceof Error ? error.message : String(error) }))
+  }
+
+  private accept(socket: Socket): void {
+    let text = ""
+    socket.setEncoding("utf-8")
+    socket.on("data", async (chunk: string) => {
+      text += chunk
+      const end = text.indexOf("\n")
+      if (end === -1) {
+        return
+      }
+      socket.removeAllListeners("data")
+      let response: DaemonResponse
+      try {
+        response = await this.handle(JSON.parse(text.slice(0, end)) as DaemonRequest)
+      } catch (error) {
+        response = { ok: false, error: `Invalid request: ${error instanceof Error ? error.message : error}` }
+      }
+      socket.end(`${JSON.stringify(response)}\n`)
+    })
+    // A client that gave up (e.g. a cancelled hook) just misses its answer
+    socket.on("error", () => {})
+  }
+
+  private async run(request: DaemonRequest): Promise<DaemonResponse> {
+    const state = await this.current()
+    if (request.type === "ping") {
+      return { ok: true, type: "ping", root: this.root, pid: process.pid }
+    }
+
+    const baseline = request.baseline === false ? undefined : state.baseline
+    const options = {
+      policy: state.policy,
+      sandbox: state.sandbox,
+      quality: state.quality,
+      baseline,
+      excludePaths: state.excludePaths,
+      excludeExtensions: state.excludeExtensions,
+      maxFileSize: request.maxFileSize ?? state.maxFileSize,
+    }
+    let summary: ScanSummary
+    let cache = false
+    if (request.staged || request.since !== undefined) {
+      summary = await scanDiff({
+        ...options,
+        staged: request.staged,
+        since: request.since,
+        paths: [request.path],
+        cwd: request.cwd,
+      })
+    } else {
+      // Same default as an in-process scan: the index is used when .ai/.cache exists
+      const cachePath = join(this.aiPath, SCAN_CACHE_FILE)
+      if (request.cache ?? (await stat(dirname(cachePath)).then((s) => s.isDirectory(), () => false))) {
+        this.cache ??= await ScanCache.load(
+          { path: cachePath, root: this.root },
+          state.quality ? `${state.policy.hash}:${state.quality.hash}` : state.policy.hash
+        )
+        cache = true
+      }
+      summary = await scan(request.path, {
+        ...options,
+        concurrency: request.concurrency,
+        workers: request.workers ?? state.workers,
+        git: request.git,
+        untracked: request.untracked,
+        cache: cache ? this.cache ?? undefined : undefined,
+      })
+    }
+    const settings: DaemonScanSettings = {
+      patterns: state.patterns,
+      patternsSource: state.patternsSource,
+      qualityRules: state.quality?.rules.length,
+      cache,
+      baselineSize: baseline?.size,
+    }
+    return { ok: true, type: "scan", summary, settings }
+  }
+
+  /**
+   * Settings for the next request: reloaded only when config.yaml, policies.yaml or the
+   * baseline changed since they were last read (a few stats per request)
+   */
+  private async current(): Promise<DaemonState> {
+    const files = [CONFIG_FILE, POLICIES_FILE, BASELINE_FILE].map((name) => join(this.aiPath, name))
+    const mtimes = await Promise.all(files.map((path) => stat(path).then((s) => s.mtimeMs, () => 0)))
+    const signature = mtimes.join(":")
+    if (this.state?.signature === signature) {
+      return this.state
+    }
+
+    const [config, policies] = await Promise.all([loadConfig(this.aiPath), loadPolicies(this.aiPath)])
+    const custom = policies !== null && policies.patterns.length > 0
+    const patterns = custom ? policies.patterns : DEFAULT_PATTERNS
+    const policy = getCompiledPolicy(patterns)
+    const baseline = (await Baseline.load(join(this.aiPath, BASELINE_FILE), this.root)) ?? undefined
+
+    // Keep the regex worker while the policy is unchanged; stopped patterns stay stopped until then
+    let sandbox = this.state?.policy === policy ? this.state.sandbox : undefined
+    if (sandbox !== this.state?.sandbox) {
+      await this.state?.sandbox?.close()
+    }
+    if (!sandbox && policy.patterns.some((compiled) => compiled.guarded)) {
+      sandbox = new RegexSandbox(policy)
+    }
+
+    this.state = {
+      signature,
+      patterns: patterns.length,
+      patternsSource: custom ? "config" : "default",
+      policy,
+      quality: getQualityRules(policies?.quality),
+      baseline,
+      excludePaths: policies?.excludePaths,
+      excludeExtensions: policies?.excludeExtensions,
+      workers: config?.guardrails?.workers,
+      maxFileSize: config?.guardrails?.maxFileSize,
+      sandbox,
+    }
+    return this.state
+  }
+}
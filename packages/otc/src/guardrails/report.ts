@@ -0,0 +1,127 @@
+/**
+ * Streaming report writers for guardrail scans
+ * Each detection is written as soon as it is found, so output starts before the scan ends
+ */
+
+import {
+  getPatternId,
+  getQualityRuleId,
+  type DetectionResult,
+  type PolicyPattern,
+  type QualityFinding,
+  type QualityPolicy,
+  type ScanSummary,
+} from "@openteamcode/guardrails"
+
+export type ReportFormat = "ndjson" | "sarif"
+
+export const REPORT_FORMATS: ReportFormat[] = ["ndjson", "sarif"]
+
+export interface ReportWriter {
+  detection(detection: DetectionResult): void
+  quality(finding: QualityFinding): void
+  end(summary: ScanSummary): void
+}
+
+const SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+const SARIF_LEVELS: Record<DetectionResult["confidence"], string> = {
+  high: "error",
+  medium: "warning",
+  low: "note",
+}
+
+const SARIF_QUALITY_LEVELS: Record<QualityPolicy["action"], string> = {
+  WARN: "warning",
+  INFO: "note",
+}
+
+type Write = (text: string) => void
+
+const stdoutWrite: Write = (text) => {
+  process.stdout.write(text)
+}
+
+/**
+ * One JSON object per line: a `detection` record per secret and a `quality` record per quality
+ * rule finding, then a closing `summary` record
+ */
+export function createNdjsonWriter(write: Write = stdoutWrite): ReportWriter {
+  return {
+    detection(detection) {
+      write(`${JSON.stringify({ type: "detection", ...detection })}\n`)
+    },
+    quality(finding) {
+      write(`${JSON.stringify({ type: "quality", ...finding })}\n`)
+    },
+    end(summary) {
+      const { detections: _detections, quality: _quality, ...totals } = summary
+      write(`${JSON.stringify({ type: "summary", ...totals })}\n`)
+    },
+  }
+}
+
+/**
+ * SARIF 2.1.0 log written incrementally: the run header up front, one result per finding,
+ * and the closing brackets (with scan totals as run properties) at the end
+ */
+export function createSarifWriter(
+  patterns: PolicyPattern[],
+  quality?: QualityPolicy,
+  write: Write = stdoutWrite
+): ReportWriter {
+  const rules = patterns.map((pattern) => ({
+    id: getPatternId(pattern),
+    name: pattern.name,
+    shortDescription: { text: pattern.name },
+    ...(pattern.description ? { fullDescription: { text: pattern.description } } : {}),
+    defaultConfiguration: { level: SARIF_LEVELS[pattern.confidence] },
+  }))
+  for (const rule of quality?.rules ?? []) {
+    rules.push({
+      id: getQualityRuleId(rule),
+      name: rule.name,
+      shortDescription: { text: rule.name },
+      ...(rule.message ? { fullDescription: { text: rule.message } } : {}),
+      defaultConfiguration: { level: SARIF_QUALITY_LEVELS[quality?.action ?? "WARN"] },
+    })
+  }
+  const tool = { driver: { name: "otc-guardrails", rules } }
+
+  const header = `{"version":"2.1.0","$schema":${JSON.stringify(SARIF_SCHEMA)}`
+  write(`${header},"runs":[{"tool":${JSON.stringify(tool)},"results":[`)
+  let first = true
+
+  const writeResult = (ruleId: string, level: string, text: string, file: string, line: number): void => {
+    const result = {
+      ruleId,
+      level,
+      message: { text },
+      locations: [
+        {
+          physicalLocation: {
+            artifactLocation: { uri: file.split("\\").join("/") },
+            region: { startLine: line },
+          },
+        },
+      ],
+    }
+    write(`${first ? "\n" : ",\n"}${JSON.stringify(result)}`)
+    first = false
+  }
+
+  return {
+    detection(detection) {
+      const text = `${detection.pattern}: ${detection.match}`
+      writeResult(detection.patternId, SARIF_LEVELS[detection.confidence], text, detection.file, detection.line)
+    },
+    quality(finding) {
+      const text = `${finding.message}: ${finding.match}`
+      writeResult(finding.ruleId, SARIF_QUALITY_LEVELS[finding.action], text, finding.file, finding.line)
+    },
+    end(summary) {
+      const { detections: _detections, quality: _quality, ...totals } = summary
+      write(`\n],"properties":${JSON.stringify(totals)}}]}\n`)
+    },
+  }
+}
@@ -0,0 +1,6 @@
+/**
+ * Scan worker bundle entry
+ * Built to dist/guardrails/scan-worker.js, where the bundled scan pool looks for it
+ */
+
+import "@openteamcode/guardrails/scan-worker"
@@ -154,7 +154,7 @@ async function scanFile(filePath: string, basePath: string): Promise<DetectionRe
   }
 }
 
-async function scanDirectory(dirPath: string, basePath: string): Promise<DetectionResult[]> {
+export async function scanDirectory(dirPath: string, basePath: string): Promise<DetectionResult[]> {
   const results: DetectionResult[] = []
 
   try {
@@ -250,4 +250,7 @@ async function main() {
   process.exit(highConfidence.length > 0 ? 1 : 0)
 }
 
-main().catch(console.error)
+// Imported by the guardrails benchmark as a reference engine; only run the CLI when executed directly
+if (import.meta.main) {
+  main().catch(console.error)
+}